@@ -2,7 +2,7 @@ from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import path, reverse
 from django.shortcuts import redirect
-from .models import User, StudentProfile, EmployerProfile, Skill, Education, Experience, PortfolioItem, PortfolioImage, PortfolioVideo
+from .models import User, StudentProfile, EmployerProfile, Skill, Education, Experience, PortfolioItem, PortfolioImage, PortfolioVideo, Location
 
 class UserAdmin(admin.ModelAdmin):
     list_display = ('username', 'email', 'is_student', 'is_employer', 'date_joined')
@@ -115,4 +115,10 @@ admin.site.register(Education)
 admin.site.register(Experience)
 admin.site.register(PortfolioItem)
 admin.site.register(PortfolioImage)
-admin.site.register(PortfolioVideo)
\ No newline at end of file
+admin.site.register(PortfolioVideo)
+
+@admin.register(Location)
+class LocationAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'city', 'region', 'country', 'latitude', 'longitude', 'is_remote')
+    list_filter = ('is_remote', 'country')
+    search_fields = ('city', 'region', 'country')
@@ -0,0 +1,155 @@
+"""
+Normalization of free-text locations ("Glasgow, Scotland, UK", "remote",
+"edinburgh") to canonical Location rows.
+
+Strings are split on commas into city[, region][, country]. Country aliases
+are folded ("UK", "United Kingdom" -> "United Kingdom") and casing is
+normalized, so variants of the same place share one row. Coordinates are not
+guessed; they come from a gazetteer CSV (see normalize_locations).
+"""
+import csv
+import math
+import re
+
+from django.db import IntegrityError, transaction
+
+from .models import Location
+
+REMOTE_WORDS = {'remote', 'anywhere', 'online', 'work from home', 'wfh', 'virtual', 'remote only'}
+
+COUNTRY_ALIASES = {
+    'uk': 'United Kingdom',
+    'u.k.': 'United Kingdom',
+    'gb': 'United Kingdom',
+    'great britain': 'United Kingdom',
+    'united kingdom': 'United Kingdom',
+    'us': 'United States',
+    'u.s.': 'United States',
+    'usa': 'United States',
+    'united states': 'United States',
+    'united states of america': 'United States',
+    'ie': 'Ireland',
+    'ireland': 'Ireland',
+    'in': 'India',
+    'india': 'India',
+    'ng': 'Nigeria',
+    'nigeria': 'Nigeria',
+    'pk': 'Pakistan',
+    'pakistan': 'Pakistan',
+    'ca': 'Canada',
+    'canada': 'Canada',
+    'au': 'Australia',
+    'australia': 'Australia',
+    'de': 'Germany',
+    'germany': 'Germany',
+    'fr': 'France',
+    'france': 'France',
+}
+
+# Regions that are commonly written in place of a country
+REGION_COUNTRIES = {
+    'scotland': 'United Kingdom',
+    'england': 'United Kingdom',
+    'wales': 'United Kingdom',
+    'northern ireland': 'United Kingdom',
+}
+
+EARTH_KM_PER_DEGREE = 111.32
+
+
+def _clean(part):
+    return re.sub(r'\s+', ' ', part).strip(' .')
+
+
+def _title(part):
+    return ' '.join(word[:1].upper() + word[1:].lower() for word in part.split(' '))
+
+
+def make_key(city='', region='', country='', is_remote=False):
+    if is_remote:
+        return 'remote'
+    return '|'.join(part.lower() for part in (city, region, country))
+
+
+def parse_location(text, default_country=''):
+    """
+    Split a location string into a dict of Location fields (including `key`),
+    or None if the string is empty.
+    """
+    text = _clean(text or '')
+    if not text:
+        return None
+    if text.lower() in REMOTE_WORDS:
+        return {'key': make_key(is_remote=True), 'city': '', 'region': '', 'country': '', 'is_remote': True}
+
+    parts = [_clean(p) for p in text.split(',') if _clean(p)]
+    city = region = country = ''
+    if parts and parts[-1].lower() in COUNTRY_ALIASES:
+        country = COUNTRY_ALIASES[parts.pop().lower()]
+    if parts and parts[-1].lower() in REGION_COUNTRIES:
+        region = _title(parts[-1])
+        country = country or REGION_COUNTRIES[parts.pop().lower()]
+    if parts:
+        city = _title(parts[0])
+        if len(parts) > 1 and not region:
+            # keep state/province codes such as "TX" or "NSW" upper-case
+            region = parts[1].upper() if len(parts[1]) <= 3 else _title(parts[1])
+    if not country and default_country:
+        country = COUNTRY_ALIASES.get(_clean(default_country).lower(), _title(_clean(default_country)))
+    return {
+        'key': make_key(city, region, country),
+        'city': city,
+        'region': region,
+        'country': country,
+        'is_remote': False,
+    }
+
+
+def resolve_location(text, default_country=''):
+    """Return the Location for `text`, creating it if needed (None for blanks)."""
+    fields = parse_location(text, default_country)
+    if fields is None:
+        return None
+    key = fields.pop('key')
+    try:
+        with transaction.atomic():
+            location, _ = Location.objects.get_or_create(key=key, defaults=fields)
+    except IntegrityError:
+        # lost a race with another writer creating the same key
+        location = Location.objects.get(key=key)
+    return location
+
+
+def find_location(text, default_country=''):
+    """Like resolve_location() but never writes; None if there is no match."""
+    fields = parse_location(text, default_country)
+    if fields is None:
+        return None
+    return Location.objects.filter(key=fields['key']).first()
+
+
+def load_gazetteer(path):
+    """
+    Set coordinates from a CSV with city,region,country,latitude,longitude
+    columns. Returns the number of locations updated.
+    """
+    updated = 0
+    with open(path, newline='', encoding='utf-8') as fh:
+        for row in csv.DictReader(fh):
+            fields = parse_location(
+                ', '.join(p for p in (row.get('city'), row.get('region'), row.get('country')) if p)
+            )
+            if fields is None:
+                continue
+            updated += Location.objects.filter(key=fields['key']).update(
+                latitude=float(row['latitude']),
+                longitude=float(row['longitude']),
+            )
+    return updated
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """(min_lat, min_lon, max_lat, max_lon) of a square around a point."""
+    dlat = radius_km / EARTH_KM_PER_DEGREE
+    dlon = radius_km / (EARTH_KM_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    return latitude - dlat, longitude - dlon, latitude + dlat, longitude + dlon
@@ -0,0 +1,44 @@
+"""
+Content-versioned URLs for profile images.
+
+StudentProfile and EmployerProfile store a short hash of their image next to
+the file, computed from the upload while it is still in memory (see their
+save()). Image URLs carry it as ?v=<hash>, so browsers can cache them for
+good and a new upload still shows at once, while building a URL reads only
+the model row: no exists() or get_modified_time() calls on the storage.
+"""
+import hashlib
+
+from django.contrib.staticfiles.storage import staticfiles_storage
+
+VERSION_LENGTH = 12
+
+
+def content_version(content):
+    """Short sha256 of a File's content, read in chunks."""
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()[:VERSION_LENGTH]
+
+
+def refresh_version(fieldfile, version):
+    """
+    The version to store for `fieldfile`: the hash of a newly assigned file,
+    blank once the file is cleared, otherwise `version` unchanged.
+    """
+    if not fieldfile:
+        return ''
+    if not fieldfile._committed:
+        return content_version(fieldfile.file)
+    return version
+
+
+def media_url(fieldfile, version, fallback_static_path):
+    """URL of `fieldfile` with its stored version, or a static fallback."""
+    if not fieldfile:
+        return staticfiles_storage.url(fallback_static_path)
+    if not version:
+        # stored before versions were; see backfill_media_versions
+        return fieldfile.url
+    return f"{fieldfile.url}?v={version}"
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-17 07:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_alter_employerprofile_phone_number_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=255, unique=True)),
+                ('city', models.CharField(blank=True, max_length=100)),
+                ('region', models.CharField(blank=True, max_length=100)),
+                ('country', models.CharField(blank=True, max_length=100)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('is_remote', models.BooleanField(default=False)),
+            ],
+            options={
+                'ordering': ['country', 'city'],
+                'indexes': [models.Index(fields=['country', 'city'], name='accounts_lo_country_025aea_idx'), models.Index(fields=['latitude', 'longitude'], name='accounts_lo_latitud_9ae239_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-17 07:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_location'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employerprofile',
+            name='company_logo_version',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+        migrations.AddField(
+            model_name='studentprofile',
+            name='profile_picture_version',
+            field=models.CharField(blank=True, editable=False, max_length=16),
+        ),
+    ]
@@ -3,6 +3,7 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.utils.html import mark_safe
+from .media import media_url, refresh_version
 # from django.contrib.auth.models import User
 
 class User(AbstractUser):
@@ -18,6 +19,12 @@ class UserProfile(models.Model):
     email_verified = models.BooleanField(default=False)
     personal_email_verification_token = models.UUIDField(null=True, blank=True)
 
+def _save_version_with(kwargs, field):
+    """Keep a file's version column in a save(update_fields=[...]) of the file."""
+    update_fields = kwargs.get('update_fields')
+    if update_fields is not None and field in update_fields:
+        kwargs['update_fields'] = {*update_fields, f'{field}_version'}
+
 class EmployerProfile(models.Model):
     # user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True)
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True)
@@ -30,6 +37,8 @@ class EmployerProfile(models.Model):
     phone_number = models.CharField(validators=[phone_regex], max_length=13)
     country = models.CharField(max_length=100)
     company_logo = models.ImageField(upload_to='company_logos/', blank=True, null=True)
+    # content hash of company_logo, set on save (see accounts/media.py)
+    company_logo_version = models.CharField(max_length=16, blank=True, editable=False)
     company_website = models.URLField(blank=True)
     company_description = models.TextField(blank=True)
     industry = models.CharField(max_length=100, blank=True)
@@ -42,17 +51,54 @@ class EmployerProfile(models.Model):
     def __str__(self):
         return self.company_name
 
+    def save(self, *args, **kwargs):
+        self.company_logo_version = refresh_version(self.company_logo, self.company_logo_version)
+        _save_version_with(kwargs, 'company_logo')
+        super().save(*args, **kwargs)
+
+    @property
+    def company_logo_url(self):
+        return media_url(self.company_logo, self.company_logo_version, 'images/default-logo.png')
+
 class Skill(models.Model):
     name = models.CharField(max_length=100, unique=True)
     def __str__(self): return self.name
     class Meta:
         ordering = ['name']
 
+class Location(models.Model):
+    """
+    Canonical place that free-text location fields are normalized to (see
+    accounts/locations.py). `key` is the lookup form of city/region/country;
+    latitude/longitude are optional and only filled from a gazetteer.
+    """
+    key = models.CharField(max_length=255, unique=True)
+    city = models.CharField(max_length=100, blank=True)
+    region = models.CharField(max_length=100, blank=True)
+    country = models.CharField(max_length=100, blank=True)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    is_remote = models.BooleanField(default=False)
+
+    def __str__(self):
+        if self.is_remote:
+            return 'Remote'
+        return ', '.join(part for part in (self.city, self.region, self.country) if part)
+
+    class Meta:
+        ordering = ['country', 'city']
+        indexes = [
+            models.Index(fields=['country', 'city']),
+            models.Index(fields=['latitude', 'longitude']),
+        ]
+
 class StudentProfile(models.Model):
     # user = models.OneToOneField(User, on_delete=models.CASCADE,primary_key=True)
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True)
     personal_email = models.EmailField(unique=True, blank=True, null=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    # content hash of profile_picture, set on save (see accounts/media.py)
+    profile_picture_version = models.CharField(max_length=16, blank=True, editable=False)
     profile_picture_url = models.URLField(blank=True, null=True)
     bio = models.TextField(blank=True, null=True)
     location = models.CharField(max_length=100, blank=True, null=True)
@@ -80,6 +126,11 @@ class StudentProfile(models.Model):
     
     def __str__(self): return self.user.username
 
+    def save(self, *args, **kwargs):
+        self.profile_picture_version = refresh_version(self.profile_picture, self.profile_picture_version)
+        _save_version_with(kwargs, 'profile_picture')
+        super().save(*args, **kwargs)
+
     def admin_photo(self):
         if self.profile_picture:
             return mark_safe(f'<img src="{self.profile_picture.url}" width="100" />')
@@ -89,9 +140,7 @@ class StudentProfile(models.Model):
 
     @property
     def profile_picture_url(self):
-        if self.profile_picture and hasattr(self.profile_picture, 'url'):
-            return self.profile_picture.url
-        return '/static/images/default-profile.jpg'
+        return media_url(self.profile_picture, self.profile_picture_version, 'images/default-profile.jpg')
 
 class Education(models.Model):
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='educations')
@@ -1,4 +1,3 @@
-import time
 from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout, update_session_auth_hash
@@ -13,12 +12,11 @@ from django.db import transaction
 import uuid
 import logging
 from django.db.models import Q  
+from jobs.cache import cache_anonymous_response
 from jobs.models import Job
 from .forms import StudentSignUpForm, EmployerSignUpForm, LoginForm, UserUpdateForm, StudentProfileForm, EmployerProfileForm, EducationForm, ExperienceForm, PortfolioForm, EducationFormSet, ExperienceFormSet, PortfolioFormSet
 from .models import StudentProfile, EmployerProfile, Skill, Education, Experience, PortfolioItem, UserProfile
 from django.contrib.auth import get_user_model
-from django.core.files.storage import default_storage
-from django.contrib.staticfiles.storage import staticfiles_storage
 User = get_user_model()
 
 logger = logging.getLogger(__name__)
@@ -330,21 +328,11 @@ def employer_profile(request):
         user_form = UserUpdateForm(instance=request.user)
         profile_form = EmployerProfileForm(instance=employer)
 
-    # Build a cache-busted logo URL for the sidebar/profile
-    if employer.company_logo and default_storage.exists(employer.company_logo.name):
-        try:
-            mtime = int(default_storage.get_modified_time(employer.company_logo.name).timestamp())
-        except Exception:
-            mtime = int(time.time())
-        company_logo_url = f"{employer.company_logo.url}?v={mtime}"
-    else:
-        company_logo_url = staticfiles_storage.url('images/default-logo.png')
-
     context = {
         'user_form': user_form,
         'profile_form': profile_form,
         'employer': employer,
-        'company_logo_url': company_logo_url,
+        'company_logo_url': employer.company_logo_url,
     }
     return render(request, 'accounts/employer_profile.html', context)
 
@@ -576,6 +564,7 @@ def view_portfolio(request, id):
     portfolio_item = get_object_or_404(PortfolioItem, id=id, student__user=request.user)
     return render(request, 'accounts/view_portfolio.html', {'portfolio_item': portfolio_item})
 
+@cache_anonymous_response('home')
 def home(request):
     featured_jobs = Job.objects.filter(
         is_active=True,
@@ -614,4 +603,4 @@ def upload_profile_picture(request):
     profile = request.user.studentprofile  # adjust if you also support employer
     profile.profile_picture = file
     profile.save()
-    return JsonResponse({'ok': True, 'url': profile.profile_picture.url})
+    return JsonResponse({'ok': True, 'url': profile.profile_picture_url})
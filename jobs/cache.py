@@ -0,0 +1,145 @@
+"""
+Versioned response cache for the public job catalogue.
+
+Anonymous responses for the catalogue pages (home, job_list, job_detail) are
+cached under a key that embeds a global catalogue version. Any write that can
+change what those pages show bumps the version (see jobs/signals.py), which
+orphans every cached page at once without having to enumerate keys; the stale
+entries simply age out.
+
+Dashboard widgets (see jobs/widgets.py) use the same scheme at a finer grain:
+one version per (owner, widget), bumped by the writes that feed that widget.
+
+The versions live in the default cache, so every process must share a cache
+backend (CACHE_BACKEND/CACHE_LOCATION) for invalidation to be seen everywhere.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.core.cache import cache
+from django.db import transaction
+
+CATALOGUE_VERSION_KEY = 'jobs:catalogue:version'
+
+
+def get_catalogue_version():
+    version = cache.get(CATALOGUE_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOGUE_VERSION_KEY, 1, timeout=None)
+        version = cache.get(CATALOGUE_VERSION_KEY, 1)
+    return version
+
+
+def bump_catalogue_version():
+    try:
+        return cache.incr(CATALOGUE_VERSION_KEY)
+    except ValueError:
+        # key was evicted (or never set); any fresh value invalidates
+        cache.set(CATALOGUE_VERSION_KEY, 2, timeout=None)
+        return 2
+
+
+def _response_key(prefix, request):
+    # AJAX and full-page requests to the same URL return different bodies
+    variant = f"{request.get_full_path()}|{request.headers.get('X-Requested-With', '')}"
+    digest = hashlib.md5(variant.encode('utf-8')).hexdigest()
+    return f"jobs:page:{prefix}:v{get_catalogue_version()}:{digest}"
+
+
+def _cacheable_request(request):
+    if request.method not in ('GET', 'HEAD') or request.user.is_authenticated:
+        return False
+    # a pending flash message would be baked into the page
+    return not len(get_messages(request))
+
+
+def _cacheable_response(request, response):
+    return (
+        response.status_code == 200
+        and not response.cookies
+        and not response.has_header('Set-Cookie')
+        # a rendered {% csrf_token %} is per-visitor
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def cache_anonymous_response(prefix, timeout=None):
+    """
+    Serve anonymous GETs of the decorated view from the catalogue cache.
+    Logged-in users always get a fresh response.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if not _cacheable_request(request):
+                return view(request, *args, **kwargs)
+            key = _response_key(prefix, request)
+            response = cache.get(key)
+            if response is not None:
+                response['X-Catalogue-Cache'] = 'hit'
+                return response
+            response = view(request, *args, **kwargs)
+            if _cacheable_response(request, response):
+                cache.set(key, response, settings.CATALOGUE_CACHE_TIMEOUT if timeout is None else timeout)
+                response['X-Catalogue-Cache'] = 'miss'
+            return response
+        return wrapper
+    return decorator
+
+
+# ---------- Dashboard widgets ----------
+# Widget owners: a StudentProfile or an EmployerProfile id
+STUDENT = 'student'
+EMPLOYER = 'employer'
+
+
+def _widget_version_key(scope, owner_id, name):
+    return f"jobs:widget:{scope}:{owner_id}:{name}:version"
+
+
+def get_widget_version(scope, owner_id, name):
+    # Versions start from the clock rather than 1, so a version key that was
+    # evicted can never come back as a value some cached fragment still uses.
+    key = _widget_version_key(scope, owner_id, name)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), settings.WIDGET_CACHE_TIMEOUT)
+        version = cache.get(key, 0)
+    return version
+
+
+def widget_cache_key(scope, owner_id, name, *extra):
+    version = get_widget_version(scope, owner_id, name)
+    suffix = ''.join(f":{part}" for part in extra)
+    return f"jobs:widget:{scope}:{owner_id}:{name}:v{version}{suffix}"
+
+
+def bump_widgets(scope, owner_ids, *names):
+    """
+    Invalidate the `names` widgets of every owner in `owner_ids`. Runs after the current transaction commits,
+    so a render racing the write can't cache the old state under the new
+    version.
+    """
+    owner_ids = {owner_id for owner_id in owner_ids if owner_id is not None}
+    if not owner_ids or not names:
+        return
+
+    def bump():
+        version = time.time_ns()
+        cache.set_many(
+            {_widget_version_key(scope, owner_id, name): version for owner_id in owner_ids for name in names},
+            settings.WIDGET_CACHE_TIMEOUT,
+        )
+    transaction.on_commit(bump)
+
+
+def ui_settings_key(user_id):
+    return f"jobs:ui-settings:{user_id}"
+
+
+def invalidate_ui_settings(user_id):
+    """Forget a user's cached UI settings once the current transaction commits."""
+    transaction.on_commit(lambda: cache.delete(ui_settings_key(user_id)))
@@ -1,32 +1,51 @@
+"""
+UI settings for every template render.
+
+The resolved settings of a user are cached under ui_settings_key(user id),
+so an ordinary page view costs no queries for them. A miss is one query on
+UserSettings by the user's id (the StudentProfile primary key), which also
+covers users without a student profile. Saving or deleting UserSettings
+drops the entry (see jobs/signals.py).
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from .cache import ui_settings_key
+from .models import UserSettings
+
+DEFAULTS = {
+    'theme': 'auto',
+    'dark_mode': False,
+    'font_size': 'md',
+    'reduced_motion': False,
+    'high_contrast': False,
+    'compact_mode': False,
+    'language': 'en',
+}
+
+
+def resolved_ui_settings(user):
+    key = ui_settings_key(user.pk)
+    data = cache.get(key)
+    if data is None:
+        data = dict(DEFAULTS)
+        row = UserSettings.objects.filter(student_id=user.pk).values(*DEFAULTS).first()
+        if row:
+            data.update(row)
+            # blank choices fall back to the defaults
+            for name in ('theme', 'font_size', 'language'):
+                data[name] = data[name] or DEFAULTS[name]
+        cache.set(key, data, settings.UI_SETTINGS_CACHE_TIMEOUT)
+    return data
+
+
 def ui_settings(request):
-    data = {
-        'theme': 'auto',
-        'dark_mode': False,
-        'font_size': 'md',
-        'reduced_motion': False,
-        'high_contrast': False,
-        'compact_mode': False,
-        'language': 'en',
-    }
-    if request.user.is_authenticated and hasattr(request.user, 'studentprofile'):
-        s = getattr(request.user.studentprofile, 'settings', None)
-        if s:
-            data.update({
-                'theme': s.theme or 'auto',
-                'dark_mode': s.dark_mode,
-                'font_size': s.font_size or 'md',
-                'reduced_motion': s.reduced_motion,
-                'high_contrast': s.high_contrast,
-                'compact_mode': s.compact_mode,
-                'language': s.language or 'en',
-            })
-    return {'ui_settings': data}
+    if not request.user.is_authenticated:
+        return {'ui_settings': dict(DEFAULTS)}
+    return {'ui_settings': resolved_ui_settings(request.user)}
+
 
 def user_ui_settings(request):
-    # default
-    ctx = {'dark_mode': False}
-    if request.user.is_authenticated and hasattr(request.user, 'studentprofile'):
-        settings_obj = getattr(request.user.studentprofile, 'settings', None)
-        if settings_obj:
-            ctx['dark_mode'] = bool(settings_obj.dark_mode)
-    return ctx
+    if not request.user.is_authenticated:
+        return {'dark_mode': False}
+    return {'dark_mode': bool(resolved_ui_settings(request.user)['dark_mode'])}
@@ -0,0 +1,120 @@
+"""
+Facet filters for the job catalogue.
+
+Selected values are combined with AND across facets and OR within a facet
+(?job_type=INT&job_type=GIG&paid_type=PAID). Each facet is counted over the
+results filtered by all the *other* facets, so ticking INT still shows how
+many GIG jobs ticking GIG as well would add. All of them come from a single
+GROUP BY over every facet column of the unfaceted result set, folded per
+facet in Python, rather than one COUNT per facet value.
+"""
+from collections import Counter
+
+from django.db.models import Count
+
+from .models import Job
+
+BOOLEAN_VALUES = {'true': True, '1': True, 'false': False, '0': False}
+
+
+class Facet:
+    def __init__(self, name, label, choices=None, boolean=False, limit=None):
+        self.name = name
+        self.label = label
+        self.choices = dict(choices) if choices else None
+        self.boolean = boolean
+        self.limit = limit
+
+    def parse(self, raw_values):
+        """Clean the raw query-string values; unknown values are dropped."""
+        values = []
+        for raw in raw_values:
+            raw = raw.strip()
+            if self.boolean:
+                if raw.lower() in BOOLEAN_VALUES:
+                    values.append(BOOLEAN_VALUES[raw.lower()])
+            elif self.choices is None or raw in self.choices:
+                if raw:
+                    values.append(raw)
+        return list(dict.fromkeys(values))
+
+    def label_for(self, value):
+        if self.boolean:
+            return 'Yes' if value else 'No'
+        if self.choices is not None:
+            return self.choices.get(value, value)
+        return value
+
+    def param(self, value):
+        if self.boolean:
+            return 'true' if value else 'false'
+        return value
+
+
+FACETS = [
+    Facet('job_type', 'Job type', Job.JOB_TYPE_CHOICES),
+    Facet('paid_type', 'Pay', Job.PAID_CHOICES),
+    Facet('salary_type', 'Salary basis', Job.SALARY_TYPE_CHOICES),
+    Facet('is_physical', 'On-site', boolean=True),
+    Facet('interview_type', 'Interview', Job.INTERVIEW_TYPE_CHOICES),
+    Facet('location', 'Location', limit=20),
+]
+
+
+def selected_facets(querydict):
+    """{facet name: [cleaned values]} for every facet present in the request."""
+    selected = {}
+    for facet in FACETS:
+        values = facet.parse(querydict.getlist(facet.name))
+        if values:
+            selected[facet.name] = values
+    return selected
+
+
+def apply_facets(queryset, selected):
+    for name, values in selected.items():
+        queryset = queryset.filter(**{f'{name}__in': values})
+    return queryset
+
+
+def facet_counts(queryset, selected=None):
+    """
+    Per-facet value counts for `queryset`, the results before apply_facets(),
+    in one query. Returns a list of
+    {'name', 'label', 'options': [{'value', 'label', 'count', 'selected'}]}
+    with options ordered by count (highest first); selected values are always
+    listed, even past a facet's limit.
+    """
+    selected = selected or {}
+    names = [facet.name for facet in FACETS]
+    chosen = [set(selected.get(name, ())) for name in names]
+    counters = {name: Counter() for name in names}
+    rows = queryset.order_by().values(*names).annotate(n=Count('pk')).values_list(*names, 'n')
+    for row in rows:
+        n, values = row[-1], row[:-1]
+        misses = [i for i, value in enumerate(values) if chosen[i] and value not in chosen[i]]
+        if len(misses) > 1:
+            continue
+        for i, (name, value) in enumerate(zip(names, values)):
+            # a row counts for a facet when it passes every other facet
+            if misses and misses != [i]:
+                continue
+            if value is not None and value != '':
+                counters[name][value] += n
+
+    result = []
+    for facet, picked in zip(FACETS, chosen):
+        counts = counters[facet.name]
+        values = [value for value, _ in counts.most_common(facet.limit)]
+        values += [value for value in selected.get(facet.name, []) if value not in values]
+        options = [
+            {
+                'value': facet.param(value),
+                'label': facet.label_for(value),
+                'count': counts[value],
+                'selected': value in picked,
+            }
+            for value in values
+        ]
+        result.append({'name': facet.name, 'label': facet.label, 'options': options})
+    return result
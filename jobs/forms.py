@@ -23,7 +23,7 @@ class JobForm(forms.ModelForm):
 
     class Meta:
         model = Job
-        fields = ['title', 'job_type', 'description', 'requirements', 'location', 'salary', 
+        fields = ['title', 'job_type', 'description', 'requirements', 'skills_required', 'location', 'salary', 
                  'max_applications', 'application_deadline', 'interview_type', 'location_address', 'media', 'media_type','paid_type', 'salary_type', 'is_physical']
         widgets = {
             'description': forms.Textarea(attrs={'rows': 5}),
@@ -31,7 +31,8 @@ class JobForm(forms.ModelForm):
             'interview_type': forms.Select(),
             'media_type': forms.Select(choices=(('', 'Select media type'), ('image', 'Image'), ('video', 'Video'))),
             'paid_type': forms.Select(attrs={'data-bs-toggle': 'tooltip', 'title': 'Select if the job is paid or unpaid'}),
-            'salary_type': forms.Select(attrs={'data-bs-toggle': 'tooltip', 'title': 'Select per hour or per day if paid'}),
+            'skills_required': forms.SelectMultiple(attrs={'size': 8, 'data-bs-toggle': 'tooltip', 'title': 'Used to recommend this job to students with matching skills'}),
+            'salary_type': forms.Select(attrs={'data-bs-toggle': 'tooltip', 'title': 'Select per hour, per day or a fixed total if paid'}),
             'is_physical': forms.CheckboxInput(attrs={'data-bs-toggle': 'tooltip', 'title': 'Check if internship requires physical presence'}),
         }
 
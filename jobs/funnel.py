@@ -0,0 +1,170 @@
+"""
+Hiring-funnel rollups (JobFunnelDay).
+
+Every application and status change adds to one (job, day) row, so the
+employer dashboard reads O(days) rollup rows per job instead of scanning
+Application and Interview:
+
+  * record_application(): a new application, counted on its applied day
+  * record_transitions(): status changes made through jobs/services.py,
+    counted on the day of the change
+
+The rows are counters of events, not snapshots: an interview that is
+cancelled (INTERVIEW -> PENDING) stays counted as interviewed. The
+backfill_funnel command rebuilds them from the Application and Interview
+tables; see rebuild_funnel() for what it can and can't recover.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Application, Interview, JobFunnelDay
+
+STATUS_COLUMNS = {
+    'INTERVIEW': 'interviewed',
+    'ACCEPTED': 'accepted',
+    'REJECTED': 'rejected',
+    'WITHDRAWN': 'withdrawn',
+}
+DECISIONS = ('ACCEPTED', 'REJECTED')
+COUNTERS = ['applied', 'interviewed', 'accepted', 'rejected', 'withdrawn', 'decisions', 'decision_seconds']
+
+
+def _add(job_id, day, deltas):
+    """Add {column: n} to the (job, day) row with F() updates, creating it if needed."""
+    deltas = {column: n for column, n in deltas.items() if n}
+    if not deltas:
+        return
+    increments = {column: F(column) + n for column, n in deltas.items()}
+    if JobFunnelDay.objects.filter(job_id=job_id, day=day).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            JobFunnelDay.objects.create(job_id=job_id, day=day, **deltas)
+    except IntegrityError:
+        # another writer created the row first
+        JobFunnelDay.objects.filter(job_id=job_id, day=day).update(**increments)
+
+
+def record_application(job_id, applied_date):
+    _add(job_id, timezone.localdate(applied_date), {'applied': 1})
+
+
+def transition_deltas(previous, status, applied_date, when):
+    """Funnel counters for one application moving from `previous` to `status`."""
+    deltas = Counter()
+    column = STATUS_COLUMNS.get(status)
+    if column is None or status == previous:
+        return deltas
+    deltas[column] += 1
+    if status in DECISIONS and previous not in DECISIONS:
+        deltas['decisions'] += 1
+        deltas['decision_seconds'] += max(int((when - applied_date).total_seconds()), 0)
+    return deltas
+
+
+def record_transitions(changes, status, when=None):
+    """
+    Count status changes. `changes` is an iterable of (job_id, previous
+    status, applied_date); rows of the same job are folded into one update.
+    """
+    when = when or timezone.now()
+    day = timezone.localdate(when)
+    per_job = defaultdict(Counter)
+    for job_id, previous, applied_date in changes:
+        per_job[job_id].update(transition_deltas(previous, status, applied_date, when))
+    for job_id, deltas in per_job.items():
+        _add(job_id, day, deltas)
+
+
+def rebuild_funnel(job_ids):
+    """
+    Recompute the rollups of `job_ids` from scratch. Status history isn't
+    stored, so each application contributes:
+
+      * applied on its applied day
+      * interviewed on the day its first interview was created, if any
+      * its current ACCEPTED/REJECTED/WITHDRAWN status on status_changed_at
+        (applications changed before that column existed fall back to their
+        applied day)
+
+    Returns the number of rows written.
+    """
+    rows = defaultdict(Counter)
+    applications = Application.objects.filter(job_id__in=job_ids).order_by()
+    for row in (applications
+                .annotate(day=TruncDate('applied_date'))
+                .values('job_id', 'day')
+                .annotate(n=Count('pk'))):
+        rows[row['job_id'], row['day']]['applied'] += row['n']
+
+    first_interviews = (Interview.objects
+                        .filter(application__job_id__in=job_ids)
+                        .order_by()
+                        .values('application_id', 'application__job_id')
+                        .annotate(first=Min('created_at')))
+    for row in first_interviews:
+        rows[row['application__job_id'], timezone.localdate(row['first'])]['interviewed'] += 1
+
+    decided = (applications
+               .filter(status__in=[s for s in STATUS_COLUMNS if s != 'INTERVIEW'])
+               .values_list('job_id', 'status', 'applied_date', 'status_changed_at'))
+    for job_id, status, applied_date, changed_at in decided:
+        when = changed_at or applied_date
+        rows[job_id, timezone.localdate(when)].update(transition_deltas(None, status, applied_date, when))
+
+    with transaction.atomic():
+        JobFunnelDay.objects.filter(job_id__in=job_ids).delete()
+        JobFunnelDay.objects.bulk_create([
+            JobFunnelDay(job_id=job_id, day=day, **counters)
+            for (job_id, day), counters in rows.items()
+        ])
+    return len(rows)
+
+
+def funnel_summary(jobs, days):
+    """
+    Funnel of `jobs` (a Job queryset) over the last `days` days, from the
+    rollups only. Returns {'totals', 'daily', 'per_job', 'since'}; each entry
+    carries the counters plus the share of applicants interviewed and
+    accepted, and the average days to a decision.
+    """
+    since = timezone.localdate() - timedelta(days=days - 1)
+    rollups = JobFunnelDay.objects.filter(job__in=jobs, day__gte=since).order_by()
+    # aliased: an annotation can't reuse a field's name
+    sums = {f'sum_{column}': Sum(column) for column in COUNTERS}
+
+    by_day = {row['day']: _counters(row) for row in rollups.values('day').annotate(**sums)}
+    empty = dict.fromkeys(COUNTERS, 0)
+    daily = [
+        _rates({'day': day, **by_day.get(day, empty)})
+        for day in (since + timedelta(days=offset) for offset in range(days))
+    ]
+    peak = max(row['applied'] for row in daily) if daily else 0
+    for row in daily:
+        row['bar'] = round(100 * row['applied'] / peak) if peak else 0
+
+    per_job = [
+        _rates({'job_id': row['job_id'], 'title': row['job__title'], **_counters(row)})
+        for row in rollups.values('job_id', 'job__title').annotate(**sums).order_by('-sum_applied', 'job_id')
+    ]
+    totals = _rates({c: sum(row[c] for row in daily) for c in COUNTERS})
+    return {'totals': totals, 'daily': daily, 'per_job': per_job, 'since': since}
+
+
+def _counters(row):
+    return {column: row[f'sum_{column}'] or 0 for column in COUNTERS}
+
+
+def _rates(row):
+    applied, interviewed = row['applied'], row['interviewed']
+    row['interview_rate'] = round(100 * interviewed / applied) if applied else None
+    row['accept_rate'] = round(100 * row['accepted'] / applied) if applied else None
+    row['days_to_decision'] = (
+        round(row['decision_seconds'] / row['decisions'] / 86400, 1) if row['decisions'] else None
+    )
+    return row
@@ -0,0 +1,137 @@
+"""
+Server-side applications grid for employers.
+
+employer_applications_grid returns one keyset page (jobs/pagination.py) of
+the employer's applications as JSON, so the client never holds more than
+APPLICATION_GRID_MAX_PAGE_SIZE rows:
+
+    ?job=<id>          only these jobs (repeatable)
+    ?status=PENDING    only these statuses (repeatable)
+    ?task=none|assigned|submitted|completed
+    ?sort=applied_desc|applied_asc|status|score_desc|score_asc
+    ?cursor=...&page_size=...
+
+Filtering on job and status and sorting on applied date are served by the
+Application (job, status, applied_date) and (job, -applied_date, -id)
+indexes. Rows are projected with values() over one LEFT JOIN chain
+(student, job, task, submission, assessment report), never model instances.
+
+The employer dashboard's applications table is drawn from these pages (see
+widgets/employer_applications.html), so each row also carries the links
+that table offers.
+"""
+from django.core.files.storage import default_storage
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import Coalesce
+from django.urls import reverse
+from django.utils.text import Truncator
+
+from .models import Application
+
+STATUS_LABELS = dict(Application.STATUS_CHOICES)
+
+# Applications without an assessment report sort below every real score
+UNSCORED = -1.0
+
+ORDERINGS = {
+    'applied_desc': ['-applied_date', '-id'],
+    'applied_asc': ['applied_date', 'id'],
+    'status': ['status', '-applied_date', '-id'],
+    'score_desc': ['-assessment_score', '-id'],
+    'score_asc': ['assessment_score', 'id'],
+}
+DEFAULT_SORT = 'applied_desc'
+SORT_LABELS = {
+    'applied_desc': 'Newest first',
+    'applied_asc': 'Oldest first',
+    'status': 'Status',
+    'score_desc': 'Highest score',
+    'score_asc': 'Lowest score',
+}
+
+TASK_STATES = {
+    'none': Q(task_assignment__isnull=True),
+    'assigned': Q(task_assignment__isnull=False, task_assignment__completed=False,
+                  task_assignment__submission__isnull=True),
+    'submitted': Q(task_assignment__completed=False, task_assignment__submission__isnull=False),
+    'completed': Q(task_assignment__completed=True),
+}
+TASK_STATE_LABELS = {'none': 'No Task', 'assigned': 'Assigned', 'submitted': 'Submitted', 'completed': 'Completed'}
+
+FIELDS = [
+    'id', 'status', 'applied_date', 'job_id', 'job__title', 'student_id', 'student__user__username',
+    'task_assignment__id', 'task_assignment__completed', 'task_assignment__task_description',
+    'task_assignment__submission__id',
+    'task_assignment__submission__work_file', 'assessment_score',
+    'job__paid_type', 'payment__released',
+]
+
+
+def grid_params(querydict, employer):
+    """
+    Clean the grid query string into (filters, sort). Unknown statuses, task
+    states and other employers' jobs are dropped rather than rejected.
+    """
+    job_ids = [value for value in querydict.getlist('job') if value.isdigit()]
+    if job_ids:
+        job_ids = list(employer.jobs.filter(pk__in=job_ids).values_list('pk', flat=True))
+    filters = {
+        'job': job_ids,
+        'status': [value for value in querydict.getlist('status') if value in STATUS_LABELS],
+        'task': querydict.get('task') if querydict.get('task') in TASK_STATES else '',
+    }
+    sort = querydict.get('sort')
+    return filters, sort if sort in ORDERINGS else DEFAULT_SORT
+
+
+def grid_queryset(employer, filters):
+    applications = (Application.objects
+                    .filter(job__employer=employer)
+                    .annotate(assessment_score=Coalesce(
+                        F('assessment__report__total_score'), Value(UNSCORED), output_field=FloatField())))
+    if filters['job']:
+        applications = applications.filter(job_id__in=filters['job'])
+    if filters['status']:
+        applications = applications.filter(status__in=filters['status'])
+    if filters['task']:
+        applications = applications.filter(TASK_STATES[filters['task']])
+    return applications.values(*FIELDS)
+
+
+def _task_state(row):
+    if row['task_assignment__id'] is None:
+        return 'none'
+    if row['task_assignment__completed']:
+        return 'completed'
+    if row['task_assignment__submission__id'] is not None:
+        return 'submitted'
+    return 'assigned'
+
+
+def grid_row(row):
+    score = row['assessment_score']
+    work_file = row['task_assignment__submission__work_file']
+    task_state = _task_state(row)
+    description = row['task_assignment__task_description']
+    return {
+        'id': row['id'],
+        'student': {'id': row['student_id'], 'username': row['student__user__username']},
+        'job': {'id': row['job_id'], 'title': row['job__title']},
+        'status': row['status'],
+        'status_display': STATUS_LABELS.get(row['status'], row['status']),
+        'applied_date': row['applied_date'].isoformat(),
+        'task_state': task_state,
+        'task_description': Truncator(description).words(20) if description else None,
+        'submission_file_url': default_storage.url(work_file) if work_file else None,
+        'assessment_score': None if score == UNSCORED else score,
+        'manage_url': reverse('jobs:manage_application', args=[row['id']]),
+        'schedule_interview_url': (reverse('jobs:schedule_interview', args=[row['id']])
+                                   if row['status'] == 'PENDING' else None),
+        'assign_task_url': (reverse('payment:assign_task', args=[row['id']])
+                            if row['status'] == 'ACCEPTED' and task_state == 'none' else None),
+        'feedback_url': (reverse('payment:submit_feedback', args=[row['task_assignment__id']])
+                         if task_state == 'submitted' else None),
+        'release_payment_url': (reverse('payment:release_payment', args=[row['task_assignment__id']])
+                                if task_state == 'completed' and row['job__paid_type'] == 'PAID'
+                                and not row['payment__released'] else None),
+    }
@@ -0,0 +1,318 @@
+"""
+Platform-wide KPI rollups for the staff analytics page.
+
+The refresh_kpis command folds new rows of the live tables into small daily
+rollups, and kpi_dashboard reads only those:
+
+    SignupDay            accounts.User          by pk          signups by role
+    ApplicationKpiDay    Application            by pk          applied, by university and country
+                         Application            status_changed_at
+                                                               accepted / rejected
+    AssessmentScoreDay   assessments.Report     by pk          score histogram
+    PaymentReleaseDay    payment.Payment        release_date   payments released, by currency
+
+Each source keeps a KpiWatermark. Append-only sources are read in primary
+key batches past `last_id`; sources whose rows change later are read by
+timestamp in the window (last_at, now - WATERMARK_LAG], which the
+Application (status_changed_at) and Payment (release_date) indexes serve.
+A batch and its watermark are saved in one transaction, so an interrupted
+run resumes without counting anything twice.
+
+Primary keys can commit out of order (InnoDB hands out auto-increment ids
+before commit), so a pk batch stops at the first row created less than
+WATERMARK_LAG ago and the watermark never passes a row that may still have
+a lower id in flight. assessments.Report has no creation time of its own,
+so its watermark has no such lag: on MySQL a report committed more than a
+batch behind a higher id can be missed until `refresh_kpis --rebuild`.
+
+Like JobFunnelDay, the decision columns count events: an application that
+is accepted and later rejected counts once in each.
+"""
+from collections import Counter, defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from assessments.models import Report
+from payment.models import Payment
+from .models import (
+    Application, ApplicationKpiDay, AssessmentScoreDay, KpiWatermark, PaymentReleaseDay, SignupDay,
+)
+
+# Width of one assessment score bucket; changing it splits the histogram
+# between the old and new widths until the rollup is rebuilt
+SCORE_BUCKET = 10
+
+# Rows changed in transactions that are still open when a run starts must not
+# fall behind the watermark
+WATERMARK_LAG = timedelta(minutes=1)
+
+DECISIONS = {'ACCEPTED': 'accepted', 'REJECTED': 'rejected'}
+
+
+def _add(model, key, deltas):
+    """Add {column: n} to the rollup row `key` with F() updates, creating it if needed."""
+    deltas = {column: n for column, n in deltas.items() if n}
+    if not deltas:
+        return
+    increments = {column: F(column) + n for column, n in deltas.items()}
+    if model.objects.filter(**key).update(**increments):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # another run created the row first
+        model.objects.filter(**key).update(**increments)
+
+
+def _watermark(source):
+    mark, _ = KpiWatermark.objects.select_for_update().get_or_create(source=source)
+    return mark
+
+
+def _by_pk(source, queryset, fields, fold, batch_size, until=None):
+    """
+    Feed batches of (pk, *fields) past the source's last_id to `fold`. With
+    `until`, fields[0] is the row's creation time and reading stops at the
+    first row created after `until`.
+    """
+    read = 0
+    while True:
+        with transaction.atomic():
+            mark = _watermark(source)
+            rows = list(queryset
+                        .filter(pk__gt=mark.last_id)
+                        .order_by('pk')
+                        .values_list('pk', *fields)[:batch_size])
+            if until is not None:
+                young = next((i for i, row in enumerate(rows) if row[1] > until), None)
+                if young is not None:
+                    rows = rows[:young]
+            if not rows:
+                return read
+            fold(rows)
+            mark.last_id = rows[-1][0]
+            mark.save(update_fields=['last_id', 'updated_at'])
+        read += len(rows)
+
+
+def _by_time(source, until, fold):
+    """Call fold(since, until) for the window past the source's last_at."""
+    with transaction.atomic():
+        mark = _watermark(source)
+        if mark.last_at is not None and mark.last_at >= until:
+            return 0
+        read = fold(mark.last_at, until)
+        mark.last_at = until
+        mark.save(update_fields=['last_at', 'updated_at'])
+    return read
+
+
+def _window(queryset, field, since, until):
+    queryset = queryset.filter(**{f'{field}__lte': until}).order_by()
+    if since is not None:
+        queryset = queryset.filter(**{f'{field}__gt': since})
+    return queryset
+
+
+# ---------- Sources ----------
+def _role(is_student, is_employer):
+    if is_student:
+        return 'student'
+    if is_employer:
+        return 'employer'
+    return 'other'
+
+
+def _fold_signups(rows):
+    counts = Counter(
+        (timezone.localdate(joined), _role(is_student, is_employer))
+        for _, joined, is_student, is_employer in rows
+    )
+    for (day, role), n in counts.items():
+        _add(SignupDay, {'day': day, 'role': role}, {'signups': n})
+
+
+def _fold_applications(rows):
+    counts = Counter(
+        (timezone.localdate(applied), (university or '').strip(), (country or '').strip())
+        for _, applied, university, country in rows
+    )
+    for (day, university, country), n in counts.items():
+        _add(ApplicationKpiDay, {'day': day, 'university': university, 'country': country}, {'applied': n})
+
+
+def _fold_decisions(since, until):
+    decided = Application.objects.filter(status__in=DECISIONS)
+    groups = list(_window(decided, 'status_changed_at', since, until)
+                  .values('status', 'student__university', 'student__country',
+                          day=TruncDate('status_changed_at'))
+                  .annotate(n=Count('pk')))
+    if since is None:
+        # first run: decisions made before status_changed_at existed count
+        # on their applied day, as in rebuild_funnel()
+        groups += list(decided
+                       .filter(status_changed_at__isnull=True)
+                       .order_by()
+                       .values('status', 'student__university', 'student__country',
+                               day=TruncDate('applied_date'))
+                       .annotate(n=Count('pk')))
+    counts = Counter()
+    for row in groups:
+        university = (row['student__university'] or '').strip()
+        country = (row['student__country'] or '').strip()
+        counts[row['day'], university, country, DECISIONS[row['status']]] += row['n']
+    for (day, university, country, column), n in counts.items():
+        _add(ApplicationKpiDay, {'day': day, 'university': university, 'country': country}, {column: n})
+    return sum(counts.values())
+
+
+def _fold_scores(rows):
+    today = timezone.localdate()
+    counts = Counter(
+        (timezone.localdate(submitted) if submitted else today,
+         int(max(score, 0) // SCORE_BUCKET) * SCORE_BUCKET)
+        for _, score, submitted in rows
+    )
+    for (day, bucket), n in counts.items():
+        _add(AssessmentScoreDay, {'day': day, 'bucket': bucket}, {'reports': n})
+
+
+def _fold_payments(since, until):
+    released = _window(Payment.objects.filter(released=True), 'release_date', since, until)
+    totals = Counter()
+    counts = Counter()
+    for row in released.values('currency', day=TruncDate('release_date')).annotate(n=Count('pk'), total=Sum('amount')):
+        key = row['day'], row['currency'] or settings.DEFAULT_SALARY_CURRENCY
+        counts[key] += row['n']
+        totals[key] += row['total']
+    for (day, currency), n in counts.items():
+        _add(PaymentReleaseDay, {'day': day, 'currency': currency}, {'released': n, 'amount': totals[day, currency]})
+    return sum(counts.values())
+
+
+def refresh_kpis(batch_size=5000):
+    """Fold everything past the watermarks into the rollups. Returns {source: rows read}."""
+    until = timezone.now() - WATERMARK_LAG
+    return {
+        'signups': _by_pk('signups', get_user_model().objects.all(),
+                          ['date_joined', 'is_student', 'is_employer'], _fold_signups, batch_size, until),
+        'applications': _by_pk('applications', Application.objects.all(),
+                               ['applied_date', 'student__university', 'student__country'],
+                               _fold_applications, batch_size, until),
+        'decisions': _by_time('decisions', until, _fold_decisions),
+        'assessment_scores': _by_pk('assessment_scores', Report.objects.all(),
+                                    ['total_score', 'assessment__submitted_at'], _fold_scores, batch_size),
+        'payments': _by_time('payments', until, _fold_payments),
+    }
+
+
+def reset_kpis():
+    """Drop the rollups and watermarks, so the next refresh starts from scratch."""
+    with transaction.atomic():
+        for model in (SignupDay, ApplicationKpiDay, AssessmentScoreDay, PaymentReleaseDay, KpiWatermark):
+            model.objects.all().delete()
+
+
+# ---------- Reading ----------
+def _bars(rows, column):
+    peak = max((row[column] for row in rows), default=0)
+    for row in rows:
+        row['bar'] = round(100 * row[column] / peak) if peak else 0
+    return rows
+
+
+def _acceptance(row):
+    decided = row['accepted'] + row['rejected']
+    row['accept_rate'] = round(100 * row['accepted'] / decided) if decided else None
+    return row
+
+
+def _by_currency(amounts):
+    """[{'currency', 'amount'}] for a Counter of amounts, largest first."""
+    return [
+        {'currency': currency, 'amount': amount}
+        for currency, amount in sorted(amounts.items(), key=lambda item: (-item[1], item[0]))
+    ]
+
+
+def _groups(rollups, field, limit):
+    rows = (rollups
+            .values(field)
+            .annotate(sum_applied=Sum('applied'), sum_accepted=Sum('accepted'), sum_rejected=Sum('rejected'))
+            .order_by('-sum_applied', field)[:limit])
+    return [
+        _acceptance({'name': row[field], 'applied': row['sum_applied'],
+                     'accepted': row['sum_accepted'], 'rejected': row['sum_rejected']})
+        for row in rows
+    ]
+
+
+def kpi_summary(days):
+    """The analytics page over the last `days` days, from the rollups only."""
+    since = timezone.localdate() - timedelta(days=days - 1)
+    calendar = [since + timedelta(days=offset) for offset in range(days)]
+    limit = settings.KPI_TOP_GROUPS
+
+    signups = Counter()
+    for day, role, n in SignupDay.objects.filter(day__gte=since).values_list('day', 'role', 'signups'):
+        signups[day, role] += n
+    roles = [role for role, _ in SignupDay.ROLE_CHOICES]
+    signup_days = _bars([
+        {'day': day, **{role: signups[day, role] for role in roles},
+         'total': sum(signups[day, role] for role in roles)}
+        for day in calendar
+    ], 'total')
+
+    applications = ApplicationKpiDay.objects.filter(day__gte=since).order_by()
+    totals = applications.aggregate(applied=Sum('applied'), accepted=Sum('accepted'), rejected=Sum('rejected'))
+    application_totals = _acceptance({column: n or 0 for column, n in totals.items()})
+
+    scores = dict(AssessmentScoreDay.objects
+                  .filter(day__gte=since)
+                  .order_by()
+                  .values('bucket')
+                  .annotate(sum_reports=Sum('reports'))
+                  .values_list('bucket', 'sum_reports'))
+    top = max(scores, default=-SCORE_BUCKET)
+    score_buckets = _bars([
+        {'low': bucket, 'high': bucket + SCORE_BUCKET, 'reports': scores.get(bucket, 0)}
+        for bucket in range(0, top + SCORE_BUCKET, SCORE_BUCKET)
+    ], 'reports')
+
+    # amounts stay per currency: there is no exchange rate to add them up with
+    released = Counter()
+    amounts = defaultdict(Counter)
+    for row in PaymentReleaseDay.objects.filter(day__gte=since):
+        released[row.day] += row.released
+        amounts[row.day][row.currency] += row.amount
+    payment_days = _bars([
+        {'day': day, 'released': released[day], 'amounts': _by_currency(amounts[day])}
+        for day in calendar
+    ], 'released')
+    payment_amounts = Counter()
+    for day_amounts in amounts.values():
+        payment_amounts.update(day_amounts)
+
+    return {
+        'since': since,
+        'signups': signup_days,
+        'signup_totals': {role: sum(row[role] for row in signup_days) for role in roles + ['total']},
+        'applications': application_totals,
+        'universities': _groups(applications, 'university', limit),
+        'countries': _groups(applications, 'country', limit),
+        'scores': score_buckets,
+        'score_total': sum(scores.values()),
+        'payments': payment_days,
+        'payment_totals': {
+            'released': sum(row['released'] for row in payment_days),
+            'amounts': _by_currency(payment_amounts),
+        },
+        'watermarks': list(KpiWatermark.objects.order_by('source')),
+    }
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from jobs.cache import EMPLOYER, bump_widgets
+from jobs.funnel import rebuild_funnel
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = "Rebuild the JobFunnelDay rollups from the Application and Interview tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="Jobs per batch")
+        parser.add_argument('--job', type=int, action='append', help="Only rebuild these job ids")
+
+    def handle(self, *args, **options):
+        jobs = Job.objects.order_by('pk')
+        if options['job']:
+            jobs = jobs.filter(pk__in=options['job'])
+
+        rows = processed = 0
+        last_pk = 0
+        while True:
+            batch = list(jobs.filter(pk__gt=last_pk).values_list('pk', 'employer_id')[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1][0]
+            rows += rebuild_funnel([pk for pk, _ in batch])
+            bump_widgets(EMPLOYER, {employer_id for _, employer_id in batch}, 'funnel')
+            processed += len(batch)
+            self.stdout.write(f"  {processed} jobs")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} funnel rows for {processed} jobs."))
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+from accounts.media import content_version
+from accounts.models import EmployerProfile, StudentProfile
+
+
+class Command(BaseCommand):
+    help = "Store content versions for profile images uploaded before versions were recorded"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="Profiles per batch")
+
+    def handle(self, *args, **options):
+        targets = [
+            (StudentProfile, 'profile_picture'),
+            (EmployerProfile, 'company_logo'),
+        ]
+        for model, field in targets:
+            version_field = f'{field}_version'
+            profiles = (model.objects
+                        .filter(**{version_field: ''})
+                        .exclude(**{field: ''})
+                        .exclude(**{f'{field}__isnull': True})
+                        .order_by('pk'))
+            updated = missing = 0
+            last_pk = None
+            while True:
+                batch = profiles if last_pk is None else profiles.filter(pk__gt=last_pk)
+                batch = list(batch.only('pk', field)[:options['batch_size']])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                for profile in batch:
+                    fieldfile = getattr(profile, field)
+                    try:
+                        with fieldfile.open('rb') as content:
+                            version = content_version(content)
+                    except (FileNotFoundError, OSError):
+                        missing += 1
+                        continue
+                    # update(), not save(): nothing else about the profile changes
+                    model.objects.filter(pk=profile.pk).update(**{version_field: version})
+                    updated += 1
+                self.stdout.write(f"  {model.__name__}: {updated} versioned")
+            if missing:
+                self.stdout.write(self.style.WARNING(f"  {model.__name__}: {missing} files missing from storage"))
+        self.stdout.write(self.style.SUCCESS("Profile image versions backfilled."))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from jobs.cache import bump_catalogue_version
+from jobs.models import Job
+from jobs.salary import set_salary_range
+
+FIELDS = ['salary_min', 'salary_max', 'salary_currency']
+
+
+class Command(BaseCommand):
+    help = "Parse Job.salary into salary_min/salary_max/salary_currency for existing jobs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--all', action='store_true', help="Re-parse every job, not just unparsed ones")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        jobs = Job.objects.exclude(salary='')
+        if not options['all']:
+            jobs = jobs.filter(salary_min__isnull=True)
+        jobs = jobs.only('pk', 'salary', *FIELDS).order_by('pk')
+
+        parsed = scanned = 0
+        last_pk = 0
+        while True:
+            batch = list(jobs.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            for job in batch:
+                set_salary_range(job)
+            Job.objects.bulk_update(batch, FIELDS)
+            scanned += len(batch)
+            parsed += sum(1 for job in batch if job.salary_min is not None)
+        if scanned:
+            # bulk_update() skips post_save, so drop the cached job listings here
+            bump_catalogue_version()
+        self.stdout.write(self.style.SUCCESS(f"Parsed {parsed} of {scanned} salaries."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from jobs.services import close_expired_jobs, notify_full_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Close jobs whose application deadline has passed and notify employers "
+        "of jobs that reached max_applications. Meant to run from cron, e.g. "
+        "'*/5 * * * * python manage.py close_jobs'."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing")
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        closed, closed_notified = close_expired_jobs(dry_run=dry_run)
+        full, full_notified = notify_full_jobs(dry_run=dry_run)
+        prefix = "[dry run] " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}Closed {closed} expired jobs ({closed_notified} notifications); "
+            f"{full} jobs at capacity ({full_notified} notifications)."
+        ))
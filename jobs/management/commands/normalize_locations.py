@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from accounts.locations import load_gazetteer, resolve_location
+from jobs.cache import bump_catalogue_version
+from jobs.models import Job
+
+
+class Command(BaseCommand):
+    help = "Map free-text Job.location strings to canonical Location rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Distinct strings resolved per batch")
+        parser.add_argument('--all', action='store_true', help="Re-map every job, not just unmapped ones")
+        parser.add_argument('--gazetteer', help="CSV of city,region,country,latitude,longitude to fill coordinates")
+
+    def handle(self, *args, **options):
+        jobs = Job.objects.exclude(location='')
+        if not options['all']:
+            jobs = jobs.filter(place__isnull=True)
+
+        # Each distinct (location, employer country) pair is resolved once and
+        # applied with a single UPDATE, however many jobs share it.
+        pairs = list(jobs.order_by().values_list('location', 'employer__country').distinct())
+        batch_size = options['batch_size']
+        mapped = 0
+        for start in range(0, len(pairs), batch_size):
+            with transaction.atomic():
+                for text, country in pairs[start:start + batch_size]:
+                    place = resolve_location(text, country)
+                    mapped += jobs.filter(location=text, employer__country=country).update(place=place)
+        if mapped:
+            bump_catalogue_version()
+        self.stdout.write(self.style.SUCCESS(f"Mapped {mapped} jobs from {len(pairs)} distinct locations."))
+
+        if options['gazetteer']:
+            updated = load_gazetteer(options['gazetteer'])
+            self.stdout.write(self.style.SUCCESS(f"Set coordinates on {updated} locations."))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from accounts.models import StudentProfile
+from jobs import matching
+
+
+class Command(BaseCommand):
+    help = "Recompute every student's StudentJobMatch rows in chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=matching.CHUNK_SIZE)
+        parser.add_argument('--student', type=int, action='append', help="Only rebuild these student ids")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        students = StudentProfile.objects.only('pk', 'work_preference', 'availability').order_by('pk')
+        if options['student']:
+            students = students.filter(pk__in=options['student'])
+
+        rows = processed = 0
+        last_pk = None
+        while True:
+            chunk = students.filter(pk__gt=last_pk) if last_pk is not None else students
+            chunk = list(chunk[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+            rows += matching.refresh_students(chunk)
+            processed += len(chunk)
+            self.stdout.write(f"  {processed} students")
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} matches for {processed} students."))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand, CommandError
+from jobs.search import INDEXES
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search indexes from scratch"
+
+    def add_arguments(self, parser):
+        parser.add_argument('indexes', nargs='*', help=f"Indexes to rebuild (default: all of {', '.join(INDEXES)})")
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        names = options['indexes'] or list(INDEXES)
+        unknown = [n for n in names if n not in INDEXES]
+        if unknown:
+            raise CommandError(f"Unknown index: {', '.join(unknown)}")
+        for name in names:
+            index = INDEXES[name]
+            if not index.supported:
+                self.stdout.write(self.style.WARNING(f"{name}: full-text search not supported on {index.vendor}, skipped."))
+                continue
+            count = index.rebuild(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f"{name}: indexed {count} rows."))
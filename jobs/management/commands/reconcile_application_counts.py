@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from jobs.services import reconcile_application_counts
+
+
+class Command(BaseCommand):
+    help = "Recompute Job.application_count from the Application table and fix any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Report drifted jobs without fixing them")
+
+    def handle(self, *args, **options):
+        drifted = reconcile_application_counts(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        verb = "Found" if options['dry_run'] else "Repaired"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {drifted} jobs with a stale application_count."))
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from jobs.services import refresh_all_hot_ranks
+
+
+class Command(BaseCommand):
+    help = "Recompute the stored 'hot' rank of every community question"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        changed = refresh_all_hot_ranks(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Updated the hot rank of {changed} questions."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from jobs.kpis import refresh_kpis, reset_kpis
+
+
+class Command(BaseCommand):
+    help = "Fold rows newer than the KPI watermarks into the staff analytics rollups"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per batch of the append-only sources")
+        parser.add_argument('--rebuild', action='store_true', help="Drop the rollups and watermarks and read everything again")
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            reset_kpis()
+            self.stdout.write("  rollups cleared")
+        read = refresh_kpis(batch_size=options['batch_size'])
+        for source, n in read.items():
+            self.stdout.write(f"  {source}: {n} rows")
+        self.stdout.write(self.style.SUCCESS(f"Folded {sum(read.values())} rows into the KPI rollups."))
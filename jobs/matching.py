@@ -0,0 +1,209 @@
+"""
+Materialized per-student recommendations (StudentJobMatch).
+
+Every student keeps their STUDENT_MATCH_TOP_K best jobs as rows, so the
+dashboard reads K rows by the (student, -score) index instead of scoring the
+catalogue. The rows are maintained incrementally:
+
+  * refresh_students(): a student's skills or preferences changed; their
+    list is recomputed from the in-memory skill index (jobs/recommendations.py)
+  * update_job_matches(): a job was posted or its required skills changed;
+    only students sharing a skill with it (or already holding a row for it)
+    who already have a list are rescored, and each list is trimmed back to K
+
+and rebuilt from scratch in chunks by the rebuild_job_matches command.
+Closed, expired, full and applied-to jobs are filtered out when reading, so
+rows don't have to be deleted the moment a job closes; a list left with
+fewer usable rows than the reader asked for is rebuilt then.
+"""
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from accounts.models import StudentProfile
+from .cache import STUDENT, bump_widgets
+from .models import Application, Job, StudentJobMatch
+from .recommendations import StudentVector, job_skill_index, match_score
+
+CHUNK_SIZE = 500
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _student_vectors(students):
+    """{student pk: StudentVector} with one query for all their skills."""
+    skills = defaultdict(set)
+    rows = (StudentProfile.skills.through.objects
+            .filter(studentprofile_id__in=[s.pk for s in students])
+            .values_list('studentprofile_id', 'skill_id'))
+    for student_id, skill_id in rows:
+        skills[student_id].add(skill_id)
+    return {
+        s.pk: StudentVector(frozenset(skills[s.pk]), s.work_preference, s.availability)
+        for s in students
+    }
+
+
+def _applied_job_ids(student_ids):
+    applied = defaultdict(set)
+    rows = Application.objects.filter(student_id__in=student_ids).values_list('student_id', 'job_id')
+    for student_id, job_id in rows:
+        applied[student_id].add(job_id)
+    return applied
+
+
+def _full_job_ids():
+    """
+    Open jobs that have reached max_applications. Filling up bumps no
+    catalogue version, so the skill index can still list them.
+    """
+    return set(Job.objects
+               .filter(is_active=True, max_applications__gt=0, application_count__gte=F('max_applications'))
+               .values_list('pk', flat=True))
+
+
+def refresh_students(students):
+    """Recompute and replace the match rows of `students`. Returns rows written."""
+    k = settings.STUDENT_MATCH_TOP_K
+    written = 0
+    for chunk in _chunks(students):
+        vectors = _student_vectors(chunk)
+        applied = _applied_job_ids(vectors.keys())
+        full = _full_job_ids()
+        rows = [
+            StudentJobMatch(student_id=student_id, job_id=job_id, score=score)
+            for student_id, vector in vectors.items()
+            for job_id, score in job_skill_index.top(vector, k, exclude=applied[student_id] | full)
+        ]
+        with transaction.atomic():
+            deleted, _ = StudentJobMatch.objects.filter(student_id__in=vectors.keys()).delete()
+            StudentJobMatch.objects.bulk_create(rows)
+            if deleted or rows:
+                bump_widgets(STUDENT, vectors.keys(), 'recommended')
+        written += len(rows)
+    return written
+
+
+def refresh_student_matches(student):
+    return refresh_students([student])
+
+
+def _trim(student_ids):
+    """Delete everything past the K best rows of each student."""
+    k = settings.STUDENT_MATCH_TOP_K
+    seen = Counter()
+    extra = []
+    rows = (StudentJobMatch.objects
+            .filter(student_id__in=student_ids)
+            .order_by('student_id', '-score', '-pk')
+            .values_list('pk', 'student_id'))
+    for pk, student_id in rows:
+        seen[student_id] += 1
+        if seen[student_id] > k:
+            extra.append(pk)
+    if extra:
+        StudentJobMatch.objects.filter(pk__in=extra).delete()
+
+
+def update_job_matches(job):
+    """
+    Fold one job into the match lists of the students it is relevant to.
+    Returns the number of rows written.
+    """
+    job = Job.objects.with_acceptance_status().filter(pk=job.pk).first()
+    if job is None:
+        return 0
+    if not job.is_accepting_applications():
+        matches = StudentJobMatch.objects.filter(job=job)
+        bump_widgets(STUDENT, matches.values_list('student_id', flat=True), 'recommended')
+        matches.delete()
+        return 0
+
+    k = settings.STUDENT_MATCH_TOP_K
+    skill_ids = list(job.skills_required.values_list('pk', flat=True))
+    overlap = dict(
+        StudentProfile.skills.through.objects
+        .filter(skill_id__in=skill_ids)
+        .order_by()
+        .values('studentprofile_id')
+        .annotate(n=Count('pk'))
+        .values_list('studentprofile_id', 'n')
+    ) if skill_ids else {}
+    holders = set(StudentJobMatch.objects.filter(job=job).values_list('student_id', flat=True))
+
+    written = 0
+    for chunk in _chunks(set(overlap) | holders):
+        applied = set(Application.objects.filter(job=job, student_id__in=chunk).values_list('student_id', flat=True))
+        # size and lowest score of each list without this job, one grouped query
+        lists = {
+            row['student_id']: (row['n'], row['floor'])
+            for row in (StudentJobMatch.objects
+                        .filter(student_id__in=chunk)
+                        .exclude(job=job)
+                        .values('student_id')
+                        .annotate(n=Count('pk'), floor=Min('score')))
+        }
+        rows, full = [], []
+        students = StudentProfile.objects.filter(pk__in=chunk).only('pk', 'work_preference', 'availability')
+        for student in students:
+            shared = overlap.get(student.pk, 0)
+            if not shared or student.pk in applied:
+                continue
+            if student.pk not in lists and student.pk not in holders:
+                # never materialized: matched_jobs builds the whole list on
+                # first read, which a lone row here would pre-empt
+                continue
+            vector = StudentVector(None, student.work_preference, student.availability)
+            score = match_score(job.job_type, len(skill_ids), shared, vector)
+            size, floor = lists.get(student.pk, (0, None))
+            if size >= k and score <= floor:
+                continue
+            rows.append(StudentJobMatch(student_id=student.pk, job=job, score=score))
+            if size >= k:
+                full.append(student.pk)
+        with transaction.atomic():
+            StudentJobMatch.objects.filter(job=job, student_id__in=chunk).delete()
+            StudentJobMatch.objects.bulk_create(rows)
+            if full:
+                _trim(full)
+            bump_widgets(STUDENT, chunk, 'recommended')
+        written += len(rows)
+    return written
+
+
+def matched_jobs(student, k=3, refresh=True):
+    """
+    The student's k best open jobs from StudentJobMatch (with `match_score`
+    set). A student without any rows yet is materialized on first use, and
+    a list that has fewer than k usable rows left because jobs closed,
+    expired, filled up or were applied to is rebuilt once.
+    """
+    now = timezone.now()
+    has_room = (Q(job__max_applications__isnull=True) | Q(job__max_applications=0)
+                | Q(job__application_count__lt=F('job__max_applications')))
+    matches = (StudentJobMatch.objects
+               .filter(has_room, student=student, job__is_active=True)
+               .exclude(job__application_deadline__lt=now)
+               .exclude(job_id__in=Application.objects.filter(student=student).values('job_id'))
+               .select_related('job__employer')
+               .order_by('-score')[:k])
+    matches = list(matches)
+    if refresh and len(matches) < k:
+        # every usable row is in `matches`, so any other row is one filtered
+        # out above; no rows at all means the list was never built
+        stored = StudentJobMatch.objects.filter(student=student).count()
+        if stored == 0 or stored > len(matches):
+            refresh_student_matches(student)
+            return matched_jobs(student, k, refresh=False)
+    jobs = []
+    for match in matches:
+        match.job.match_score = match.score
+        jobs.append(match.job)
+    return jobs
@@ -0,0 +1,46 @@
+# Full-text index side table for job search (see jobs/search.py).
+
+from django.db import migrations
+
+COLUMNS = 'title, description, requirements, location, company_name'
+
+BACKFILL = (
+    "SELECT j.id, j.title, j.description, j.requirements, j.location, e.company_name "
+    "FROM jobs_job j INNER JOIN accounts_employerprofile e ON e.user_id = j.employer_id"
+)
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS jobs_job_fts USING fts5("
+            f"{COLUMNS}, tokenize='porter unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(f"INSERT INTO jobs_job_fts (rowid, {COLUMNS}) {BACKFILL}")
+    elif vendor == 'mysql':
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS jobs_job_fts ("
+            "object_id BIGINT NOT NULL PRIMARY KEY, title LONGTEXT, description LONGTEXT, "
+            "requirements LONGTEXT, location LONGTEXT, company_name LONGTEXT, "
+            f"FULLTEXT KEY jobs_job_fts_ft ({COLUMNS})"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+        )
+        schema_editor.execute(f"INSERT INTO jobs_job_fts (object_id, {COLUMNS}) {BACKFILL}")
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'mysql'):
+        schema_editor.execute("DROP TABLE IF EXISTS jobs_job_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0017_alter_employerprofile_phone_number_and_more'),
+        ('jobs', '0015_studentnotification'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
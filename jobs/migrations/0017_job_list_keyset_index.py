@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-17 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0016_job_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_active', '-posted_date', '-id'], name='jobs_job_is_acti_b5d35d_idx'),
+        ),
+    ]
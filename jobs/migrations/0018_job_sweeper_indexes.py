@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-17 07:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0017_job_list_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_active', 'application_deadline'], name='jobs_job_is_acti_dd67b1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_active', 'max_applications'], name='jobs_job_is_acti_d910b3_idx'),
+        ),
+    ]
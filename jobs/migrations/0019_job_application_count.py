@@ -0,0 +1,34 @@
+# Generated by Django 5.1.6 on 2026-10-17 07:27
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_application_count(apps, schema_editor):
+    Job = apps.get_model('jobs', 'Job')
+    Application = apps.get_model('jobs', 'Application')
+    counted = (Application.objects
+               .filter(job=OuterRef('pk'))
+               .exclude(status='WITHDRAWN')
+               .order_by()
+               .values('job')
+               .annotate(n=Count('pk'))
+               .values('n'))
+    Job.objects.update(application_count=Coalesce(Subquery(counted), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0018_job_sweeper_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='application_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Applications that have not been withdrawn (maintained by jobs.services)'),
+        ),
+        migrations.RunPython(backfill_application_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-17 07:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0019_job_application_count'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_active', 'job_type', '-posted_date'], name='jobs_job_is_acti_28e632_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_active', 'paid_type', 'salary_type'], name='jobs_job_is_acti_a12413_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_active', 'interview_type', 'is_physical'], name='jobs_job_is_acti_253d48_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_active', 'location'], name='jobs_job_is_acti_34fa29_idx'),
+        ),
+    ]
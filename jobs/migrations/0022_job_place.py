@@ -0,0 +1,24 @@
+# Generated by Django 5.1.6 on 2026-10-17 07:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0018_location'),
+        ('jobs', '0021_job_salary_range'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='place',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='accounts.location'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['is_active', 'place', '-posted_date'], name='jobs_job_is_acti_04b40f_idx'),
+        ),
+    ]
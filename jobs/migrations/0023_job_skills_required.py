@@ -0,0 +1,36 @@
+# Generated by Django 5.1.6 on 2026-10-17 07:42
+
+from django.db import migrations, models
+
+
+def create_through_table(apps, schema_editor):
+    # Databases from an older schema (including the bundled db.sqlite3)
+    # already have this table, with the same layout; reuse it
+    through = apps.get_model('jobs', 'Job')._meta.get_field('skills_required').remote_field.through
+    if through._meta.db_table not in schema_editor.connection.introspection.table_names():
+        schema_editor.create_model(through)
+
+
+def drop_through_table(apps, schema_editor):
+    through = apps.get_model('jobs', 'Job')._meta.get_field('skills_required').remote_field.through
+    schema_editor.delete_model(through)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0022_job_place'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='job',
+                    name='skills_required',
+                    field=models.ManyToManyField(blank=True, related_name='jobs', to='accounts.skill'),
+                ),
+            ],
+        ),
+        migrations.RunPython(create_through_table, drop_through_table),
+    ]
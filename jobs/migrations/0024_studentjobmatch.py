@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-17 07:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0023_job_skills_required'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentJobMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='student_matches', to='jobs.job')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_matches', to='accounts.studentprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['student', '-score'], name='jobs_studen_student_8332a0_idx')],
+                'unique_together': {('student', 'job')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.6 on 2026-10-17 07:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0024_studentjobmatch'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='application',
+            name='jobs_applic_job_id_a25382_idx',
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', 'status', 'applied_date'], name='jobs_applic_job_id_74a24e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['job', '-applied_date', '-id'], name='jobs_applic_job_id_fc17f2_idx'),
+        ),
+    ]
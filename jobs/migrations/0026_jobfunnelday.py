@@ -0,0 +1,38 @@
+# Generated by Django 5.1.6 on 2026-10-17 07:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0025_application_grid_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='application',
+            name='status_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='JobFunnelDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('applied', models.PositiveIntegerField(default=0)),
+                ('interviewed', models.PositiveIntegerField(default=0)),
+                ('accepted', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+                ('withdrawn', models.PositiveIntegerField(default=0)),
+                ('decisions', models.PositiveIntegerField(default=0)),
+                ('decision_seconds', models.BigIntegerField(default=0)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='funnel_days', to='jobs.job')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day'], name='jobs_jobfun_day_11da29_idx')],
+                'unique_together': {('job', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.6 on 2026-10-17 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0026_jobfunnelday'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationKpiDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('university', models.CharField(blank=True, max_length=200)),
+                ('country', models.CharField(blank=True, max_length=100)),
+                ('applied', models.PositiveIntegerField(default=0)),
+                ('accepted', models.PositiveIntegerField(default=0)),
+                ('rejected', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AssessmentScoreDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('bucket', models.PositiveIntegerField()),
+                ('reports', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='KpiWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(max_length=32, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('last_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PaymentReleaseDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('released', models.PositiveIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SignupDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('role', models.CharField(choices=[('student', 'Student'), ('employer', 'Employer'), ('other', 'Other')], max_length=10)),
+                ('signups', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['status_changed_at'], name='jobs_applic_status__d3fc44_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='applicationkpiday',
+            unique_together={('day', 'university', 'country')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='assessmentscoreday',
+            unique_together={('day', 'bucket')},
+        ),
+        migrations.AlterUniqueTogether(
+            name='signupday',
+            unique_together={('day', 'role')},
+        ),
+    ]
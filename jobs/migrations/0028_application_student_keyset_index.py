@@ -0,0 +1,21 @@
+# Generated by Django 5.1.6 on 2026-10-17 08:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0027_kpi_rollups'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='application',
+            name='jobs_applic_student_f4a2a5_idx',
+        ),
+        migrations.AddIndex(
+            model_name='application',
+            index=models.Index(fields=['student', '-applied_date', '-id'], name='jobs_applic_student_e43d54_idx'),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.1.6 on 2026-10-17 08:03
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def backfill_vote_counts(apps, schema_editor):
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    Vote = apps.get_model('jobs', 'Vote')
+    for model_name in ('communityquestion', 'communityanswer'):
+        content_type = ContentType.objects.filter(app_label='jobs', model=model_name).first()
+        if content_type is None:
+            # content types are created after the first migrate, and no vote
+            # can point at one that does not exist yet
+            continue
+        votes = (Vote.objects
+                 .filter(content_type=content_type, object_id=OuterRef('pk'))
+                 .order_by()
+                 .values('object_id'))
+        apps.get_model('jobs', model_name).objects.update(
+            score=Coalesce(Subquery(votes.annotate(n=Sum('value')).values('n')), 0),
+            upvotes=Coalesce(Subquery(votes.filter(value=1).annotate(n=Count('pk')).values('n')), 0),
+            downvotes=Coalesce(Subquery(votes.filter(value=-1).annotate(n=Count('pk')).values('n')), 0),
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('jobs', '0028_application_student_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communityanswer',
+            name='downvotes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='communityanswer',
+            name='score',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='communityanswer',
+            name='upvotes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='communityquestion',
+            name='downvotes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='communityquestion',
+            name='score',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='communityquestion',
+            name='upvotes',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='communityanswer',
+            index=models.Index(fields=['question', '-score'], name='jobs_commun_questio_1a1160_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='communityquestion',
+            index=models.Index(fields=['-score', '-id'], name='jobs_commun_score_49186d_idx'),
+        ),
+        migrations.RunPython(backfill_vote_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,62 @@
+# Full-text index side table for community search (see jobs/search.py), and
+# the (-created_at, -id) index its keyset pages are served from.
+
+from django.db import migrations, models
+
+COLUMNS = 'title, body, answers'
+
+
+def backfill(concat):
+    return (
+        "SELECT q.id, q.title, q.body, "
+        f"COALESCE((SELECT {concat} FROM jobs_communityanswer a WHERE a.question_id = q.id), '') "
+        "FROM jobs_communityquestion q"
+    )
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS jobs_communityquestion_fts USING fts5("
+            f"{COLUMNS}, tokenize='porter unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO jobs_communityquestion_fts (rowid, {COLUMNS}) "
+            + backfill("group_concat(a.body, char(10))")
+        )
+    elif vendor == 'mysql':
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS jobs_communityquestion_fts ("
+            "object_id BIGINT NOT NULL PRIMARY KEY, title LONGTEXT, body LONGTEXT, answers LONGTEXT, "
+            f"FULLTEXT KEY jobs_communityquestion_fts_ft ({COLUMNS})"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+        )
+        schema_editor.execute(
+            f"INSERT INTO jobs_communityquestion_fts (object_id, {COLUMNS}) "
+            + backfill("GROUP_CONCAT(a.body SEPARATOR '\\n')")
+        )
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'mysql'):
+        schema_editor.execute("DROP TABLE IF EXISTS jobs_communityquestion_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0029_community_vote_counts'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='communityquestion',
+            name='jobs_commun_created_f575ba_idx',
+        ),
+        migrations.AddIndex(
+            model_name='communityquestion',
+            index=models.Index(fields=['-created_at', '-id'], name='jobs_commun_created_0be3a3_idx'),
+        ),
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.6 on 2026-10-17 08:08
+
+from django.db import migrations, models
+from django.db.models import Count
+
+from jobs.services import hot_rank
+
+
+def backfill_hot_rank(apps, schema_editor):
+    # hot_rank() only takes plain values, so the migration shares the live
+    # formula and settings rather than freezing a copy that could drift
+    CommunityQuestion = apps.get_model('jobs', 'CommunityQuestion')
+    last_id = 0
+    while True:
+        rows = list(CommunityQuestion.objects
+                    .filter(pk__gt=last_id)
+                    .order_by('pk')
+                    .annotate(answer_count=Count('answers'))
+                    .values_list('pk', 'score', 'answer_count', 'created_at')[:1000])
+        if not rows:
+            break
+        last_id = rows[-1][0]
+        CommunityQuestion.objects.bulk_update(
+            [CommunityQuestion(pk=pk, hot_rank=hot_rank(score, answers, created_at))
+             for pk, score, answers, created_at in rows],
+            ['hot_rank'],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0030_communityquestion_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='communityquestion',
+            name='hot_rank',
+            field=models.FloatField(default=0.0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='communityquestion',
+            index=models.Index(fields=['-hot_rank', '-id'], name='jobs_commun_hot_ran_6538b4_idx'),
+        ),
+        migrations.RunPython(backfill_hot_rank, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 08:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0031_communityquestion_hot_rank'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='job',
+            name='salary_type',
+            field=models.CharField(blank=True, choices=[('HOURLY', 'Per Hour'), ('DAILY', 'Per Day'), ('FIXED', 'Fixed Total')], max_length=6, null=True),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.6 on 2026-10-17 12:41
+
+from django.db import migrations, models
+
+
+def reset_payment_rollup(apps, schema_editor):
+    # the old rows summed every currency together; dropping them and the
+    # watermark makes the next refresh_kpis fold all releases again by currency
+    apps.get_model('jobs', 'PaymentReleaseDay').objects.all().delete()
+    apps.get_model('jobs', 'KpiWatermark').objects.filter(source='payments').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0032_alter_job_salary_type'),
+        ('payment', '0004_payment_currency'),
+    ]
+
+    operations = [
+        migrations.RunPython(reset_payment_rollup, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='paymentreleaseday',
+            name='day',
+            field=models.DateField(),
+        ),
+        migrations.AddField(
+            model_name='paymentreleaseday',
+            name='currency',
+            field=models.CharField(default='', max_length=3),
+            preserve_default=False,
+        ),
+        migrations.AlterUniqueTogether(
+            name='paymentreleaseday',
+            unique_together={('day', 'currency')},
+        ),
+    ]
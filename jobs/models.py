@@ -3,11 +3,30 @@ from accounts.models import StudentProfile, EmployerProfile
 from django.utils import timezone
 from django.core.validators import FileExtensionValidator
 from django.conf import settings
-from django.db.models import Sum
-from django.db.models.functions import Coalesce
+from django.db.models import Case, F, Q, Value, When
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
-from accounts.models import Skill
+from accounts.models import Location, Skill
+
+class JobQuerySet(models.QuerySet):
+    def with_acceptance_status(self):
+        """
+        Annotate `acceptance_status` (one of Job.ACCEPTANCE_STATUS_CHOICES) for
+        every row in the same SELECT. Never writes;
+        deactivating expired jobs and notifying employers is done by the
+        close_jobs management command.
+        """
+        return self.annotate(acceptance_status=Case(
+            When(is_active=False, then=Value(Job.CLOSED)),
+            When(application_deadline__lt=timezone.now(), then=Value(Job.CLOSED_DEADLINE)),
+            When(Q(max_applications__gt=0) & Q(application_count__gte=F('max_applications')),
+                 then=Value(Job.CLOSED_CAPACITY)),
+            default=Value(Job.ACCEPTING),
+            output_field=models.CharField(),
+        ))
+
+    def accepting_applications(self):
+        return self.with_acceptance_status().filter(acceptance_status=Job.ACCEPTING)
 
 class Job(models.Model):
     JOB_TYPE_CHOICES = [
@@ -27,8 +46,20 @@ class Job(models.Model):
     SALARY_TYPE_CHOICES = [
         ('HOURLY', 'Per Hour'),
         ('DAILY', 'Per Day'),
+        ('FIXED', 'Fixed Total'),
     ]
     
+    ACCEPTING = 'ACCEPTING'
+    CLOSED = 'CLOSED'
+    CLOSED_DEADLINE = 'DEADLINE'
+    CLOSED_CAPACITY = 'CAPACITY'
+    ACCEPTANCE_STATUS_CHOICES = [
+        (ACCEPTING, 'Accepting applications'),
+        (CLOSED, 'Closed'),
+        (CLOSED_DEADLINE, 'Closed: deadline passed'),
+        (CLOSED_CAPACITY, 'Closed: maximum applications reached'),
+    ]
+
     INTERNSHIP_DESCRIPTION = "Long-term work experience (typically 3-6 months)"
     GIG_DESCRIPTION = "Short-term project or task (typically 1 day - 1 month)"
     
@@ -36,13 +67,21 @@ class Job(models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField()
     requirements = models.TextField(blank=True, help_text="Enter specific job requirements here")
+    skills_required = models.ManyToManyField(Skill, blank=True, related_name='jobs')
     location = models.CharField(max_length=100)
+    # Canonical form of `location`, set on save (see accounts/locations.py)
+    place = models.ForeignKey(Location, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='jobs')
     job_type = models.CharField(max_length=3, choices=JOB_TYPE_CHOICES)
     salary = models.CharField(max_length=100, blank=True)
+    # Parsed from `salary` on save (see jobs/salary.py)
+    salary_min = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    salary_max = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, editable=False)
+    salary_currency = models.CharField(max_length=3, blank=True, default='', editable=False)
     posted_date = models.DateTimeField(auto_now_add=True)
     is_active = models.BooleanField(default=True)
     application_deadline = models.DateTimeField(null=True, blank=True, help_text="Deadline for applications")
     max_applications = models.PositiveIntegerField(null=True, blank=True, help_text="Maximum number of applications allowed")
+    application_count = models.PositiveIntegerField(default=0, editable=False, help_text="Applications that have not been withdrawn (maintained by jobs.services)")
     interview_type = models.CharField(max_length=20, choices=INTERVIEW_TYPE_CHOICES, default='DIGITAL')
     location_address = models.CharField(max_length=255, null=True, blank=True, help_text="Physical address for Face-to-Face interviews")
     paid_type = models.CharField(max_length=6, choices=PAID_CHOICES, default='UNPAID')
@@ -61,32 +100,62 @@ class Job(models.Model):
         null=True
     )
 
+    objects = JobQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.title} at {self.employer.company_name}"
 
-    def is_accepting_applications(self):
+    def save(self, *args, **kwargs):
+        # application_count only moves through F() updates in jobs.services;
+        # writing back the value loaded with this instance would undo any
+        # that committed since, so updates of an existing row leave it out.
+        # Passing update_fields also means saving an instance whose row was
+        # deleted raises DatabaseError ("did not affect any rows") instead of
+        # quietly inserting it again; use force_insert=True to re-create one.
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'application_count'
+            ]
+        super().save(*args, **kwargs)
+
+    def get_acceptance_status(self):
+        """
+        Pure read. Uses the with_acceptance_status() annotation when present,
+        otherwise works it out from the row itself.
+        """
+        annotated = self.__dict__.get('acceptance_status')
+        if annotated is not None:
+            return annotated
         if not self.is_active:
-            return False
+            return self.CLOSED
         if self.application_deadline and self.application_deadline < timezone.now():
-            self.is_active = False
-            self.save()
-            return False
-        if self.max_applications:
-            current_applications = self.applications.count()
-            if current_applications >= self.max_applications:
-                Notification.objects.get_or_create(
-                    employer=self.employer,
-                    job=self,
-                    message=f"Job '{self.title}' has reached the maximum applications ({self.max_applications}).",
-                    defaults={'created_at': timezone.now()}
-                )
-                return False
-        return True
+            return self.CLOSED_DEADLINE
+        if self.max_applications and self.application_count >= self.max_applications:
+            return self.CLOSED_CAPACITY
+        return self.ACCEPTING
+
+    def is_accepting_applications(self):
+        return self.get_acceptance_status() == self.ACCEPTING
 
     class Meta:
         indexes = [
             models.Index(fields=['employer', 'posted_date']),
             models.Index(fields=['is_active']),
+            models.Index(fields=['is_active', '-posted_date', '-id']),
+            models.Index(fields=['is_active', 'application_deadline']),
+            models.Index(fields=['is_active', 'max_applications']),
+            # facet filters (see jobs/facets.py)
+            models.Index(fields=['is_active', 'job_type', '-posted_date']),
+            models.Index(fields=['is_active', 'paid_type', 'salary_type']),
+            models.Index(fields=['is_active', 'interview_type', 'is_physical']),
+            models.Index(fields=['is_active', 'location']),
+            # salary range filters and sorting
+            models.Index(fields=['is_active', 'salary_type', 'salary_min']),
+            models.Index(fields=['is_active', 'salary_type', 'salary_max']),
+            models.Index(fields=['is_active', '-salary_min', '-id']),
+            models.Index(fields=['salary_currency']),
+            models.Index(fields=['is_active', 'place', '-posted_date']),
         ]
 
 class Application(models.Model):
@@ -101,6 +170,8 @@ class Application(models.Model):
     job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='applications')
     applied_date = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING')
+    # set by jobs/services.py on every status change
+    status_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
     cover_letter = models.TextField(verbose_name="Why do you want this job?", blank=True)
     resume = models.FileField(upload_to='application_resumes/', blank=True, null=True)
     declared_skills = models.ManyToManyField(Skill, blank=True, related_name="applications_declared")
@@ -111,8 +182,14 @@ class Application(models.Model):
     class Meta:
         unique_together = ('student', 'job')
         indexes = [
-            models.Index(fields=['student', 'applied_date']),
-            models.Index(fields=['job', 'status']),
+            # student's applications newest first (my_applications keyset pages)
+            models.Index(fields=['student', '-applied_date', '-id']),
+            # employer applications grid (jobs/grid.py): job/status filters,
+            # applied-date sort
+            models.Index(fields=['job', 'status', 'applied_date']),
+            models.Index(fields=['job', '-applied_date', '-id']),
+            # refresh_kpis reads decisions newer than its watermark
+            models.Index(fields=['status_changed_at']),
         ]
 
 class Interview(models.Model):
@@ -188,6 +265,115 @@ class SavedJob(models.Model):
     def __str__(self):
         return f"{self.student.user.username} saved {self.job.title}"
 
+class StudentJobMatch(models.Model):
+    """
+    A student's top-K recommended jobs, materialized by jobs/matching.py so
+    the dashboard reads K rows instead of scoring the catalogue.
+    """
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='job_matches')
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='student_matches')
+    score = models.FloatField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('student', 'job')
+        indexes = [
+            models.Index(fields=['student', '-score']),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} -> {self.job_id} ({self.score:.3f})"
+
+class JobFunnelDay(models.Model):
+    """
+    Daily hiring-funnel rollup of one job, maintained by jobs/funnel.py.
+    `applied` counts applications received that day; the status columns count
+    applications that moved into that status that day. Decisions (first move
+    into ACCEPTED or REJECTED) also add their time since applying to
+    decision_seconds, so average time-to-decision is a ratio of two sums.
+    """
+    job = models.ForeignKey(Job, on_delete=models.CASCADE, related_name='funnel_days')
+    day = models.DateField()
+    applied = models.PositiveIntegerField(default=0)
+    interviewed = models.PositiveIntegerField(default=0)
+    accepted = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+    withdrawn = models.PositiveIntegerField(default=0)
+    decisions = models.PositiveIntegerField(default=0)
+    decision_seconds = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('job', 'day')
+        indexes = [
+            models.Index(fields=['day']),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} {self.day}: {self.applied} applied"
+
+# ---------- Platform KPIs (jobs/kpis.py) ----------
+class KpiWatermark(models.Model):
+    """
+    How far the refresh_kpis command has read one source table: the last
+    primary key for append-only sources, the last timestamp for sources whose
+    rows change after they are created.
+    """
+    source = models.CharField(max_length=32, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    last_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.source} @ {self.last_at or self.last_id}"
+
+class SignupDay(models.Model):
+    ROLE_CHOICES = [
+        ('student', 'Student'),
+        ('employer', 'Employer'),
+        ('other', 'Other'),
+    ]
+    day = models.DateField()
+    role = models.CharField(max_length=10, choices=ROLE_CHOICES)
+    signups = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('day', 'role')
+
+class ApplicationKpiDay(models.Model):
+    """
+    Applications received and decided per day and per the student's
+    university and country (blank when the profile doesn't say). Decisions
+    are counted on the day of the status change, like JobFunnelDay.
+    """
+    day = models.DateField()
+    university = models.CharField(max_length=200, blank=True)
+    country = models.CharField(max_length=100, blank=True)
+    applied = models.PositiveIntegerField(default=0)
+    accepted = models.PositiveIntegerField(default=0)
+    rejected = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('day', 'university', 'country')
+
+class AssessmentScoreDay(models.Model):
+    """Assessment reports per submission day and score bucket (its lower bound)."""
+    day = models.DateField()
+    bucket = models.PositiveIntegerField()
+    reports = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('day', 'bucket')
+
+class PaymentReleaseDay(models.Model):
+    """Payments released per day and currency; amounts in different currencies are never summed."""
+    day = models.DateField()
+    currency = models.CharField(max_length=3)
+    released = models.PositiveIntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ('day', 'currency')
+
 # ---------- Community (Q&A) ----------
 class CommunityQuestion(models.Model):
     author = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='questions')
@@ -197,18 +383,26 @@ class CommunityQuestion(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     votes = GenericRelation('Vote', related_query_name='q_votes')
     reports = GenericRelation('AbuseReport', related_query_name='q_reports')
+    # Sum and counts of `votes`, kept in step by jobs.services.cast_vote
+    score = models.IntegerField(default=0, editable=False)
+    upvotes = models.PositiveIntegerField(default=0, editable=False)
+    downvotes = models.PositiveIntegerField(default=0, editable=False)
+    # "hot" sort key from score, answers and age, kept in step by
+    # jobs.services.refresh_hot_ranks
+    hot_rank = models.FloatField(default=0.0, editable=False)
 
     class Meta:
         ordering = ['-created_at']
-        indexes = [models.Index(fields=['-created_at'])]
+        indexes = [
+            # community board keyset pages (newest, top, hot)
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['-score', '-id']),
+            models.Index(fields=['-hot_rank', '-id']),
+        ]
 
     def __str__(self):
         return self.title
 
-    @property
-    def score(self):
-        return self.votes.aggregate(s=Coalesce(Sum('value'), 0))['s'] or 0
-
 class CommunityAnswer(models.Model):
     question = models.ForeignKey(CommunityQuestion, on_delete=models.CASCADE, related_name='answers')
     author = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='answers')
@@ -217,18 +411,21 @@ class CommunityAnswer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     votes = GenericRelation('Vote', related_query_name='a_votes')
     reports = GenericRelation('AbuseReport', related_query_name='a_reports')
+    # Sum and counts of `votes`, kept in step by jobs.services.cast_vote
+    score = models.IntegerField(default=0, editable=False)
+    upvotes = models.PositiveIntegerField(default=0, editable=False)
+    downvotes = models.PositiveIntegerField(default=0, editable=False)
 
     class Meta:
         ordering = ['created_at']
-        indexes = [models.Index(fields=['question', 'created_at'])]
+        indexes = [
+            models.Index(fields=['question', 'created_at']),
+            models.Index(fields=['question', '-score']),
+        ]
 
     def __str__(self):
         return f"Answer by {self.author.user.username}"
 
-    @property
-    def score(self):
-        return self.votes.aggregate(s=Coalesce(Sum('value'), 0))['s'] or 0
-
 # ---------- Generic Vote (for Question/Answer) ----------
 class Vote(models.Model):
     UPVOTE = 1
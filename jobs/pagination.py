@@ -0,0 +1,105 @@
+"""
+Keyset (seek) pagination.
+
+A page is fetched with WHERE (k1, k2, ...) > (last row's keys) instead of
+OFFSET, so every page costs one index range scan no matter how deep the client
+has scrolled. Clients only ever see an opaque, signed cursor.
+
+The ordering passed in must be total (end with a unique column such as `id`)
+and none of its columns may be NULL.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.core import signing
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+
+CURSOR_SALT = 'jobs.pagination.cursor'
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _field_name(key):
+    name = key.lstrip('-')
+    return 'id' if name == 'pk' else name
+
+
+def _dump_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def _load_value(model, name, value):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # annotations (e.g. search_rank) are stored as plain JSON values
+        return value
+    return field.to_python(value)
+
+
+def encode_cursor(ordering, row):
+    get = row.get if isinstance(row, dict) else lambda name: getattr(row, name)
+    return signing.dumps(
+        [_dump_value(get(_field_name(key))) for key in ordering],
+        salt=CURSOR_SALT,
+        compress=True,
+    )
+
+
+def decode_cursor(ordering, model, token):
+    try:
+        values = signing.loads(token, salt=CURSOR_SALT)
+    except signing.BadSignature:
+        raise InvalidCursor("Malformed or tampered cursor")
+    if not isinstance(values, list) or len(values) != len(ordering):
+        raise InvalidCursor("Cursor does not match this ordering")
+    return [_load_value(model, _field_name(key), v) for key, v in zip(ordering, values)]
+
+
+def keyset_filter(ordering, values):
+    """
+    Build the row-value comparison "after (values)" for a mixed-direction
+    ordering, e.g. ['-posted_date', '-id'] ->
+    posted_date < d OR (posted_date = d AND id < i).
+    """
+    condition = Q()
+    equal_prefix = Q()
+    for key, value in zip(ordering, values):
+        name = _field_name(key)
+        lookup = 'lt' if key.startswith('-') else 'gt'
+        step = equal_prefix & Q(**{f'{name}__{lookup}': value})
+        condition = condition | step if condition else step
+        equal_prefix &= Q(**{name: value})
+    return condition
+
+
+def paginate(queryset, ordering, cursor=None, page_size=20):
+    """
+    Return (rows, next_cursor) for the page after `cursor`. `next_cursor` is
+    None on the last page. Raises InvalidCursor for a bad token.
+    """
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(ordering, queryset.model, cursor)
+        queryset = queryset.filter(keyset_filter(ordering, values))
+    rows = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor(ordering, rows[-1])
+    return rows, next_cursor
+
+
+def page_size_from(request, default, maximum):
+    try:
+        size = int(request.GET.get('page_size', default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
@@ -0,0 +1,195 @@
+"""
+Per-request SQL and latency budgets.
+
+QueryBudgetMiddleware (opt-in: QUERY_BUDGET_ENABLED) wraps every database
+connection with an execute wrapper for the duration of a request and records,
+per resolved URL name:
+
+    queries      statements executed
+    sql_ms       time spent in them
+    duplicates   executions of a statement fingerprint beyond its first, the
+                 usual sign of a lazy relation dereferenced in a loop
+    view_ms      wall time of everything below the middleware (view and
+                 template rendering)
+
+Staff users get the numbers back as X-Query-* / X-View-Time-Ms response
+headers. Every request is also added to a rolling per-process summary (the
+last QUERY_BUDGET_WINDOW requests of each URL name), served as JSON to staff
+by query_stats.
+
+A view declares its query budget with @query_budget(n); otherwise
+QUERY_BUDGET_DEFAULT_QUERIES applies (0 disables it), and
+QUERY_BUDGET_VIEW_MS bounds the wall time. An exceeded budget is logged, or
+raised as QueryBudgetExceeded when QUERY_BUDGET_ACTION is 'raise' (for
+development and CI).
+"""
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED = '<unresolved>'
+
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)', re.IGNORECASE)
+_NUMBER = re.compile(r'\b\d+\b')
+_STRING = re.compile(r"'(?:[^']|'')*'")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(queries):
+    """Declare the most queries one request of the decorated view may run."""
+    def decorator(view):
+        view.query_budget = queries
+        return view
+    return decorator
+
+
+def fingerprint(sql):
+    """`sql` with its literals and IN-list lengths folded away."""
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _STRING.sub('?', sql)
+    return _NUMBER.sub('?', sql)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_seconds += time.perf_counter() - start
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        return sum(n - 1 for n in self.fingerprints.values())
+
+    def top_duplicate(self):
+        sql, n = self.fingerprints.most_common(1)[0] if self.fingerprints else ('', 0)
+        return (sql, n) if n > 1 else None
+
+
+class RollingSummary:
+    """The last `window` samples of each URL name, for this process only."""
+
+    def __init__(self):
+        self._samples = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def add(self, name, sample):
+        window = settings.QUERY_BUDGET_WINDOW
+        with self._lock:
+            samples = self._samples[name]
+            samples.append(sample)
+            while len(samples) > window:
+                samples.popleft()
+
+    def clear(self):
+        with self._lock:
+            self._samples.clear()
+
+    def summary(self):
+        with self._lock:
+            snapshot = {name: list(samples) for name, samples in self._samples.items()}
+        return {name: _summarize(samples) for name, samples in sorted(snapshot.items())}
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def _summarize(samples):
+    result = {'requests': len(samples)}
+    for metric in ('queries', 'sql_ms', 'duplicates', 'view_ms'):
+        values = [sample[metric] for sample in samples]
+        result[metric] = {
+            'avg': round(sum(values) / len(values), 1),
+            'p95': _percentile(values, 0.95),
+            'max': max(values),
+        }
+    duplicated = Counter()
+    for sample in samples:
+        if sample['top_duplicate']:
+            duplicated[sample['top_duplicate']] += 1
+    result['top_duplicates'] = [sql for sql, _ in duplicated.most_common(3)]
+    result['over_budget'] = sum(1 for sample in samples if sample['over_budget'])
+    return result
+
+
+rolling_summary = RollingSummary()
+
+
+class QueryBudgetMiddleware:
+    """Must come after AuthenticationMiddleware (headers are for staff only)."""
+
+    def __init__(self, get_response):
+        if not settings.QUERY_BUDGET_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = RequestStats()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = self.get_response(request)
+        view_ms = round((time.perf_counter() - start) * 1000, 1)
+        sql_ms = round(stats.sql_seconds * 1000, 1)
+
+        match = getattr(request, 'resolver_match', None)
+        name = match.view_name if match and match.view_name else UNRESOLVED
+        budget = getattr(match.func, 'query_budget', None) if match else None
+        if budget is None:
+            budget = settings.QUERY_BUDGET_DEFAULT_QUERIES or None
+        over = []
+        if budget is not None and stats.queries > budget:
+            over.append(f"{stats.queries} queries (budget {budget})")
+        if settings.QUERY_BUDGET_VIEW_MS and view_ms > settings.QUERY_BUDGET_VIEW_MS:
+            over.append(f"{view_ms} ms (budget {settings.QUERY_BUDGET_VIEW_MS} ms)")
+
+        top_duplicate = stats.top_duplicate()
+        rolling_summary.add(name, {
+            'queries': stats.queries,
+            'sql_ms': sql_ms,
+            'duplicates': stats.duplicates,
+            'view_ms': view_ms,
+            'top_duplicate': top_duplicate[0][:200] if top_duplicate else None,
+            'over_budget': bool(over),
+        })
+
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated and user.is_staff:
+            response['X-Query-Count'] = str(stats.queries)
+            response['X-Query-Time-Ms'] = str(sql_ms)
+            response['X-Query-Duplicates'] = str(stats.duplicates)
+            response['X-View-Time-Ms'] = str(view_ms)
+            if budget is not None:
+                response['X-Query-Budget'] = str(budget)
+
+        if over:
+            message = f"{name} over budget: {', '.join(over)}"
+            if top_duplicate:
+                message += f"; most repeated ({top_duplicate[1]}x): {top_duplicate[0][:200]}"
+            if settings.QUERY_BUDGET_ACTION == 'raise':
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+        return response
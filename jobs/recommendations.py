@@ -0,0 +1,177 @@
+"""
+Skill-overlap job recommendations.
+
+Each process keeps an in-memory inverted index of the catalogue: for every
+skill id, a compact array of the open jobs that require it, plus per-job
+metadata (skill count, job type, deadline). Scoring a student walks only the
+postings of the student's own skills, so it costs O(matching postings)
+rather than one query per job. The index is rebuilt after
+RECOMMENDATION_INDEX_TTL, or sooner when the catalogue version changes (see
+jobs/cache.py) - but at most once per RECOMMENDATION_INDEX_MIN_AGE, since
+every job, question or employer save bumps the version and a rebuild reads
+the whole open catalogue on the request path. Within that window the index
+may still list a job that just closed (readers filter those out) or miss
+one that was just posted (update_job_matches scores it from the database).
+
+    score = SKILL_WEIGHT  * (required skills the student has / required skills)
+          + PREFERENCE_WEIGHT   * work_preference fit
+          + AVAILABILITY_WEIGHT * availability fit
+"""
+import heapq
+import threading
+import time
+from array import array
+from collections import Counter, namedtuple
+
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import get_catalogue_version
+from .models import Application, Job
+
+SKILL_WEIGHT = 0.7
+PREFERENCE_WEIGHT = 0.2
+AVAILABILITY_WEIGHT = 0.1
+
+# How well each availability suits each job type (internships are long-term,
+# gigs are short and bursty)
+AVAILABILITY_FIT = {
+    ('INT', 'FULL'): 1.0,
+    ('INT', 'FLEX'): 0.75,
+    ('INT', 'PART'): 0.5,
+    ('GIG', 'FULL'): 0.75,
+    ('GIG', 'FLEX'): 1.0,
+    ('GIG', 'PART'): 1.0,
+}
+
+JobEntry = namedtuple('JobEntry', 'skill_count job_type deadline posted')
+StudentVector = namedtuple('StudentVector', 'skill_ids work_preference availability')
+
+
+class JobSkillIndex:
+    def __init__(self):
+        self.postings = {}   # skill_id -> array('L') of job ids
+        self.jobs = {}       # job_id -> JobEntry
+        self.version = None
+        self.built_at = 0.0
+        self._lock = threading.Lock()
+
+    def build(self):
+        """Load the open catalogue with two queries."""
+        open_jobs = Job.objects.accepting_applications()
+        rows = (Job.skills_required.through.objects
+                .filter(job__in=open_jobs.values('pk'))
+                .values_list('job_id', 'skill_id'))
+        postings = {}
+        skill_counts = Counter()
+        for job_id, skill_id in rows.iterator(chunk_size=5000):
+            postings.setdefault(skill_id, array('L')).append(job_id)
+            skill_counts[job_id] += 1
+        self.jobs = {
+            pk: JobEntry(skill_counts[pk], job_type, deadline, posted)
+            for pk, job_type, deadline, posted in open_jobs.values_list(
+                'pk', 'job_type', 'application_deadline', 'posted_date')
+        }
+        self.postings = postings
+        self.built_at = time.monotonic()
+
+    def is_stale(self, version):
+        if self.version is None:
+            return True
+        age = time.monotonic() - self.built_at
+        if age >= settings.RECOMMENDATION_INDEX_TTL:
+            return True
+        return version != self.version and age >= settings.RECOMMENDATION_INDEX_MIN_AGE
+
+    def ensure_fresh(self):
+        version = get_catalogue_version()
+        if not self.is_stale(version):
+            return
+        with self._lock:
+            if self.is_stale(version):
+                self.build()
+                self.version = version
+
+    def overlap(self, student):
+        """Counter of job_id -> number of the student's skills it requires."""
+        counts = Counter()
+        for skill_id in student.skill_ids:
+            counts.update(self.postings.get(skill_id, ()))
+        return counts
+
+    def score_all(self, student, exclude=(), all_jobs=False):
+        """
+        {job_id: score} for open jobs sharing a skill with the student, or for
+        every open job when `all_jobs` is set.
+        """
+        self.ensure_fresh()
+        now = timezone.now()
+        overlap = self.overlap(student)
+        candidates = self.jobs.keys() if all_jobs else overlap.keys()
+        # preference and availability only depend on the job type
+        base = {job_type: _fit(job_type, student) for job_type, _ in Job.JOB_TYPE_CHOICES}
+        jobs = self.jobs
+        scores = {}
+        for job_id in candidates:
+            entry = jobs.get(job_id)
+            if entry is None or job_id in exclude or (entry.deadline is not None and entry.deadline < now):
+                continue
+            score = base.get(entry.job_type, 0.0)
+            if entry.skill_count:
+                score += SKILL_WEIGHT * overlap[job_id] / entry.skill_count
+            if score > 0:
+                scores[job_id] = score
+        return scores
+
+    def top(self, student, k, exclude=()):
+        """The k best (job_id, score) pairs, newest first among ties."""
+        scores = self.score_all(student, exclude)
+        if len(scores) < k:
+            # too few skill matches: fill up on preference and availability
+            scores = self.score_all(student, exclude, all_jobs=True)
+        return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], self.jobs[item[0]].posted))
+
+
+def match_score(job_type, skill_count, overlap, student):
+    """Score of one job for one student; see the module docstring."""
+    score = _fit(job_type, student)
+    if skill_count:
+        score += SKILL_WEIGHT * overlap / skill_count
+    return score
+
+
+def _fit(job_type, student):
+    """The work_preference and availability part of the score."""
+    preference = 1.0 if student.work_preference in ('BOTH', job_type) else 0.0
+    availability = AVAILABILITY_FIT.get((job_type, student.availability), 0.0)
+    return PREFERENCE_WEIGHT * preference + AVAILABILITY_WEIGHT * availability
+
+
+job_skill_index = JobSkillIndex()
+
+
+def student_vector(student):
+    return StudentVector(
+        skill_ids=frozenset(student.skills.values_list('pk', flat=True)),
+        work_preference=student.work_preference,
+        availability=student.availability,
+    )
+
+
+def recommend_jobs(student, k=3):
+    """
+    The student's k best-matching open jobs (with `match_score` set), skipping
+    jobs they have already applied to.
+    """
+    applied = set(Application.objects.filter(student=student).values_list('job_id', flat=True))
+    ranked = job_skill_index.top(student_vector(student), k, exclude=applied)
+    if not ranked:
+        return []
+    jobs = Job.objects.select_related('employer').in_bulk([job_id for job_id, _ in ranked])
+    result = []
+    for job_id, score in ranked:
+        job = jobs.get(job_id)
+        if job is not None:
+            job.match_score = score
+            result.append(job)
+    return result
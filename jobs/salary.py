@@ -0,0 +1,131 @@
+"""
+Parsing of the free-text Job.salary field into structured columns.
+
+Employers type things like "£12-15 per hour", "200", "$18.50/hr" or
+"25k - 30k GBP". parse_salary() pulls out the numeric range and currency so
+that job_list can filter and sort on indexed salary_min/salary_max columns
+instead of parsing text in Python.
+"""
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+
+CURRENCY_SYMBOLS = {
+    '£': 'GBP',
+    '$': 'USD',
+    '€': 'EUR',
+    '₹': 'INR',
+    '¥': 'JPY',
+}
+CURRENCY_CODES = {'GBP', 'USD', 'EUR', 'INR', 'JPY', 'CAD', 'AUD', 'NZD', 'ZAR', 'NGN', 'KES', 'PKR'}
+
+SYMBOLS = ''.join(CURRENCY_SYMBOLS)
+AMOUNT_RE = re.compile(r'(\d[\d,]*(?:\.\d+)?)\s*([kK]\b)?')
+CODE_RE = re.compile(r'\b([A-Za-z]{3})\b')
+CODE_BEFORE_RE = re.compile(r'\b([A-Za-z]{3})\s*$')
+CODE_AFTER_RE = re.compile(r'\s*([A-Za-z]{3})\b')
+# "3 month contract", "2 days a week": a duration, not an amount
+DURATION_RE = re.compile(
+    r'\s*(?:hours?|hrs?|days?|weeks?|wks?|months?|mths?|years?|yrs?)\b', re.IGNORECASE,
+)
+# what may sit between the two ends of "12-15", "£12 to £15"
+RANGE_SEP_RE = re.compile(rf'\s*(?:-|–|—|to)\s*[{SYMBOLS}]?\s*$', re.IGNORECASE)
+MAX_AMOUNT = Decimal('99999999.99')  # fits DecimalField(max_digits=10, decimal_places=2)
+
+
+def _amount(number, thousands):
+    try:
+        value = Decimal(number.replace(',', ''))
+    except InvalidOperation:
+        return None
+    if thousands:
+        value *= 1000
+    if value > MAX_AMOUNT:
+        return None
+    return value.quantize(Decimal('0.01'))
+
+
+def parse_currency(text):
+    for symbol, code in CURRENCY_SYMBOLS.items():
+        if symbol in text:
+            return code
+    for word in CODE_RE.findall(text):
+        if word.upper() in CURRENCY_CODES:
+            return word.upper()
+    return None
+
+
+def _figures(text):
+    """
+    [amount, thousands, is_money, is_duration, match] for every number in
+    `text`. A number is money when a currency sign or code sits right next
+    to it.
+    """
+    figures = []
+    for match in AMOUNT_RE.finditer(text):
+        amount = _amount(match.group(1), match.group(2))
+        if amount is None:
+            continue
+        before, after = text[:match.start()].rstrip(), text[match.end():]
+        code_before = CODE_BEFORE_RE.search(before)
+        code_after = CODE_AFTER_RE.match(after)
+        is_money = (
+            (before[-1:] in CURRENCY_SYMBOLS)
+            or bool(code_before and code_before.group(1).upper() in CURRENCY_CODES)
+            or bool(code_after and code_after.group(1).upper() in CURRENCY_CODES)
+        )
+        is_duration = not is_money and bool(DURATION_RE.match(after))
+        figures.append([amount, bool(match.group(2)), is_money, is_duration, match])
+    # "3-6 months": the start of a range of durations is one too
+    for figure, following in reversed(list(zip(figures, figures[1:]))):
+        if following[3] and not figure[2] and _is_range(text, figure, following):
+            figure[3] = True
+    return figures
+
+
+def _is_range(text, figure, following):
+    return bool(RANGE_SEP_RE.match(text[figure[4].end():following[4].start()]))
+
+
+def parse_salary(text):
+    """
+    Return (salary_min, salary_max, currency) for a salary string. Amounts
+    are Decimals or None when no amount can be told apart; a single figure
+    gives min == max. Currency falls back to settings.DEFAULT_SALARY_CURRENCY
+    when an amount is found but no currency is named.
+
+    Only the first figure next to a currency sign or code, or the first
+    explicit range ("12-15", "£12 to £15") counts, so "3 month contract,
+    £500" is 500, not 3-500. A lone bare number ("200") is taken as is;
+    numbers followed by a duration ("2 days") never are.
+    """
+    text = (text or '').strip()
+    figures = _figures(text)
+    chosen = None
+    for i, (amount, thousands, is_money, is_duration, match) in enumerate(figures):
+        following = figures[i + 1] if i + 1 < len(figures) else None
+        if following and not is_duration and _is_range(text, figures[i], following):
+            low, high = amount, following[0]
+            # "25-30k" means 25k-30k
+            if following[1] and not thousands and low < 1000 <= high:
+                low *= 1000
+            chosen = (low, high)
+            break
+        if is_money:
+            chosen = (amount, amount)
+            break
+    if chosen is None:
+        bare = [figure for figure in figures if not figure[3]]
+        if len(bare) != 1:
+            return None, None, None
+        chosen = (bare[0][0], bare[0][0])
+    return min(chosen), max(chosen), parse_currency(text) or settings.DEFAULT_SALARY_CURRENCY
+
+
+def set_salary_range(job):
+    """Fill job.salary_min/salary_max/salary_currency from job.salary."""
+    job.salary_min, job.salary_max, job.salary_currency = parse_salary(job.salary)
+    if job.salary_currency is None:
+        job.salary_currency = ''
+    return job
@@ -0,0 +1,241 @@
+"""
+Full-text search indexes.
+
+Each index is a side table holding one row per indexed object, kept in sync by
+signals (see jobs/signals.py):
+
+  * SQLite: an FTS5 virtual table, ranked with bm25()
+  * MySQL:  an InnoDB table with a FULLTEXT index, ranked with MATCH ... AGAINST
+
+Any other backend falls back to icontains filtering so the views keep working.
+
+    job_index       Job: title, description, requirements, location, company
+    question_index  CommunityQuestion: title, body and the bodies of all its
+                    answers, so a question is found by what was answered
+"""
+import logging
+import re
+
+from django.apps import apps
+from django.db import connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+logger = logging.getLogger(__name__)
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _tokens(query):
+    return TOKEN_RE.findall((query or '').lower())[:16]
+
+
+class FullTextIndex:
+    """
+    A ranked keyword index over a model.
+
+    `columns` maps index column -> ORM lookup path (used for the icontains
+    fallback), `weights` gives the bm25 weight of each column and `document`
+    builds the column values for one instance.
+    """
+
+    def __init__(self, table, model_label, columns, weights, document, select_related=(), prefetch_related=()):
+        self.table = table
+        self.model_label = model_label
+        self.columns = columns
+        self.weights = weights
+        self.document = document
+        self.select_related = select_related
+        self.prefetch_related = prefetch_related
+
+    def get_queryset(self):
+        model = apps.get_model(self.model_label)
+        return model.objects.select_related(*self.select_related).prefetch_related(*self.prefetch_related)
+
+    # ---------- backend detection ----------
+    @property
+    def vendor(self):
+        return connection.vendor
+
+    @property
+    def supported(self):
+        return self.vendor in ('sqlite', 'mysql')
+
+    @property
+    def key_column(self):
+        return 'rowid' if self.vendor == 'sqlite' else 'object_id'
+
+    # ---------- DDL (used by rebuild_search_index) ----------
+    def create_sql(self, vendor):
+        cols = ', '.join(self.columns)
+        if vendor == 'sqlite':
+            return [
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                f"{cols}, tokenize='porter unicode61 remove_diacritics 2')"
+            ]
+        if vendor == 'mysql':
+            col_defs = ', '.join(f'{c} LONGTEXT' for c in self.columns)
+            return [
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                f"object_id BIGINT NOT NULL PRIMARY KEY, {col_defs}, "
+                f"FULLTEXT KEY {self.table}_ft ({cols})"
+                f") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+            ]
+        return []
+
+    def drop_sql(self, vendor):
+        if vendor in ('sqlite', 'mysql'):
+            return [f"DROP TABLE IF EXISTS {self.table}"]
+        return []
+
+    # ---------- maintenance ----------
+    def update(self, instance):
+        if not self.supported:
+            return
+        doc = self.document(instance)
+        cols = ', '.join(self.columns)
+        placeholders = ', '.join(['%s'] * (len(self.columns) + 1))
+        with connection.cursor() as cursor:
+            if self.vendor == 'sqlite':
+                # FTS5 has no upsert on rowid; delete first so REPLACE never
+                # leaves stale tokens behind.
+                cursor.execute(f"DELETE FROM {self.table} WHERE rowid = %s", [instance.pk])
+            cursor.execute(
+                f"REPLACE INTO {self.table} ({self.key_column}, {cols}) VALUES ({placeholders})",
+                [instance.pk] + [doc.get(c) or '' for c in self.columns],
+            )
+
+    def delete(self, pk):
+        if not self.supported:
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE {self.key_column} = %s", [pk])
+
+    def rebuild(self, batch_size=500):
+        """Drop every row and re-index the model. Returns the number of rows indexed."""
+        if not self.supported:
+            return 0
+        with connection.cursor() as cursor:
+            for sql in self.create_sql(self.vendor):
+                cursor.execute(sql)
+            cursor.execute(f"DELETE FROM {self.table}")
+        count = 0
+        for obj in self.get_queryset().iterator(chunk_size=batch_size):
+            self.update(obj)
+            count += 1
+        return count
+
+    # ---------- querying ----------
+    def match_expression(self, query):
+        tokens = _tokens(query)
+        if not tokens:
+            return None
+        if self.vendor == 'sqlite':
+            # Quote every token so user input can never be parsed as FTS5
+            # syntax; the last token is a prefix so search-as-you-type works.
+            terms = [f'"{t}"' for t in tokens[:-1]] + [f'"{tokens[-1]}"*']
+            return ' '.join(terms)
+        if self.vendor == 'mysql':
+            terms = [f'+{t}' for t in tokens[:-1]] + [f'+{tokens[-1]}*']
+            return ' '.join(terms)
+        return ' '.join(tokens)
+
+    def search(self, queryset, query):
+        """
+        Restrict `queryset` to rows matching `query` and annotate `search_rank`
+        (lower is better). Returns `queryset` unchanged for an empty query.
+        """
+        expr = self.match_expression(query)
+        if expr is None:
+            return queryset
+
+        model_table = queryset.model._meta.db_table
+        pk_column = queryset.model._meta.pk.column
+        outer_pk = f'{connection.ops.quote_name(model_table)}.{connection.ops.quote_name(pk_column)}'
+
+        if self.vendor == 'sqlite':
+            weights = ', '.join(str(self.weights.get(c, 1.0)) for c in self.columns)
+            matches = RawSQL(f"SELECT rowid FROM {self.table} WHERE {self.table} MATCH %s", [expr])
+            rank = RawSQL(
+                f"SELECT bm25({self.table}, {weights}) FROM {self.table} "
+                f"WHERE {self.table} MATCH %s AND rowid = {outer_pk}",
+                [expr],
+                output_field=FloatField(),
+            )
+            return queryset.filter(pk__in=matches).annotate(search_rank=rank)
+
+        if self.vendor == 'mysql':
+            cols = ', '.join(self.columns)
+            against = f"MATCH ({cols}) AGAINST (%s IN BOOLEAN MODE)"
+            matches = RawSQL(f"SELECT object_id FROM {self.table} WHERE {against}", [expr])
+            # MATCH relevance grows with quality; negate it so both backends
+            # sort ascending on search_rank.
+            rank = RawSQL(
+                f"SELECT -{against} FROM {self.table} WHERE object_id = {outer_pk}",
+                [expr],
+                output_field=FloatField(),
+            )
+            return queryset.filter(pk__in=matches).annotate(search_rank=rank)
+
+        logger.warning("Full-text search is not supported on %s; falling back to icontains", self.vendor)
+        cond = Q()
+        for token in _tokens(query):
+            token_q = Q()
+            for lookup in self.columns.values():
+                token_q |= Q(**{f'{lookup}__icontains': token})
+            cond &= token_q
+        # lookups across a to-many relation (question answers) can repeat rows
+        return queryset.filter(cond).distinct().annotate(search_rank=Value(0.0, output_field=FloatField()))
+
+
+def _job_document(job):
+    return {
+        'title': job.title,
+        'description': job.description,
+        'requirements': job.requirements,
+        'location': job.location,
+        'company_name': job.employer.company_name,
+    }
+
+
+job_index = FullTextIndex(
+    table='jobs_job_fts',
+    model_label='jobs.Job',
+    columns={
+        'title': 'title',
+        'description': 'description',
+        'requirements': 'requirements',
+        'location': 'location',
+        'company_name': 'employer__company_name',
+    },
+    weights={'title': 10.0, 'description': 1.0, 'requirements': 2.0, 'location': 3.0, 'company_name': 5.0},
+    document=_job_document,
+    select_related=('employer',),
+)
+
+
+def _question_document(question):
+    return {
+        'title': question.title,
+        'body': question.body,
+        'answers': '\n'.join(answer.body for answer in question.answers.all()),
+    }
+
+
+question_index = FullTextIndex(
+    table='jobs_communityquestion_fts',
+    model_label='jobs.CommunityQuestion',
+    columns={
+        'title': 'title',
+        'body': 'body',
+        'answers': 'answers__body',
+    },
+    weights={'title': 10.0, 'body': 3.0, 'answers': 1.0},
+    document=_question_document,
+    prefetch_related=('answers',),
+)
+
+INDEXES = {
+    'jobs': job_index,
+    'community': question_index,
+}
@@ -0,0 +1,382 @@
+"""
+Write-side job lifecycle helpers.
+
+Deadline/capacity sweeps run from management commands (see close_jobs) so
+that request handlers only ever read job state. Application status changes go
+through set_application_status()/bulk_set_application_status() so that
+Job.application_count and the funnel rollups stay in step with the
+Application rows. Community votes go through cast_vote() so the stored
+scores of questions and answers match the Vote rows, and refresh_hot_ranks()
+keeps the stored "hot" rank of questions in step with their votes and answers.
+"""
+import math
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .cache import EMPLOYER, STUDENT, bump_catalogue_version, bump_widgets
+from .funnel import record_transitions
+from .models import Application, CommunityAnswer, CommunityQuestion, Job, Notification, Vote
+
+# Statuses that do not hold one of a job's max_applications slots: a student
+# who withdraws frees their slot for someone else, and moving the application
+# back to any other status has to find room for it again (see JobFull)
+UNCOUNTED_STATUSES = ('WITHDRAWN',)
+
+
+class JobFull(Exception):
+    """A status change would take a job past its max_applications."""
+
+    def __init__(self, job_ids):
+        self.job_ids = sorted(job_ids)
+        super().__init__(f"No application slots left on job(s) {', '.join(map(str, self.job_ids))}")
+
+
+def deadline_message(job_title):
+    return f"Job '{job_title}' was closed because its application deadline passed."
+
+
+def capacity_message(job_title, max_applications):
+    return f"Job '{job_title}' has reached the maximum applications ({max_applications})."
+
+
+def _notify_employers(rows):
+    """
+    bulk_create employer notifications for (job_id, employer_id, message)
+    rows, skipping any that already exist so re-runs are idempotent.
+    """
+    if not rows:
+        return 0
+    existing = set(
+        Notification.objects
+        .filter(job_id__in={job_id for job_id, _, _ in rows}, message__in={msg for _, _, msg in rows})
+        .values_list('job_id', 'message')
+    )
+    new = [
+        Notification(job_id=job_id, employer_id=employer_id, message=msg)
+        for job_id, employer_id, msg in rows
+        if (job_id, msg) not in existing
+    ]
+    Notification.objects.bulk_create(new)
+    bump_widgets(EMPLOYER, {n.employer_id for n in new}, 'notifications')
+    return len(new)
+
+
+def close_expired_jobs(now=None, dry_run=False):
+    """
+    Deactivate every active job whose application deadline has passed with a
+    single UPDATE and notify the employers. Returns (closed, notified).
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        expired = list(
+            Job.objects
+            .select_for_update()
+            .filter(is_active=True, application_deadline__lt=now)
+            .values_list('id', 'employer_id', 'title')
+        )
+        if dry_run or not expired:
+            return len(expired), 0
+        Job.objects.filter(pk__in=[job_id for job_id, _, _ in expired]).update(is_active=False)
+        # queryset.update() skips post_save, so invalidate explicitly
+        transaction.on_commit(bump_catalogue_version)
+        bump_widgets(EMPLOYER, {employer_id for _, employer_id, _ in expired}, 'jobs')
+        notified = _notify_employers([
+            (job_id, employer_id, deadline_message(title))
+            for job_id, employer_id, title in expired
+        ])
+    return len(expired), notified
+
+
+def notify_full_jobs(dry_run=False):
+    """
+    Notify employers of active jobs that have hit max_applications. The jobs
+    stay active so that raising the limit from manage_max_applications
+    reopens them. Returns (full, notified).
+    """
+    full = list(
+        Job.objects
+        .filter(is_active=True, max_applications__gt=0)
+        .with_acceptance_status()
+        .filter(acceptance_status=Job.CLOSED_CAPACITY)
+        .values_list('id', 'employer_id', 'title', 'max_applications')
+    )
+    if dry_run:
+        return len(full), 0
+    notified = _notify_employers([
+        (job_id, employer_id, capacity_message(title, max_applications))
+        for job_id, employer_id, title, max_applications in full
+    ])
+    return len(full), notified
+
+
+# ---------- Application counter ----------
+def _counted(status):
+    return status not in UNCOUNTED_STATUSES
+
+
+def _bump_application_widgets(owners):
+    """Dashboard widgets showing application status, for (student, employer) pairs."""
+    bump_widgets(STUDENT, {student_id for student_id, _ in owners}, 'stats', 'applications')
+    bump_widgets(EMPLOYER, {employer_id for _, employer_id in owners}, 'jobs', 'applications', 'funnel')
+
+
+def _has_room(slots=1):
+    return (Q(max_applications__isnull=True) | Q(max_applications=0)
+            | Q(application_count__lte=F('max_applications') - slots))
+
+
+def _move_application_count(job_id, delta):
+    """
+    Add `delta` to the job's application_count. Taking slots is a
+    conditional UPDATE like reserve_application_slot(), returning False
+    (and changing nothing) if the job does not have room for them.
+    """
+    jobs = Job.objects.filter(pk=job_id)
+    if delta > 0:
+        jobs = jobs.filter(_has_room(delta))
+    return jobs.update(application_count=F('application_count') + delta) == 1
+
+
+def reserve_application_slot(job_id, now=None):
+    """
+    Take one application slot on the job with a conditional UPDATE. Returns
+    False (and changes nothing) if the job is closed, past its deadline or
+    already full, so concurrent applicants can never overshoot
+    max_applications. Call inside the transaction that creates the
+    Application.
+    """
+    now = now or timezone.now()
+    open_deadline = Q(application_deadline__isnull=True) | Q(application_deadline__gte=now)
+    updated = (Job.objects
+               .filter(_has_room(), open_deadline, pk=job_id, is_active=True)
+               .update(application_count=F('application_count') + 1))
+    return updated == 1
+
+
+def set_application_status(application, status):
+    """
+    Change one application's status and adjust its job's application_count
+    and funnel rollup (jobs/funnel.py) in the same transaction. Returns the
+    previous status. Raises JobFull, changing nothing, if a withdrawn
+    application would be moved back into a job that has no slot left.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        previous, applied_date = (Application.objects
+                                  .select_for_update()
+                                  .values_list('status', 'applied_date')
+                                  .get(pk=application.pk))
+        delta = _counted(status) - _counted(previous)
+        if delta and not _move_application_count(application.job_id, delta):
+            raise JobFull([application.job_id])
+        Application.objects.filter(pk=application.pk).update(status=status, status_changed_at=now)
+        record_transitions([(application.job_id, previous, applied_date)], status, now)
+        _bump_application_widgets(
+            Application.objects.filter(pk=application.pk).values_list('student_id', 'job__employer_id')
+        )
+    application.status = status
+    application.status_changed_at = now
+    return previous
+
+
+def bulk_set_application_status(applications, status):
+    """
+    Bulk version of set_application_status() for a queryset. The per-job
+    counter deltas and funnel transitions are worked out from one read of the
+    locked rows before the UPDATE. Returns the number of applications updated.
+    Raises JobFull, changing nothing, if the withdrawn applications being
+    moved back do not all fit in their jobs.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        applications = applications.select_for_update()
+        rows = list(applications
+                    .order_by()
+                    .values_list('job_id', 'status', 'applied_date', 'student_id', 'job__employer_id'))
+        deltas = Counter()
+        for job_id, previous, _, _, _ in rows:
+            deltas[job_id] += _counted(status) - _counted(previous)
+        full = [job_id for job_id, delta in deltas.items() if delta and not _move_application_count(job_id, delta)]
+        if full:
+            # leaving the atomic block rolls back the counters already moved
+            raise JobFull(full)
+        updated = applications.update(status=status, status_changed_at=now)
+        record_transitions([(job_id, previous, applied) for job_id, previous, applied, _, _ in rows], status, now)
+        _bump_application_widgets({(student_id, employer_id) for _, _, _, student_id, employer_id in rows})
+    return updated
+
+
+def reconcile_application_counts(batch_size=1000, dry_run=False):
+    """
+    Recompute application_count from the Application table and repair any
+    drift (e.g. from admin edits or cascaded deletes). Returns the number of
+    jobs that were out of step.
+    """
+    counted = (Application.objects
+               .filter(job=OuterRef('pk'))
+               .exclude(status__in=UNCOUNTED_STATUSES)
+               .order_by()
+               .values('job')
+               .annotate(n=Count('pk'))
+               .values('n'))
+    actual = Coalesce(Subquery(counted), 0)
+    drifted = 0
+    last_id = 0
+    while True:
+        batch = list(Job.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1]
+        stale = list(Job.objects
+                     .filter(pk__in=batch)
+                     .annotate(actual_count=actual)
+                     .exclude(application_count=F('actual_count'))
+                     .values_list('pk', flat=True))
+        drifted += len(stale)
+        if stale and not dry_run:
+            Job.objects.filter(pk__in=stale).update(application_count=actual)
+            bump_widgets(EMPLOYER, set(Job.objects.filter(pk__in=stale).values_list('employer_id', flat=True)), 'jobs')
+    return drifted
+
+
+# ---------- Community votes ----------
+VOTE_COLUMNS = {Vote.UPVOTE: 'upvotes', Vote.DOWNVOTE: 'downvotes'}
+VOTED_MODELS = (CommunityQuestion, CommunityAnswer)
+
+
+def _vote_deltas(previous, value):
+    """Counter changes for one vote going from `previous` to `value` (None: no vote)."""
+    deltas = Counter()
+    if previous is not None:
+        deltas['score'] -= previous
+        deltas[VOTE_COLUMNS[previous]] -= 1
+    if value is not None:
+        deltas['score'] += value
+        deltas[VOTE_COLUMNS[value]] += 1
+    return deltas
+
+
+def cast_vote(user, target, value):
+    """
+    Record `user`'s vote on a CommunityQuestion or CommunityAnswer; voting
+    the same way again withdraws it. The Vote row and the target's score,
+    upvotes and downvotes change in one transaction, the counters with F()
+    updates. Returns the target's (score, upvotes, downvotes).
+    """
+    model = type(target)
+    content_type = ContentType.objects.get_for_model(model)
+    with transaction.atomic():
+        vote = (Vote.objects
+                .select_for_update()
+                .filter(user=user, content_type=content_type, object_id=target.pk)
+                .first())
+        previous = vote.value if vote else None
+        if vote is None:
+            try:
+                with transaction.atomic():
+                    Vote.objects.create(user=user, content_type=content_type, object_id=target.pk, value=value)
+            except IntegrityError:
+                # a concurrent request (double click) recorded this vote first
+                value = previous
+        elif previous == value:
+            vote.delete()
+            value = None
+        else:
+            vote.value = value
+            vote.save(update_fields=['value'])
+        deltas = {column: F(column) + n for column, n in _vote_deltas(previous, value).items() if n}
+        targets = model.objects.filter(pk=target.pk)
+        if deltas:
+            targets.update(**deltas)
+            if model is CommunityQuestion:
+                refresh_hot_ranks([target.pk])
+        return targets.values_list('score', 'upvotes', 'downvotes').get()
+
+
+def reconcile_vote_counts(batch_size=1000, dry_run=False):
+    """
+    Recompute score/upvotes/downvotes of questions and answers from the Vote
+    table and repair any drift (e.g. votes cascaded away with their user).
+    Also fills the columns for votes cast before they existed. Returns the
+    number of rows that were out of step.
+    """
+    drifted = 0
+    for model in VOTED_MODELS:
+        votes = (Vote.objects
+                 .filter(content_type=ContentType.objects.get_for_model(model), object_id=OuterRef('pk'))
+                 .order_by()
+                 .values('object_id'))
+        actual = {
+            'score': Coalesce(Subquery(votes.annotate(n=Sum('value')).values('n')), 0),
+            'upvotes': Coalesce(Subquery(votes.filter(value=Vote.UPVOTE).annotate(n=Count('pk')).values('n')), 0),
+            'downvotes': Coalesce(Subquery(votes.filter(value=Vote.DOWNVOTE).annotate(n=Count('pk')).values('n')), 0),
+        }
+        last_id = 0
+        while True:
+            batch = list(model.objects.filter(pk__gt=last_id).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1]
+            stale = list(model.objects
+                         .filter(pk__in=batch)
+                         .annotate(**{f'actual_{column}': expression for column, expression in actual.items()})
+                         .exclude(score=F('actual_score'), upvotes=F('actual_upvotes'), downvotes=F('actual_downvotes'))
+                         .values_list('pk', flat=True))
+            drifted += len(stale)
+            if stale and not dry_run:
+                model.objects.filter(pk__in=stale).update(**actual)
+    return drifted
+
+
+# ---------- Community hot rank ----------
+def hot_rank(score, answers, created_at):
+    """
+    Rank of a question for the "hot" sort. Engagement (score plus weighted
+    answers) counts on a log2 scale against age: each
+    COMMUNITY_HOT_HALF_LIFE_HOURS a question must double its engagement to
+    hold its place, i.e. engagement decaying by half every half-life. Age is
+    measured from a fixed epoch rather than from now, so a rank only changes
+    when the question's votes or answers do and stored ranks stay comparable.
+    """
+    engagement = score + settings.COMMUNITY_HOT_ANSWER_WEIGHT * answers
+    sign = (engagement > 0) - (engagement < 0)
+    half_life = settings.COMMUNITY_HOT_HALF_LIFE_HOURS * 3600
+    return sign * math.log2(1 + abs(engagement)) + created_at.timestamp() / half_life
+
+
+def refresh_hot_ranks(question_ids):
+    """Recompute hot_rank of the given questions in one read. Returns the number changed."""
+    rows = (CommunityQuestion.objects
+            .filter(pk__in=question_ids)
+            .order_by()
+            .annotate(answer_count=Count('answers'))
+            .values_list('pk', 'score', 'answer_count', 'created_at', 'hot_rank'))
+    stale = []
+    for pk, score, answers, created_at, stored in rows:
+        rank = hot_rank(score, answers, created_at)
+        if rank != stored:
+            stale.append(CommunityQuestion(pk=pk, hot_rank=rank))
+    CommunityQuestion.objects.bulk_update(stale, ['hot_rank'])
+    return len(stale)
+
+
+def refresh_all_hot_ranks(batch_size=1000):
+    """refresh_hot_ranks() over every question in primary key batches. Returns the number changed."""
+    changed = 0
+    last_id = 0
+    while True:
+        batch = list(CommunityQuestion.objects
+                     .filter(pk__gt=last_id)
+                     .order_by('pk')
+                     .values_list('pk', flat=True)[:batch_size])
+        if not batch:
+            return changed
+        last_id = batch[-1]
+        with transaction.atomic():
+            changed += refresh_hot_ranks(batch)
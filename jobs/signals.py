@@ -1,9 +1,21 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import m2m_changed, post_save, post_delete, pre_save
+from django.db import transaction
 from django.dispatch import receiver
 from django.urls import reverse
-from .models import Job, StudentNotification
-from accounts.models import StudentProfile
+from .cache import EMPLOYER, STUDENT, bump_catalogue_version, bump_widgets, invalidate_ui_settings
+from .models import (
+    Application, CommunityAnswer, CommunityQuestion, Interview, Job, JobQuestion, Notification, SavedJob,
+    StudentNotification,
+)
+from .funnel import record_application
+from .matching import refresh_students, update_job_matches
+from .salary import set_salary_range
+from accounts.locations import resolve_location
+from .search import job_index, question_index
+from .services import refresh_hot_ranks
+from accounts.models import StudentProfile, EmployerProfile
 from jobs.models import UserSettings  # wherever your UserSettings lives
+from payment.models import Feedback, Payment, TaskAssignment, TaskSubmission
 
 # @receiver(post_save, sender=Job)
 # def notify_students_on_new_job(sender, instance: Job, created, **kwargs):
@@ -52,3 +64,223 @@ def notify_students_on_job_post(sender, instance: Job, created, **kwargs):
         for s in students
     ]
     StudentNotification.objects.bulk_create(notes, ignore_conflicts=True)
+    # bulk_create skips post_save
+    bump_widgets(STUDENT, [s.pk for s in students], 'notifications')
+
+    # Fold the new job into students' materialized recommendations. Skills
+    # are attached after this save (form.save_m2m), which is picked up by
+    # rematch_job_skills below.
+    transaction.on_commit(lambda: update_job_matches(instance))
+
+# ---------- Search index sync ----------
+@receiver(post_save, sender=Job)
+def index_job(sender, instance: Job, **kwargs):
+    job_index.update(instance)
+
+@receiver(post_delete, sender=Job)
+def unindex_job(sender, instance: Job, **kwargs):
+    job_index.delete(instance.pk)
+
+@receiver(pre_save, sender=EmployerProfile)
+def note_company_name(sender, instance: EmployerProfile, update_fields=None, **kwargs):
+    # company_name is part of every job document; other profile edits
+    # (logo, phone, ...) shouldn't re-index all of an employer's jobs
+    instance._reindex_jobs = False
+    if instance._state.adding:
+        return
+    if update_fields is not None and 'company_name' not in update_fields:
+        return
+    stored = EmployerProfile.objects.filter(pk=instance.pk).values_list('company_name', flat=True).first()
+    instance._reindex_jobs = stored is not None and stored != instance.company_name
+
+@receiver(post_save, sender=EmployerProfile)
+def reindex_employer_jobs(sender, instance: EmployerProfile, created, **kwargs):
+    if not getattr(instance, '_reindex_jobs', False):
+        return
+    for job in instance.jobs.select_related('employer'):
+        job_index.update(job)
+
+@receiver(post_save, sender=CommunityQuestion)
+def index_question(sender, instance: CommunityQuestion, **kwargs):
+    question_index.update(instance)
+
+@receiver(post_delete, sender=CommunityQuestion)
+def unindex_question(sender, instance: CommunityQuestion, **kwargs):
+    question_index.delete(instance.pk)
+
+@receiver(post_save, sender=CommunityAnswer)
+@receiver(post_delete, sender=CommunityAnswer)
+def reindex_answered_question(sender, instance: CommunityAnswer, **kwargs):
+    # answer bodies are part of their question's document
+    question = CommunityQuestion.objects.filter(pk=instance.question_id).first()
+    if question is not None:
+        question_index.update(question)
+
+# ---------- Community hot rank ----------
+@receiver(post_save, sender=CommunityQuestion)
+def rank_new_question(sender, instance: CommunityQuestion, created, **kwargs):
+    if created:
+        refresh_hot_ranks([instance.pk])
+
+@receiver(post_save, sender=CommunityAnswer)
+@receiver(post_delete, sender=CommunityAnswer)
+def refresh_answered_hot_rank(sender, instance: CommunityAnswer, created=True, **kwargs):
+    # answer count is part of the rank; edits leave it alone
+    if created:
+        refresh_hot_ranks([instance.question_id])
+
+# ---------- Catalogue cache invalidation ----------
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+@receiver(post_save, sender=JobQuestion)
+@receiver(post_delete, sender=JobQuestion)
+@receiver(post_save, sender=EmployerProfile)
+@receiver(post_delete, sender=EmployerProfile)
+def invalidate_catalogue(sender, **kwargs):
+    bump_catalogue_version()
+
+@receiver(m2m_changed, sender=Job.skills_required.through)
+def invalidate_catalogue_skills(sender, action, **kwargs):
+    # the recommendation index is keyed on the catalogue version too
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_catalogue_version()
+
+# ---------- Structured salary ----------
+@receiver(pre_save, sender=Job)
+def parse_job_salary(sender, instance: Job, update_fields=None, **kwargs):
+    # save(update_fields=...) only persists the parsed columns if listed
+    if update_fields is not None and 'salary' not in update_fields:
+        return
+    set_salary_range(instance)
+
+# ---------- Canonical location ----------
+@receiver(pre_save, sender=Job)
+def normalize_job_location(sender, instance: Job, update_fields=None, **kwargs):
+    if update_fields is not None and 'location' not in update_fields:
+        return
+    instance.place = resolve_location(instance.location, instance.employer.country)
+
+# ---------- Materialized recommendations ----------
+@receiver(m2m_changed, sender=Job.skills_required.through)
+def rematch_job_skills(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        # skill.jobs.add(...): instance is the Skill, pk_set the jobs
+        jobs = list(Job.objects.filter(pk__in=pk_set or ()))
+    else:
+        jobs = [instance]
+    transaction.on_commit(lambda: [update_job_matches(job) for job in jobs])
+
+@receiver(m2m_changed, sender=StudentProfile.skills.through)
+def rematch_student_skills(sender, instance, action, reverse, pk_set, **kwargs):
+    # add_skill / remove_skill / the profile form
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        students = list(StudentProfile.objects.filter(pk__in=pk_set or ()))
+    else:
+        students = [instance]
+    transaction.on_commit(lambda: refresh_students(students))
+
+MATCH_PREFERENCES = ('work_preference', 'availability')
+
+@receiver(pre_save, sender=StudentProfile)
+def note_student_preferences(sender, instance: StudentProfile, update_fields=None, **kwargs):
+    # work_preference / availability feed the score; only a real change to
+    # them is worth a refresh, not every picture upload or stats save
+    instance._rematch = False
+    if instance._state.adding:
+        return
+    if update_fields is not None and not set(MATCH_PREFERENCES) & set(update_fields):
+        return
+    stored = StudentProfile.objects.filter(pk=instance.pk).values_list(*MATCH_PREFERENCES).first()
+    instance._rematch = stored is not None and stored != tuple(getattr(instance, f) for f in MATCH_PREFERENCES)
+
+@receiver(post_save, sender=StudentProfile)
+def rematch_student_preferences(sender, instance: StudentProfile, created, **kwargs):
+    if getattr(instance, '_rematch', False):
+        transaction.on_commit(lambda: refresh_students([instance]))
+
+# ---------- Hiring funnel ----------
+@receiver(post_save, sender=Application)
+def count_funnel_application(sender, instance: Application, created, **kwargs):
+    # status changes are counted by jobs/services.py
+    if created:
+        record_application(instance.job_id, instance.applied_date)
+
+# ---------- Cached UI settings ----------
+@receiver(post_save, sender=UserSettings)
+@receiver(post_delete, sender=UserSettings)
+def invalidate_cached_ui_settings(sender, instance, **kwargs):
+    # StudentProfile's primary key is its user's id
+    invalidate_ui_settings(instance.student_id)
+
+# ---------- Dashboard widget invalidation ----------
+def _application_owners(**filters):
+    """(student id, employer id) of the application matching `filters`."""
+    return (Application.objects
+            .filter(**filters)
+            .values_list('student_id', 'job__employer_id')
+            .first()) or (None, None)
+
+@receiver(post_save, sender=StudentNotification)
+@receiver(post_delete, sender=StudentNotification)
+def invalidate_student_notifications_widget(sender, instance, **kwargs):
+    bump_widgets(STUDENT, [instance.student_id], 'notifications')
+
+@receiver(post_save, sender=Notification)
+@receiver(post_delete, sender=Notification)
+def invalidate_employer_notifications_widget(sender, instance, **kwargs):
+    bump_widgets(EMPLOYER, [instance.employer_id], 'notifications')
+
+@receiver(post_save, sender=Job)
+@receiver(post_delete, sender=Job)
+def invalidate_employer_jobs_widget(sender, instance: Job, **kwargs):
+    bump_widgets(EMPLOYER, [instance.employer_id], 'jobs')
+
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def invalidate_application_widgets(sender, instance: Application, **kwargs):
+    employer_id = Job.objects.filter(pk=instance.job_id).values_list('employer_id', flat=True).first()
+    bump_widgets(STUDENT, [instance.student_id], 'stats', 'applications', 'recommended')
+    bump_widgets(EMPLOYER, [employer_id], 'jobs', 'applications', 'funnel')
+
+@receiver(post_save, sender=Interview)
+@receiver(post_delete, sender=Interview)
+def invalidate_interviews_widget(sender, instance: Interview, **kwargs):
+    student_id, _ = _application_owners(pk=instance.application_id)
+    bump_widgets(STUDENT, [student_id], 'interviews')
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def invalidate_earnings_widget(sender, instance: Payment, **kwargs):
+    student_id, _ = _application_owners(pk=instance.application_id)
+    bump_widgets(STUDENT, [student_id], 'stats')
+
+@receiver(post_save, sender=TaskAssignment)
+@receiver(post_delete, sender=TaskAssignment)
+def invalidate_task_widgets(sender, instance: TaskAssignment, **kwargs):
+    student_id, employer_id = _application_owners(pk=instance.application_id)
+    bump_widgets(STUDENT, [student_id], 'tasks')
+    bump_widgets(EMPLOYER, [employer_id], 'applications')
+
+@receiver(post_save, sender=TaskSubmission)
+@receiver(post_delete, sender=TaskSubmission)
+@receiver(post_save, sender=Feedback)
+@receiver(post_delete, sender=Feedback)
+def invalidate_task_progress_widgets(sender, instance, **kwargs):
+    student_id, employer_id = _application_owners(task_assignment=instance.task_assignment_id)
+    bump_widgets(STUDENT, [student_id], 'tasks')
+    bump_widgets(EMPLOYER, [employer_id], 'applications')
+
+@receiver(post_save, sender=SavedJob)
+@receiver(post_delete, sender=SavedJob)
+def invalidate_saved_jobs_widget(sender, instance: SavedJob, **kwargs):
+    bump_widgets(STUDENT, [instance.student_id], 'recommended')
+
+@receiver(post_save, sender=StudentProfile)
+def invalidate_student_stats_widget(sender, instance: StudentProfile, created, **kwargs):
+    # the earnings card links to Stripe onboarding until stripe_account_id is set
+    if not created:
+        bump_widgets(STUDENT, [instance.pk], 'stats')
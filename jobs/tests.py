@@ -1,3 +1,476 @@
-from django.test import TestCase
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import EmployerProfile, StudentProfile, User
+from payment.models import Payment
+from .funnel import funnel_summary, rebuild_funnel
+from .kpis import WATERMARK_LAG, kpi_summary, refresh_kpis
+from .models import (
+    Application, ApplicationKpiDay, CommunityAnswer, CommunityQuestion, Job, JobFunnelDay, KpiWatermark, SignupDay,
+    Vote,
+)
+from .pagination import paginate
+from .salary import parse_salary
+from .threads import MAX_INDENT, answer_thread
+from .services import (
+    JobFull, bulk_set_application_status, cast_vote, reconcile_vote_counts, reserve_application_slot,
+    set_application_status,
+)
+
+
+def make_employer(username='employer'):
+    user = User.objects.create_user(username, f'{username}@example.com', is_employer=True)
+    return EmployerProfile.objects.create(
+        user=user, company_name=f'{username} Ltd', email=f'{username}@example.com',
+        phone_number='+441234567890', country='United Kingdom',
+    )
+
+
+def make_student(username='student', **fields):
+    user = User.objects.create_user(username, f'{username}@example.com', is_student=True)
+    return StudentProfile.objects.create(user=user, **fields)
+
+
+def make_job(employer, **fields):
+    fields = {
+        'title': 'Data intern', 'description': 'Clean some data', 'location': 'London',
+        'job_type': 'INT', 'paid_type': 'UNPAID', 'interview_type': 'DIGITAL', **fields,
+    }
+    return Job.objects.create(employer=employer, **fields)
+
+
+def apply(job, student):
+    """Apply the way apply_job does: take a slot, then create the row."""
+    if not reserve_application_slot(job.pk):
+        return None
+    return Application.objects.create(job=job, student=student)
+
+
+def application_count(job):
+    return Job.objects.values_list('application_count', flat=True).get(pk=job.pk)
+
+
+class ApplicationCountTests(TestCase):
+    def setUp(self):
+        self.job = make_job(make_employer(), max_applications=2)
+        self.students = [make_student(f'student{i}') for i in range(3)]
+
+    def test_reserve_stops_at_capacity(self):
+        self.assertIsNotNone(apply(self.job, self.students[0]))
+        self.assertIsNotNone(apply(self.job, self.students[1]))
+        self.assertIsNone(apply(self.job, self.students[2]))
+        self.assertEqual(application_count(self.job), 2)
+
+    def test_reserve_refuses_closed_job(self):
+        Job.objects.filter(pk=self.job.pk).update(is_active=False)
+        self.assertFalse(reserve_application_slot(self.job.pk))
+        self.assertEqual(application_count(self.job), 0)
+
+    def test_status_changes_move_the_counter(self):
+        application = apply(self.job, self.students[0])
+        set_application_status(application, 'INTERVIEW')
+        self.assertEqual(application_count(self.job), 1)
+        set_application_status(application, 'WITHDRAWN')
+        self.assertEqual(application_count(self.job), 0)
+        set_application_status(application, 'PENDING')
+        self.assertEqual(application_count(self.job), 1)
+
+    def test_withdrawal_frees_a_slot(self):
+        first = apply(self.job, self.students[0])
+        apply(self.job, self.students[1])
+        set_application_status(first, 'WITHDRAWN')
+        self.assertIsNotNone(apply(self.job, self.students[2]))
+        self.assertEqual(application_count(self.job), 2)
+
+    def test_reinstating_into_a_full_job_is_refused(self):
+        first = apply(self.job, self.students[0])
+        apply(self.job, self.students[1])
+        set_application_status(first, 'WITHDRAWN')
+        apply(self.job, self.students[2])
+        with self.assertRaises(JobFull):
+            set_application_status(first, 'ACCEPTED')
+        first.refresh_from_db()
+        self.assertEqual(first.status, 'WITHDRAWN')
+        self.assertEqual(application_count(self.job), 2)
+
+    def test_bulk_status_change_deltas(self):
+        applications = [apply(self.job, student) for student in self.students[:2]]
+        ids = [application.pk for application in applications]
+        self.assertEqual(bulk_set_application_status(Application.objects.filter(pk__in=ids), 'WITHDRAWN'), 2)
+        self.assertEqual(application_count(self.job), 0)
+        self.assertEqual(bulk_set_application_status(Application.objects.filter(pk__in=ids), 'ACCEPTED'), 2)
+        self.assertEqual(application_count(self.job), 2)
+
+    def test_bulk_reinstate_is_all_or_nothing(self):
+        applications = [apply(self.job, student) for student in self.students[:2]]
+        bulk_set_application_status(Application.objects.filter(job=self.job), 'WITHDRAWN')
+        apply(self.job, self.students[2])
+        with self.assertRaises(JobFull):
+            bulk_set_application_status(Application.objects.filter(pk__in=[a.pk for a in applications]), 'PENDING')
+        self.assertEqual(application_count(self.job), 1)
+        self.assertFalse(Application.objects.filter(pk__in=[a.pk for a in applications]).exclude(status='WITHDRAWN'))
+
+    def test_reconcile_repairs_drift(self):
+        apply(self.job, self.students[0])
+        Application.objects.create(job=self.job, student=self.students[1], status='WITHDRAWN')
+        Job.objects.filter(pk=self.job.pk).update(application_count=5)
+        out = StringIO()
+        call_command('reconcile_application_counts', '--dry-run', stdout=out)
+        self.assertIn('Found 1 jobs', out.getvalue())
+        self.assertEqual(application_count(self.job), 5)
+        call_command('reconcile_application_counts', stdout=out)
+        self.assertEqual(application_count(self.job), 1)
+
+    def test_job_save_keeps_the_counter(self):
+        job = Job.objects.get(pk=self.job.pk)
+        apply(self.job, self.students[0])
+        job.title = 'Renamed'
+        job.save()
+        self.assertEqual(application_count(self.job), 1)
+
+
+class VoteTests(TestCase):
+    def setUp(self):
+        self.author = make_student('author')
+        self.voters = [make_student(f'voter{i}').user for i in range(2)]
+        self.question = CommunityQuestion.objects.create(author=self.author, title='Which stack?', body='For a first gig')
+        self.answer = CommunityAnswer.objects.create(question=self.question, author=self.author, body='Django')
+
+    def test_voting_twice_withdraws_the_vote(self):
+        self.assertEqual(cast_vote(self.voters[0], self.question, Vote.UPVOTE), (1, 1, 0))
+        self.assertEqual(cast_vote(self.voters[0], self.question, Vote.UPVOTE), (0, 0, 0))
+        self.assertFalse(Vote.objects.exists())
+
+    def test_switching_sides_moves_both_counters(self):
+        cast_vote(self.voters[0], self.answer, Vote.UPVOTE)
+        cast_vote(self.voters[1], self.answer, Vote.UPVOTE)
+        self.assertEqual(cast_vote(self.voters[0], self.answer, Vote.DOWNVOTE), (0, 1, 1))
+        self.assertEqual(Vote.objects.get(user=self.voters[0]).value, Vote.DOWNVOTE)
+
+    def test_question_vote_refreshes_hot_rank(self):
+        before = CommunityQuestion.objects.get(pk=self.question.pk).hot_rank
+        cast_vote(self.voters[0], self.question, Vote.UPVOTE)
+        self.assertGreater(CommunityQuestion.objects.get(pk=self.question.pk).hot_rank, before)
+
+    def test_reconcile_repairs_drift(self):
+        cast_vote(self.voters[0], self.question, Vote.DOWNVOTE)
+        CommunityQuestion.objects.filter(pk=self.question.pk).update(score=7, upvotes=7, downvotes=0)
+        self.assertEqual(reconcile_vote_counts(), 1)
+        self.assertEqual(
+            CommunityQuestion.objects.values_list('score', 'upvotes', 'downvotes').get(pk=self.question.pk),
+            (-1, 0, 1),
+        )
+
+
+class JobListPagingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        employer = make_employer()
+        salaries = ['£10', '£12', '£12', '£15', '£12', '£9', '£15']
+        self.jobs = [make_job(employer, title=f'Job {i}', salary=salary) for i, salary in enumerate(salaries)]
+        # ties on the leading sort key are what keyset paging has to get right
+        Job.objects.update(posted_date=timezone.now())
+
+    def walk(self, **params):
+        ids = []
+        cursor = None
+        while True:
+            query = {**params, 'page_size': 3, **({'cursor': cursor} if cursor else {})}
+            response = self.client.get(reverse('jobs:job_list'), query, HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+            self.assertEqual(response.status_code, 200)
+            payload = response.json()
+            ids += [job['id'] for job in payload['jobs']]
+            cursor = payload['next_cursor']
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_every_job_once(self):
+        ids = self.walk()
+        self.assertEqual(ids, sorted((job.pk for job in self.jobs), reverse=True))
+
+    def test_salary_sort_breaks_ties_by_id(self):
+        ids = self.walk(sort='salary_asc')
+        expected = sorted(self.jobs, key=lambda job: (job.salary_min, job.pk))
+        self.assertEqual(ids, [job.pk for job in expected])
+
+    def test_new_job_does_not_shift_later_pages(self):
+        first, cursor = paginate(Job.objects.all(), ['-posted_date', '-id'], page_size=3)
+        make_job(self.jobs[0].employer, title='Late arrival')
+        rest, _ = paginate(Job.objects.all(), ['-posted_date', '-id'], cursor, page_size=10)
+        self.assertEqual([job.pk for job in first + rest], sorted((job.pk for job in self.jobs), reverse=True))
+
+    def test_tampered_cursor_is_rejected(self):
+        response = self.client.get(reverse('jobs:job_list'), {'cursor': 'not-a-cursor'},
+                                   HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(MY_APPLICATIONS_PAGE_SIZE=2)
+class MyApplicationsPagingTests(TestCase):
+    def setUp(self):
+        employer = make_employer()
+        self.student = make_student()
+        self.applications = [apply(make_job(employer, title=f'Job {i}'), self.student) for i in range(5)]
+        Application.objects.update(applied_date=timezone.now())
+        self.client.force_login(self.student.user)
+
+    def test_pages_cover_every_application_once(self):
+        ids = []
+        query = {}
+        while True:
+            response = self.client.get(reverse('jobs:my_applications'), query)
+            self.assertEqual(response.status_code, 200)
+            ids += [application.pk for application in response.context['applications']]
+            if not response.context['next_cursor']:
+                break
+            query = {'cursor': response.context['next_cursor']}
+        self.assertEqual(ids, sorted((application.pk for application in self.applications), reverse=True))
+
+    def test_only_own_applications(self):
+        other = make_student('other')
+        apply(self.applications[0].job, other)
+        response = self.client.get(reverse('jobs:my_applications'))
+        self.assertNotIn(other.pk, {application.student_id for application in response.context['applications']})
+
+
+@override_settings(COMMUNITY_PAGE_SIZE=2)
+class CommunityPagingTests(TestCase):
+    def setUp(self):
+        self.author = make_student('author')
+        self.questions = [
+            CommunityQuestion.objects.create(author=self.author, title=f'Portfolio tips {i}', body='How do I show my work?')
+            for i in range(5)
+        ]
+        CommunityQuestion.objects.create(author=self.author, title='Visa question', body='Unrelated')
+        self.client.force_login(self.author.user)
+
+    def walk(self, **params):
+        ids = []
+        query = dict(params)
+        while True:
+            response = self.client.get(reverse('jobs:community'), query)
+            self.assertEqual(response.status_code, 200)
+            ids += [question.pk for question in response.context['questions']]
+            if not response.context['next_cursor']:
+                return ids
+            query = {**params, 'cursor': response.context['next_cursor']}
+
+    def test_search_pages_cover_every_match_once(self):
+        ids = self.walk(q='portfolio')
+        self.assertEqual(sorted(ids), sorted(question.pk for question in self.questions))
+        self.assertEqual(len(ids), len(set(ids)))
+
+    def test_answers_are_searched(self):
+        CommunityAnswer.objects.create(question=self.questions[0], author=self.author, body='Try a zebrafish demo')
+        self.assertEqual(self.walk(q='zebrafish'), [self.questions[0].pk])
+
+    def test_top_sort_pages_cover_every_question_once(self):
+        CommunityQuestion.objects.filter(pk__in=[q.pk for q in self.questions[:3]]).update(score=2)
+        ids = self.walk(sort='top')
+        self.assertEqual(len(ids), CommunityQuestion.objects.count())
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(set(ids[:3]), {q.pk for q in self.questions[:3]})
+
+
+@override_settings(DEFAULT_SALARY_CURRENCY='USD')
+class ParseSalaryTests(TestCase):
+    def assertParses(self, text, low, high, currency):
+        expected = (Decimal(low) if low else None, Decimal(high) if high else None, currency)
+        self.assertEqual(parse_salary(text), expected, text)
+
+    def test_single_figures(self):
+        self.assertParses('200', '200', '200', 'USD')
+        self.assertParses('$18.50/hr', '18.50', '18.50', 'USD')
+        self.assertParses('₹5000', '5000', '5000', 'INR')
+        self.assertParses('15 usd', '15', '15', 'USD')
+
+    def test_ranges(self):
+        self.assertParses('£12-15 per hour', '12', '15', 'GBP')
+        self.assertParses('€1,200 to €1,500', '1200', '1500', 'EUR')
+        self.assertParses('25k - 30k GBP', '25000', '30000', 'GBP')
+        # "25-30k" means 25k-30k
+        self.assertParses('25-30k', '25000', '30000', 'USD')
+
+    def test_durations_are_not_amounts(self):
+        self.assertParses('3 month contract, £500', '500', '500', 'GBP')
+        self.assertParses('3-6 months', None, None, None)
+        self.assertParses('2 days a week', None, None, None)
+
+    def test_unparseable(self):
+        self.assertParses('', None, None, None)
+        self.assertParses('negotiable', None, None, None)
+        self.assertParses('100 or 200', None, None, None)
+
+    def test_job_save_fills_the_columns(self):
+        job = make_job(make_employer(), salary='£12-15 per hour')
+        self.assertEqual((job.salary_min, job.salary_max, job.salary_currency),
+                         (Decimal('12'), Decimal('15'), 'GBP'))
+
+    def test_min_salary_filter_stays_in_one_currency(self):
+        cache.clear()
+        employer = make_employer()
+        pounds = make_job(employer, salary='£50')
+        make_job(employer, salary='₹50')
+        make_job(employer, salary='£20')
+        response = self.client.get(reverse('jobs:job_list'), {'min_salary': '40', 'salary_currency': 'GBP'},
+                                   HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual([job['id'] for job in response.json()['jobs']], [pounds.pk])
+
+
+class FunnelTests(TestCase):
+    def setUp(self):
+        self.job = make_job(make_employer())
+        self.applications = [apply(self.job, make_student(f'student{i}')) for i in range(3)]
+
+    def totals(self):
+        return funnel_summary(Job.objects.filter(pk=self.job.pk), 7)['totals']
+
+    def test_status_changes_fold_into_the_rollup(self):
+        first, second, third = self.applications
+        set_application_status(first, 'INTERVIEW')
+        set_application_status(first, 'ACCEPTED')
+        set_application_status(second, 'REJECTED')
+        set_application_status(third, 'WITHDRAWN')
+        totals = self.totals()
+        self.assertEqual(
+            {column: totals[column] for column in ('applied', 'interviewed', 'accepted', 'rejected', 'withdrawn', 'decisions')},
+            {'applied': 3, 'interviewed': 1, 'accepted': 1, 'rejected': 1, 'withdrawn': 1, 'decisions': 2},
+        )
+        self.assertEqual((totals['interview_rate'], totals['accept_rate']), (33, 33))
+        self.assertEqual(JobFunnelDay.objects.filter(job=self.job).count(), 1)
+
+    def test_changing_a_decision_counts_it_once(self):
+        set_application_status(self.applications[0], 'ACCEPTED')
+        set_application_status(self.applications[0], 'REJECTED')
+        totals = self.totals()
+        self.assertEqual((totals['accepted'], totals['rejected'], totals['decisions']), (1, 1, 1))
+
+    def test_bulk_changes_fold_into_one_row(self):
+        bulk_set_application_status(Application.objects.filter(job=self.job), 'REJECTED')
+        totals = self.totals()
+        self.assertEqual((totals['rejected'], totals['decisions']), (3, 3))
+
+    def test_rebuild_matches_the_live_rollup(self):
+        set_application_status(self.applications[0], 'ACCEPTED')
+        set_application_status(self.applications[1], 'WITHDRAWN')
+        live = list(JobFunnelDay.objects.filter(job=self.job).values())
+        rebuild_funnel([self.job.pk])
+        rebuilt = list(JobFunnelDay.objects.filter(job=self.job).values())
+        for row in live + rebuilt:
+            del row['id']
+        self.assertEqual(rebuilt, live)
+
+
+@override_settings(DEFAULT_SALARY_CURRENCY='USD')
+class KpiTests(TestCase):
+    def setUp(self):
+        self.job = make_job(make_employer())
+        self.students = [make_student(f'student{i}', university=' UCL ') for i in range(3)]
+
+    def age(self, queryset, field):
+        queryset.update(**{field: timezone.now() - 2 * WATERMARK_LAG})
+
+    def applied(self):
+        return dict(ApplicationKpiDay.objects.values_list('university').annotate(n=Sum('applied')))
+
+    def test_rows_younger_than_the_lag_wait_for_the_next_run(self):
+        apply(self.job, self.students[0])
+        self.assertEqual(refresh_kpis()['applications'], 0)
+        self.age(Application.objects.all(), 'applied_date')
+        self.assertEqual(refresh_kpis()['applications'], 1)
+        self.assertEqual(refresh_kpis()['applications'], 0)
+        self.assertEqual(self.applied(), {'UCL': 1})
+
+    def test_watermark_waits_behind_a_young_lower_id(self):
+        young = apply(self.job, self.students[0])
+        old = apply(self.job, self.students[1])
+        self.age(Application.objects.filter(pk=old.pk), 'applied_date')
+        # `young` may still be committing: `old`'s higher id must not be passed yet
+        self.assertEqual(refresh_kpis()['applications'], 0)
+        self.assertEqual(KpiWatermark.objects.get(source='applications').last_id, 0)
+        self.age(Application.objects.filter(pk=young.pk), 'applied_date')
+        self.assertEqual(refresh_kpis()['applications'], 2)
+        self.assertEqual(self.applied(), {'UCL': 2})
+
+    def test_signups_by_role(self):
+        self.age(User.objects.all(), 'date_joined')
+        refresh_kpis()
+        self.assertEqual(dict(SignupDay.objects.values_list('role').annotate(n=Sum('signups'))),
+                         {'student': 3, 'employer': 1})
+
+    def test_decisions_are_folded_by_change_time(self):
+        application = apply(self.job, self.students[0])
+        set_application_status(application, 'ACCEPTED')
+        self.age(Application.objects.all(), 'status_changed_at')
+        self.assertEqual(refresh_kpis()['decisions'], 1)
+        self.assertEqual(kpi_summary(7)['applications']['accepted'], 1)
+
+    def test_payment_totals_stay_per_currency(self):
+        for student, amount, currency in zip(self.students, ['10.50', '20', '300'], ['GBP', 'GBP', '']):
+            Payment.objects.create(application=apply(self.job, student), amount=Decimal(amount), currency=currency,
+                                   released=True, release_date=timezone.now() - 2 * WATERMARK_LAG)
+        self.assertEqual(refresh_kpis()['payments'], 3)
+        self.assertEqual(kpi_summary(7)['payment_totals'], {
+            'released': 3,
+            'amounts': [{'currency': 'USD', 'amount': Decimal('300')}, {'currency': 'GBP', 'amount': Decimal('30.50')}],
+        })
+
+
+class AnswerThreadTests(TestCase):
+    def setUp(self):
+        self.author = make_student()
+        self.question = CommunityQuestion.objects.create(author=self.author, title='CV layout?', body='One page?')
+
+    def answer(self, body, parent=None):
+        return CommunityAnswer.objects.create(question=self.question, author=self.author, body=body, parent=parent)
+
+    def test_depth_first_oldest_first(self):
+        first = self.answer('first')
+        second = self.answer('second')
+        reply = self.answer('reply', first)
+        nested = self.answer('nested', reply)
+        later_reply = self.answer('later reply', first)
+        with self.assertNumQueries(1):
+            roots = answer_thread(self.question)
+        self.assertEqual(roots, [first, second])
+        self.assertEqual(roots[0].thread, [reply, nested, later_reply])
+        self.assertEqual([answer.depth for answer in roots[0].thread], [1, 2, 1])
+        self.assertEqual(roots[1].thread, [])
+
+    def test_deep_threads_cap_the_indent(self):
+        parent = root = self.answer('root')
+        for i in range(MAX_INDENT + 3):
+            parent = self.answer(f'reply {i}', parent)
+        thread = answer_thread(self.question)[0].thread
+        self.assertEqual(thread[-1].depth, MAX_INDENT + 3)
+        self.assertEqual(thread[-1].indent, MAX_INDENT)
+        self.assertEqual(len(thread), MAX_INDENT + 3)
+        self.assertEqual(answer_thread(self.question), [root])
+
+
+@override_settings(QUERY_BUDGET_ENABLED=True, QUERY_BUDGET_ACTION='raise')
+class StudentDashboardBudgetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_worst_case_shell_fits_the_budget(self):
+        # no StudentProfile yet, no is_student (the layout probes the
+        # employer profile) and a cold UI settings cache
+        user = User.objects.create_user('staff', 'staff@example.com', is_staff=True)
+        self.client.force_login(user)
+        response = self.client.get(reverse('jobs:student_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(StudentProfile.objects.filter(user=user).exists())
+
+    def test_returning_student(self):
+        self.client.force_login(make_student().user)
+        self.client.get(reverse('jobs:student_dashboard'))
+        response = self.client.get(reverse('jobs:student_dashboard'))
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,45 @@
+"""
+Threaded answers for community_detail.
+
+CommunityAnswer.parent nests replies to any depth. Instead of following
+`replies` level by level, answer_thread() reads every answer of a question
+in one query (served by the (question, created_at) index) and links the
+tree in memory, so a page costs the same however deep its threads go.
+
+Each root answer gets `thread`: its replies at every depth in display order
+(depth first, oldest first among siblings), each carrying `depth` (1 for a
+direct reply) for the template to indent by.
+"""
+from collections import defaultdict
+
+# Replies nested deeper than this are indented as if at this depth
+MAX_INDENT = 6
+
+
+def answer_thread(question):
+    """The root answers of `question`, oldest first, each with its `thread`."""
+    answers = list(question.answers
+                   .select_related('author__user')
+                   .order_by('created_at', 'id'))
+    ids = {answer.pk for answer in answers}
+    children = defaultdict(list)
+    roots = []
+    for answer in answers:
+        if answer.parent_id in ids:
+            children[answer.parent_id].append(answer)
+        else:
+            roots.append(answer)
+
+    depths = {}
+    for root in roots:
+        depths[root.pk] = root.depth = 0
+        root.thread = []
+        # iterative, so no thread is too deep to render
+        stack = list(reversed(children[root.pk]))
+        while stack:
+            reply = stack.pop()
+            depths[reply.pk] = reply.depth = depths[reply.parent_id] + 1
+            reply.indent = min(reply.depth, MAX_INDENT)
+            root.thread.append(reply)
+            stack.extend(reversed(children[reply.pk]))
+    return roots
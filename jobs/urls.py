@@ -6,9 +6,11 @@ app_name = 'jobs'
 
 urlpatterns = [
     path('dashboard/', views.student_dashboard, name='student_dashboard'),
+    path('dashboard/widgets/<slug:name>/', views.dashboard_widget, name='dashboard_widget'),
     path('applications/', views.my_applications, name='my_applications'),
     path('job/<int:job_id>/apply/', views.apply_job, name='apply_job'),
     path('employer/dashboard/', views.employer_dashboard, name='employer_dashboard'),
+    path('employer/dashboard/widgets/<slug:name>/', views.employer_dashboard_widget, name='employer_dashboard_widget'),
     path('employer/post-job/', views.post_job, name='post_job'),
     path('employer/application/<int:application_id>/', views.manage_application, name='manage_application'),
     path('employer/interview/<int:application_id>/', views.schedule_interview, name='schedule_interview'),
@@ -17,6 +19,9 @@ urlpatterns = [
     path('job/<int:pk>/status/', views.job_status_update, name='job_status_update'),
     path('job/<int:pk>/manage-max-applications/', views.manage_max_applications, name='manage_max_applications'),
     path('employer/bulk-manage/', views.bulk_manage_applications, name='bulk_manage_applications'),
+    path('employer/applications/grid/', views.employer_applications_grid, name='employer_applications_grid'),
+    path('staff/analytics/', views.kpi_dashboard, name='kpi_dashboard'),
+    path('staff/query-stats/', views.query_stats, name='query_stats'),
     path('jobs/', views.job_list, name='job_list'),
     path('interview/<int:pk>/', views.interview_detail, name='interview_detail'),
     path('interview/reschedule/<int:pk>/', views.reschedule_interview, name='reschedule_interview'),
@@ -3,24 +3,40 @@ from venv import logger
 from django.db import IntegrityError
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.urls import reverse
-from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.csrf import csrf_protect, ensure_csrf_cookie
 from django.contrib import messages
 from django.utils import timezone
-from accounts.models import StudentProfile, EmployerProfile
-from payment.models import Payment, TaskAssignment
+from django.conf import settings
+from accounts.models import Location, StudentProfile, EmployerProfile
+from accounts.locations import bounding_box, find_location
+from payment.models import Payment
 from .models import ApplicationResponse, Job, Application, Interview, JobQuestion, ProposedInterviewSlot, Notification, StudentNotification
 from .forms import ApplicationForm, JobForm, InterviewForm, JobQuestionFormSet, MaxApplicationsForm, ResumeForm
+from .search import job_index, question_index
+from .threads import answer_thread
+from .pagination import InvalidCursor, paginate, page_size_from
+from .facets import apply_facets, facet_counts, selected_facets
+from .salary import CURRENCY_CODES
+from .kpis import kpi_summary
+from .querybudget import query_budget, rolling_summary
+from .grid import ORDERINGS as GRID_ORDERINGS, grid_params, grid_queryset, grid_row
+from .services import JobFull, bulk_set_application_status, cast_vote, reserve_application_slot, set_application_status
+from .cache import EMPLOYER, STUDENT, bump_widgets, cache_anonymous_response
+from .widgets import EMPLOYER_WIDGETS, STUDENT_WIDGETS, widget_response
 from django.http import Http404, HttpResponse
 import tempfile
 import subprocess
 import re
 import os
+import math
+from decimal import Decimal, InvalidOperation
 from django.http import JsonResponse, HttpResponseBadRequest
 from django.views.decorators.http import require_POST
 from django.contrib.contenttypes.models import ContentType
 from django.db.models import Sum
-from django.db.models.functions import Coalesce
+from django.db.models.functions import Coalesce, Substr
 from django.db.models import Q
 from django.db import transaction, IntegrityError
 from assessments.models import ApplicantChosenSkill, AssessmentBlueprint  # NEW
@@ -28,73 +44,56 @@ from assessments.services import create_assessment_for_application         # NEW
 from django.db.models import Prefetch
 
 
+# Queries per dashboard request, independent of how many applications, tasks
+# or notifications the student has, enforced by QueryBudgetMiddleware when
+# enabled. The budget is the worst case of the page shell, counting what the
+# layout and context processors run as well as the view:
+#   session, user   2 (the session save happens outside the middleware)
+#   profile         1, plus 1 INSERT on a first visit that creates it
+#   UI settings     1 on a cache miss (jobs/context_processors.py)
+#   account menu    1 user.employerprofile in base.html, for a user without
+#                   is_student (staff, or anyone else opening this page)
+# so a returning student costs 3. Each widget endpoint (jobs/widgets.py)
+# adds at most:
+#   stats          1 aggregate (status counts + earnings)
+#   notifications  1 five newest
+#   tasks          1 assignments (+application, job, submission, feedback)
+#   applications   1 three newest (+job, employer)
+#   interviews     1 next two (+application, job, employer)
+#   recommended    2 StudentJobMatch (+job, employer), saved job ids
+# and nothing beyond the profile lookup when served from the widget cache.
+# A student without materialized matches costs a few more, once.
+STUDENT_DASHBOARD_QUERY_BUDGET = 6
+
 @csrf_protect
+@ensure_csrf_cookie
 @login_required
+@query_budget(STUDENT_DASHBOARD_QUERY_BUDGET)
 def student_dashboard(request):
+    """
+    Page shell only; the sections are loaded from dashboard_widget. See
+    STUDENT_DASHBOARD_QUERY_BUDGET for the queries per request.
+    """
     try:
         student = request.user.studentprofile
     except StudentProfile.DoesNotExist:
         student = StudentProfile.objects.create(user=request.user)
         messages.warning(request, 'Please complete your profile to get started.')
 
-    applications = Application.objects.filter(student=student).select_related('job__employer')
-    task_assignments = TaskAssignment.objects.filter(application__student=student).select_related('application__job', 'submission', 'feedback')
-    # applications = Application.objects.filter(student=student)
-    total_applications = applications.count()
-    interviews = applications.filter(status='INTERVIEW').count()
-    pending = applications.filter(status='PENDING').count()
-    rejected = applications.filter(status='REJECTED').count()
-    payments = Payment.objects.filter(application__student=student, released=True, withdrawn=False)
-    total_earnings = sum(p.amount for p in payments)
-    sidebar_profile_image_url = cache_busted_media_url(
-        student.profile_picture, 'images/default-profile.png'
-    )
-    
-    sp = request.user.studentprofile
-    notifications = (
-        StudentNotification.objects
-        .filter(student=sp)
-        .order_by('-created_at')[:5]
-    )
-
-    recent_applications = applications.order_by('-applied_date')[:3]
-    
-    upcoming_interviews = Interview.objects.filter(
-        application__student=student,
-        status='SCHEDULED',
-        interview_date__gte=timezone.now()
-    ).order_by('interview_date')[:2]
-    
-    recommended_jobs = Job.objects.filter(
-        is_active=True,
-        application_deadline__gt=timezone.now()
-    ).order_by('-posted_date')[:3]
-
-    saved_job_ids = []
-    if hasattr(request.user, 'studentprofile'):
-        saved_job_ids = list(
-            SavedJob.objects.filter(student=request.user.studentprofile)
-            .values_list('job_id', flat=True)
-        )
-
-    
     context = {
         'student': student,
-        'total_applications': total_applications,
-        'interviews': interviews,
-        'pending': pending,
-        'rejected': rejected,
-        'recent_applications': recent_applications,
-        'upcoming_interviews': upcoming_interviews,
-        'recommended_jobs': recommended_jobs,
-        'saved_job_ids': saved_job_ids,
-        'total_earnings': total_earnings,
-        'task_assignments': task_assignments,
-        'sidebar_profile_image_url': sidebar_profile_image_url,
-        'notifications':notifications,
+        'sidebar_profile_image_url': student.profile_picture_url,
     }
     return render(request, 'jobs/student_dashboard.html', context)
 
+@login_required
+def dashboard_widget(request, name):
+    """One section of the student dashboard, cached per student."""
+    if name not in STUDENT_WIDGETS:
+        raise Http404('Unknown widget')
+    student = get_object_or_404(StudentProfile, user=request.user)
+    return widget_response(request, STUDENT, student, name)
+
 @csrf_protect
 @login_required
 def student_interviews(request):
@@ -114,6 +113,8 @@ def student_interviews(request):
     }
     return render(request, 'jobs/student_interviews.html', context)
 
+MY_APPLICATIONS_ORDERING = ['-applied_date', '-id']
+
 @csrf_protect
 @login_required
 def my_applications(request):
@@ -123,11 +124,24 @@ def my_applications(request):
         student = StudentProfile.objects.create(user=request.user)
         messages.warning(request, 'Please complete your profile to get started.')
     
-    applications = Application.objects.filter(student=student).order_by('-applied_date')
-    
+    # One keyset page with every column the rows show joined in, and no
+    # COUNT(*): the cost is bounded by the page size, not by history
+    cursor = request.GET.get('cursor')
+    try:
+        applications, next_cursor = paginate(
+            Application.objects
+            .filter(student=student)
+            .select_related('job__employer', 'assessment__report'),
+            MY_APPLICATIONS_ORDERING, cursor, settings.MY_APPLICATIONS_PAGE_SIZE,
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
+
     context = {
         'student': student,
         'applications': applications,
+        'next_cursor': next_cursor,
+        'is_first_page': not cursor,
     }
     return render(request, 'jobs/my_applications.html', context)
 
@@ -136,7 +150,7 @@ def my_applications(request):
 @csrf_protect
 @login_required
 def apply_job(request, job_id):
-    job = get_object_or_404(Job, id=job_id, is_active=True)
+    job = get_object_or_404(Job.objects.with_acceptance_status(), id=job_id, is_active=True)
     if not job.is_accepting_applications():
         messages.error(request, "This job is closed and no longer accepting applications.")
         return redirect('jobs:job_list')
@@ -201,6 +215,13 @@ def apply_job(request, job_id):
                         messages.info(request, f"You've already applied to '{job.title}'.")
                         return redirect('jobs:application_detail', pk=application.pk)
 
+                    # Claim a slot atomically; losing the race to the last
+                    # slot (or the deadline) rolls the application back.
+                    if not reserve_application_slot(job.pk):
+                        transaction.set_rollback(True)
+                        messages.error(request, "This job just closed and is no longer accepting applications.")
+                        return redirect('jobs:job_list')
+
                     # Save custom job question responses
                     for question in job.questions.all():
                         response_key = f'question_{question.id}'
@@ -247,6 +268,7 @@ def apply_job(request, job_id):
 
 
 @csrf_protect
+@ensure_csrf_cookie
 @login_required
 def employer_dashboard(request):
     try:
@@ -255,30 +277,54 @@ def employer_dashboard(request):
         messages.error(request, 'Please complete your employer profile.')
         return redirect('accounts:employer_profile')
     
-    jobs = Job.objects.filter(employer=employer)
-    applications = Application.objects.filter(job__employer=employer)
-    # notifications = Notification.objects.filter(employer=employer, is_read=False)
-    notifications = (Notification.objects
-                 .filter(employer=request.user.employerprofile, is_read=False)
-                 .order_by('-created_at'))
-    reports = Report.objects.filter(assessment__application__job__employer=employer).order_by('-assessment__submitted_at')
-    sidebar_company_logo_url = cache_busted_media_url(
-        employer.company_logo, 'images/default-logo.png'
-    )
-
-    logger.debug("Loaded %s unseen notifications for employer %s", notifications.count(), employer.company_name)
-    
     context = {
         'employer': employer,
-        'jobs': jobs,
-        'applications': applications,
-        'notifications': notifications,
-        'status_choices': Application.STATUS_CHOICES,  # Add this line
-        'reports': reports,
-        'sidebar_company_logo_url': sidebar_company_logo_url,
+        'sidebar_company_logo_url': employer.company_logo_url,
     }
     return render(request, 'jobs/employer_dashboard.html', context)
 
+@login_required
+def employer_dashboard_widget(request, name):
+    """One section of the employer dashboard, cached per employer."""
+    if name not in EMPLOYER_WIDGETS:
+        raise Http404('Unknown widget')
+    employer = get_object_or_404(EmployerProfile, user=request.user)
+    return widget_response(request, EMPLOYER, employer, name)
+
+@login_required
+def employer_applications_grid(request):
+    """JSON pages of the employer's applications; see jobs/grid.py."""
+    try:
+        employer = request.user.employerprofile
+    except EmployerProfile.DoesNotExist:
+        return JsonResponse({'error': 'Employer profile required'}, status=403)
+
+    filters, sort = grid_params(request.GET, employer)
+    page_size = page_size_from(request, settings.APPLICATION_GRID_PAGE_SIZE, settings.APPLICATION_GRID_MAX_PAGE_SIZE)
+    try:
+        rows, next_cursor = paginate(
+            grid_queryset(employer, filters), GRID_ORDERINGS[sort], request.GET.get('cursor'), page_size,
+        )
+    except InvalidCursor:
+        return JsonResponse({'error': 'Invalid cursor'}, status=400)
+    return JsonResponse({
+        'applications': [grid_row(row) for row in rows],
+        'next_cursor': next_cursor,
+        'sort': sort,
+        'filters': filters,
+    })
+
+@staff_member_required
+def kpi_dashboard(request):
+    """Platform KPIs for staff, read from the refresh_kpis rollups only."""
+    days = settings.KPI_DASHBOARD_DAYS
+    return render(request, 'jobs/kpi_dashboard.html', {'kpis': kpi_summary(days), 'days': days})
+
+@staff_member_required
+def query_stats(request):
+    """This process's rolling query-budget summary; see jobs/querybudget.py."""
+    return JsonResponse({'enabled': settings.QUERY_BUDGET_ENABLED, 'views': rolling_summary.summary()})
+
 # @csrf_protect
 # @login_required(login_url='accounts:login')
 # def mark_notifications_read(request):
@@ -299,11 +345,13 @@ def employer_dashboard(request):
 @csrf_protect
 def mark_notifications_read(request):
     ids = request.POST.getlist('ids[]') or request.POST.getlist('ids')
+    employer = request.user.employerprofile
     qs = Notification.objects.filter(
         id__in=ids,
-        employer=request.user.employerprofile
+        employer=employer
     )
     updated = qs.update(is_read=True)
+    bump_widgets(EMPLOYER, [employer.pk], 'notifications')
     return JsonResponse({'updated': updated})
 
 
@@ -316,7 +364,7 @@ def job_status_update(request, pk):
     if request.method == 'POST':
         is_active = request.POST.get('is_active') == 'True'
         job.is_active = is_active
-        job.save()
+        job.save(update_fields=['is_active'])
         messages.success(request, f"Job status updated to {'Active' if is_active else 'Closed'}.")
         return redirect('jobs:employer_dashboard')
     
@@ -331,14 +379,16 @@ def manage_max_applications(request, pk):
         action = request.POST.get('action')
         if action == 'close':
             job.is_active = False
-            job.save()
+            job.save(update_fields=['is_active'])
             messages.success(request, f"Job '{job.title}' closed.")
             Notification.objects.filter(job=job).update(is_read=True)
+            bump_widgets(EMPLOYER, [job.employer_id], 'notifications')
             return redirect('jobs:employer_dashboard')
         elif form.is_valid():
-            form.save()
+            form.save(commit=False).save(update_fields=['max_applications'])
             messages.success(request, f"Maximum applications for '{job.title}' updated.")
             Notification.objects.filter(job=job).update(is_read=True)
+            bump_widgets(EMPLOYER, [job.employer_id], 'notifications')
             return redirect('jobs:employer_dashboard')
     else:
         form = MaxApplicationsForm(instance=job)
@@ -360,7 +410,11 @@ def bulk_manage_applications(request):
             job__employer__user=request.user
         )
         if status in [choice[0] for choice in Application.STATUS_CHOICES]:
-            applications.update(status=status)
+            try:
+                updated = bulk_set_application_status(applications, status)
+            except JobFull:
+                messages.error(request, "Not enough application slots left to reinstate those withdrawn applications. Raise the job's maximum applications first.")
+                return redirect('jobs:employer_dashboard')
             if message:
                 #  send email or notification to students
                 for app in applications:
@@ -369,7 +423,7 @@ def bulk_manage_applications(request):
                         job=app.job,
                         message=f"Application status updated: {message}"
                     )
-            messages.success(request, f"Updated {applications.count()} applications.")
+            messages.success(request, f"Updated {updated} applications.")
         return redirect('jobs:employer_dashboard')
     return redirect('jobs:employer_dashboard')
 
@@ -382,8 +436,11 @@ def manage_application(request, application_id):
     if request.method == 'POST':
         status = request.POST.get('status')
         if status in [choice[0] for choice in Application.STATUS_CHOICES]:
-            application.status = status
-            application.save()
+            try:
+                set_application_status(application, status)
+            except JobFull:
+                messages.error(request, "This job has no application slots left to reinstate a withdrawn application. Raise its maximum applications first.")
+                return redirect('jobs:manage_application', application_id=application.pk)
             messages.success(request, f'Application status updated to {application.get_status_display()}')
             return redirect('jobs:employer_dashboard')
     
@@ -401,25 +458,29 @@ def schedule_interview(request, application_id):
     if request.method == 'POST':
         form = InterviewForm(request.POST)
         if form.is_valid():
-            interview = form.save(commit=False)
-            interview.application = application
-            interview.status = 'SCHEDULED'
-            interview.save()
-            proposed_slots = form.cleaned_data.get('proposed_slots')
-            if proposed_slots:
-                for slot in proposed_slots.split('\n'):
-                    slot = slot.strip()
-                    if slot:
-                        try:
-                            slot_time = timezone.datetime.strptime(slot, '%Y-%m-%d %H:%M')
-                            ProposedInterviewSlot.objects.create(
-                                interview=interview,
-                                slot_time=slot_time
-                            )
-                        except ValueError:
-                            messages.warning(request, f"Invalid slot format: {slot}")
-            application.status = 'INTERVIEW'
-            application.save()
+            try:
+                with transaction.atomic():
+                    interview = form.save(commit=False)
+                    interview.application = application
+                    interview.status = 'SCHEDULED'
+                    interview.save()
+                    proposed_slots = form.cleaned_data.get('proposed_slots')
+                    if proposed_slots:
+                        for slot in proposed_slots.split('\n'):
+                            slot = slot.strip()
+                            if slot:
+                                try:
+                                    slot_time = timezone.datetime.strptime(slot, '%Y-%m-%d %H:%M')
+                                    ProposedInterviewSlot.objects.create(
+                                        interview=interview,
+                                        slot_time=slot_time
+                                    )
+                                except ValueError:
+                                    messages.warning(request, f"Invalid slot format: {slot}")
+                    set_application_status(application, 'INTERVIEW')
+            except JobFull:
+                messages.error(request, "This job has no application slots left to reinstate a withdrawn application. Raise its maximum applications first.")
+                return redirect('jobs:employer_dashboard')
             messages.success(request, 'Interview scheduled successfully!')
             return redirect('jobs:employer_dashboard')
     else:
@@ -543,8 +604,7 @@ def cancel_interview(request, pk):
     if request.method == 'POST':
         interview.status = 'CANCELED'
         interview.save()
-        interview.application.status = 'PENDING'
-        interview.application.save()
+        set_application_status(interview.application, 'PENDING')
         messages.success(request, 'Interview canceled successfully.')
         return redirect('jobs:employer_interviews')
     
@@ -560,6 +620,7 @@ def cancel_interview(request, pk):
 #     }
 #     return render(request, 'jobs/job_list.html', context)
 
+@cache_anonymous_response('job_list')
 def job_list(request):
     time_range = request.GET.get('time_range', 'all')
     now = timezone.now()
@@ -578,39 +639,201 @@ def job_list(request):
     jobs = Job.objects.filter(is_active=True)
     if start_date:
         jobs = jobs.filter(posted_date__gte=start_date)
-    jobs = jobs.order_by('-posted_date').select_related('employer')
+
+    # "Paid at least X" (per the selected salary_type facet) is a range scan
+    # on the parsed salary_min column. Amounts in different currencies don't
+    # compare, so the floor only applies to salaries in the chosen currency
+    min_salary = _decimal_param(request.GET.get('min_salary'))
+    salary_currency = request.GET.get('salary_currency', '').upper()
+    if salary_currency not in CURRENCY_CODES:
+        salary_currency = settings.DEFAULT_SALARY_CURRENCY
+    if min_salary is not None:
+        jobs = jobs.filter(salary_currency=salary_currency, salary_min__gte=min_salary)
+
+    location_filter = _location_filter(request)
+    if location_filter is not None:
+        jobs = jobs.filter(location_filter)
+
+    # Keyword search goes through the full-text index, ranked best match first
+    query = request.GET.get('q', '').strip()
+    if query:
+        jobs = job_index.search(jobs, query)
+    sort = request.GET.get('sort', '')
+    if sort in SALARY_ORDERINGS:
+        # Keyset pagination needs non-NULL keys, so salary sorts only list
+        # jobs with a parsed salary
+        jobs = jobs.filter(salary_min__isnull=False)
+        ordering = SALARY_ORDERINGS[sort]
+    elif query:
+        ordering = ['search_rank', '-posted_date', '-id']
+    else:
+        sort = ''
+        ordering = ['-posted_date', '-id']
+
+    # facet counts are taken over the results before the facets themselves
+    selected = selected_facets(request.GET)
+    unfaceted = jobs
+    jobs = apply_facets(jobs, selected)
+
+    page_size = page_size_from(request, settings.JOB_LIST_PAGE_SIZE, settings.JOB_LIST_MAX_PAGE_SIZE)
+    cursor = request.GET.get('cursor')
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        try:
+            rows, next_cursor = paginate(_job_list_projection(jobs), ordering, cursor, page_size)
+        except InvalidCursor:
+            return JsonResponse({'error': 'Invalid cursor'}, status=400)
+        skills = _skill_names(row['id'] for row in rows)
+        payload = {
+            'jobs': [_job_list_row(row, skills.get(row['id'], [])) for row in rows],
+            'next_cursor': next_cursor,
+            'is_student': request.user.is_authenticated and hasattr(request.user, 'studentprofile'),
+        }
+        # Facet counts don't change between pages, only send them with the first
+        if not cursor:
+            payload['facets'] = facet_counts(unfaceted, selected)
+        return JsonResponse(payload)
+
+    try:
+        jobs, next_cursor = paginate(
+            jobs.with_acceptance_status().select_related('employer').prefetch_related('skills_required'),
+            ordering, cursor, page_size,
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
 
     context = {
         'jobs': jobs,
+        'next_cursor': next_cursor,
         'time_range': time_range,
+        'query': query,
+        'sort': sort,
+        'min_salary': min_salary,
+        'salary_currency': salary_currency,
+        'currencies': sorted(CURRENCY_CODES),
+        'remote': request.GET.get('remote', '').lower() in ('1', 'true'),
+        'near': request.GET.get('near', ''),
+        'facets': facet_counts(unfaceted, selected),
     }
+    return render(request, 'jobs/job_list.html', context)
 
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        jobs_data = [
-            {
-                'id': job.id,
-                'title': job.title,
-                'employer': {'company_name': job.employer.company_name},
-                'location': job.location,
-                'job_type': job.job_type,
-                'job_type_display': job.get_job_type_display(),
-                'description': job.description,
-                'interview_type_display': job.get_interview_type_display(),
-                'skills_required': [skill.name for skill in job.skills_required.all()],
-                'posted_date': job.posted_date.strftime('%b %d, %Y'),
-                'application_deadline': job.application_deadline.strftime('%b %d, %Y') if job.application_deadline else None,
-                'is_accepting_applications': job.is_accepting_applications(),
-            } for job in jobs
-        ]
-        return JsonResponse({
-            'jobs': jobs_data,
-            'is_student': request.user.is_authenticated and hasattr(request.user, 'studentprofile'),
-        })
 
-    return render(request, 'jobs/job_list.html', context)
+SALARY_ORDERINGS = {
+    'salary_desc': ['-salary_min', '-id'],
+    'salary_asc': ['salary_min', 'id'],
+}
 
+def _decimal_param(value):
+    try:
+        amount = Decimal(value)
+    except (TypeError, InvalidOperation):
+        return None
+    return amount if amount.is_finite() and amount >= 0 else None
+
+def _float_params(value, count):
+    try:
+        numbers = [float(part) for part in value.split(',')]
+    except (AttributeError, ValueError):
+        return None
+    if len(numbers) != count or not all(math.isfinite(n) for n in numbers):
+        return None
+    return numbers
+
+def _location_filter(request):
+    """
+    Q for the location parameters of job_list, all served by the place FK and
+    the Location coordinate index:
+      place=<id>            canonical place (repeatable)
+      remote=true           remote jobs only
+      bbox=s,w,n,e          jobs whose place lies in a lat/lon box
+      near=<id|me>&radius_km=<km>
+                            box around a place, or the student's own location
+    """
+    cond = Q()
+    place_ids = [p for p in request.GET.getlist('place') if p.isdigit()]
+    if place_ids:
+        cond &= Q(place_id__in=place_ids)
+    if request.GET.get('remote', '').lower() in ('1', 'true'):
+        cond &= Q(place__is_remote=True)
+
+    box = _float_params(request.GET.get('bbox'), 4)
+    near = request.GET.get('near', '')
+    if box is None and near:
+        origin = None
+        if near == 'me' and request.user.is_authenticated and hasattr(request.user, 'studentprofile'):
+            student = request.user.studentprofile
+            origin = find_location(student.location, student.country or '')
+        elif near.isdigit():
+            origin = Location.objects.filter(pk=near).first()
+        if origin is not None and origin.latitude is not None:
+            radius = _float_params(request.GET.get('radius_km', ''), 1) or [settings.JOB_NEAR_RADIUS_KM]
+            box = bounding_box(origin.latitude, origin.longitude, max(radius[0], 0))
+        elif origin is not None:
+            # no coordinates yet: fall back to the same place
+            cond &= Q(place=origin)
+    if box is not None:
+        south, west, north, east = box
+        cond &= Q(place__latitude__range=(south, north), place__longitude__range=(west, east))
+    return cond or None
+
+JOB_TYPE_LABELS = dict(Job.JOB_TYPE_CHOICES)
+SALARY_TYPE_LABELS = dict(Job.SALARY_TYPE_CHOICES)
+INTERVIEW_TYPE_LABELS = dict(Job.INTERVIEW_TYPE_CHOICES)
+
+def _job_list_projection(jobs):
+    """Only the columns a job card needs, with the description cut down in SQL."""
+    excerpt = settings.JOB_LIST_EXCERPT_LENGTH
+    fields = ['id', 'title', 'employer__company_name', 'location', 'job_type', 'interview_type',
+              'posted_date', 'application_deadline', 'salary', 'salary_min', 'salary_max',
+              'salary_currency', 'salary_type', 'place_id']
+    if 'search_rank' in jobs.query.annotations:
+        fields.append('search_rank')
+    return (jobs
+            .with_acceptance_status()
+            .annotate(description_excerpt=Substr('description', 1, excerpt + 1))
+            .values(*fields, 'description_excerpt', 'acceptance_status'))
+
+def _skill_names(job_ids):
+    """{job_id: [skill names]} for one page of jobs, in a single query."""
+    names = {}
+    rows = (Job.skills_required.through.objects
+            .filter(job_id__in=list(job_ids))
+            .order_by('skill__name')
+            .values_list('job_id', 'skill__name'))
+    for job_id, name in rows:
+        names.setdefault(job_id, []).append(name)
+    return names
+
+def _job_list_row(row, skills_required=()):
+    excerpt = settings.JOB_LIST_EXCERPT_LENGTH
+    description = row['description_excerpt'] or ''
+    if len(description) > excerpt:
+        description = description[:excerpt].rstrip() + '…'
+    deadline = row['application_deadline']
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'employer': {'company_name': row['employer__company_name']},
+        'location': row['location'],
+        'job_type': row['job_type'],
+        'job_type_display': JOB_TYPE_LABELS.get(row['job_type'], row['job_type']),
+        'description': description,
+        'interview_type_display': INTERVIEW_TYPE_LABELS.get(row['interview_type'], row['interview_type']),
+        'posted_date': row['posted_date'].strftime('%b %d, %Y'),
+        'application_deadline': deadline.strftime('%b %d, %Y') if deadline else None,
+        'salary': row['salary'],
+        'salary_min': row['salary_min'],
+        'salary_max': row['salary_max'],
+        'salary_currency': row['salary_currency'],
+        'salary_type_display': SALARY_TYPE_LABELS.get(row['salary_type']),
+        'place_id': row['place_id'],
+        'skills_required': list(skills_required),
+        'is_accepting_applications': row['acceptance_status'] == Job.ACCEPTING,
+    }
+
+@cache_anonymous_response('job_detail')
 def job_detail(request, pk):
-    job = get_object_or_404(Job, id=pk)
+    job = get_object_or_404(Job.objects.with_acceptance_status(), id=pk)
     is_closed = not job.is_accepting_applications()
     return render(request, 'jobs/job_detail.html', {
         'job': job,
@@ -917,15 +1140,40 @@ def toggle_save_job(request, pk):
     return redirect('jobs:job_detail', pk=pk)
 
 # ---------- Community ----------
+COMMUNITY_ORDERINGS = {
+    'new': ['-created_at', '-id'],
+    # stored score, served by the (-score, -id) index
+    'top': ['-score', '-id'],
+    # precomputed by jobs.services.refresh_hot_ranks, served by (-hot_rank, -id)
+    'hot': ['-hot_rank', '-id'],
+}
+
 @login_required
 def community_list(request):
-    qs = CommunityQuestion.objects.all()
-    q = request.GET.get('q')
-    if q:
-        qs = qs.filter(title__icontains=q) | qs.filter(body__icontains=q)
-    # Annotated score optional: simple order by created_at is fine
+    """
+    One keyset page of questions. ?q= searches titles, bodies and answers
+    through the full-text index (jobs/search.py), best match first.
+    """
+    questions = CommunityQuestion.objects.select_related('author__user')
+    query = (request.GET.get('q') or '').strip()
+    sort = request.GET.get('sort')
+    if sort not in COMMUNITY_ORDERINGS:
+        sort = 'new'
+    ordering = COMMUNITY_ORDERINGS[sort]
+    if query:
+        questions = question_index.search(questions, query)
+        ordering = ['search_rank'] + ordering
+    try:
+        questions, next_cursor = paginate(
+            questions, ordering, request.GET.get('cursor'), settings.COMMUNITY_PAGE_SIZE,
+        )
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor")
     return render(request, 'jobs/community.html', {
-        'questions': qs.select_related('author', 'author__user'),
+        'questions': questions,
+        'next_cursor': next_cursor,
+        'query': query,
+        'sort': sort,
         'form': QuestionForm(),  # quick access to ask form (or use separate page)
     })
 
@@ -949,7 +1197,8 @@ def ask_question(request):
 @login_required
 def community_detail(request, pk):
     question = get_object_or_404(CommunityQuestion, pk=pk)
-    answers = question.answers.select_related('author', 'author__user').prefetch_related('replies')
+    # every answer at every depth in one query; see jobs/threads.py
+    answers = answer_thread(question)
     answer_form = AnswerForm()
     report_form = ReportForm(initial={'target_model': 'question', 'target_id': question.id})
     return render(request, 'jobs/community_detail.html', {
@@ -992,25 +1241,13 @@ def vote_view(request):
     direction = request.POST.get('direction')  # 'up' or 'down'
     if model not in ('question', 'answer') or direction not in ('up', 'down'):
         return HttpResponseBadRequest("Invalid request")
-    ct = ContentType.objects.get_for_model(CommunityQuestion if model=='question' else CommunityAnswer)
-    target = get_object_or_404(ct.model_class(), pk=obj_id)
-    val = 1 if direction == 'up' else -1
-    vote, created = Vote.objects.get_or_create(
-        user=request.user, content_type=ct, object_id=target.id,
-        defaults={'value': val}
-    )
-    if not created:
-        # toggle/flip
-        vote.value = val if vote.value != val else 0  # allow unvote if same click
-        if vote.value == 0:
-            vote.delete()
-        else:
-            vote.save()
+    target = get_object_or_404(CommunityQuestion if model == 'question' else CommunityAnswer, pk=obj_id)
+    value = Vote.UPVOTE if direction == 'up' else Vote.DOWNVOTE
+    # voting the same way twice withdraws the vote
+    score, upvotes, downvotes = cast_vote(request.user, target, value)
     # Return JSON for AJAX
     if request.headers.get('x-requested-with') == 'XMLHttpRequest':
-        # recompute score
-        score = target.votes.aggregate(s=Coalesce(Sum('value'), 0))['s'] or 0
-        return JsonResponse({'score': score})
+        return JsonResponse({'score': score, 'upvotes': upvotes, 'downvotes': downvotes})
     # fallback
     ref = request.META.get('HTTP_REFERER') or 'jobs:community'
     return redirect(ref)
@@ -1071,8 +1308,7 @@ def withdraw_application(request, application_id):
     
     if request.method == 'POST':
         # Update status
-        application.status = 'WITHDRAWN'
-        application.save()
+        set_application_status(application, 'WITHDRAWN')
         
         # Notify employer
         employer_email = application.job.employer.user.email
@@ -1220,23 +1456,7 @@ def assessment_reports(request):
 #         "END:VCALENDAR"
 #     )
 #     return HttpResponse(body, content_type="text/calendar")
-import time
 from datetime import datetime, timedelta
-from django.core.files.storage import default_storage
-from django.contrib.staticfiles.storage import staticfiles_storage
-
-def cache_busted_media_url(filefield, fallback_static_path):
-    """
-    Return filefield.url with ?v=<mtime> if exists; otherwise a static fallback.
-    """
-    if filefield and getattr(filefield, 'name', None) and default_storage.exists(filefield.name):
-        try:
-            mtime = int(default_storage.get_modified_time(filefield.name).timestamp())
-        except Exception:
-            mtime = int(time.time())
-        return f"{filefield.url}?v={mtime}"
-    return staticfiles_storage.url(fallback_static_path)
-
 
 @login_required
 def student_notifications(request):
@@ -1256,6 +1476,7 @@ def student_notification_read(request, pk):
 def student_notifications_mark_all_read(request):
     sp = request.user.studentprofile
     StudentNotification.objects.filter(student=sp, is_read=False).update(is_read=True)
+    bump_widgets(STUDENT, [sp.pk], 'notifications')
     return redirect('jobs:student_notifications')
 
 
@@ -1287,6 +1508,7 @@ def post_job(request):
                 job.is_active = True
                 job.posted_date = timezone.now()
                 job.save()
+                form.save_m2m()
                 for form in question_formset:
                     if form.cleaned_data and not form.cleaned_data.get('DELETE', False):
                         question = form.save(commit=False)
@@ -1319,8 +1541,8 @@ def employer_jobs(request):
 
     try:
         employer = request.user.employerprofile
-        jobs = Job.objects.filter(employer=employer).order_by('-posted_date')
-        logger.debug(f"Retrieved {jobs.count()} jobs for employer {request.user.username}")
+        jobs = list(Job.objects.filter(employer=employer).order_by('-posted_date'))
+        logger.debug(f"Retrieved {len(jobs)} jobs for employer {request.user.username}")
     except EmployerProfile.DoesNotExist:
         logger.error(f"EmployerProfile does not exist for user {request.user.username}")
         messages.error(request, 'Please complete your employer profile.')
@@ -1357,6 +1579,7 @@ def edit_job(request, job_id):
                 job = form.save(commit=False)
                 job.updated_date = timezone.now()
                 job.save()
+                form.save_m2m()
                 # Delete questions marked for deletion
                 for form in question_formset.deleted_forms:
                     if form.instance.pk:
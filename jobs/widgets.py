@@ -0,0 +1,206 @@
+"""
+Lazily loaded dashboard widgets.
+
+student_dashboard and employer_dashboard only render a shell (sidebar,
+header, one placeholder per widget). Each widget is then fetched from its
+own endpoint (dashboard_widget / employer_dashboard_widget), so a slow
+section no longer holds up the first paint.
+
+A widget's HTML is cached per owner (student or employer profile) under a
+version that the writes feeding it bump (see bump_widgets() in jobs/cache.py),
+so loading an unchanged widget costs no queries:
+
+    student   stats          Application, Payment, StudentProfile
+              notifications  StudentNotification
+              tasks          TaskAssignment, TaskSubmission, Feedback
+              applications   Application
+              interviews     Interview
+              recommended    StudentJobMatch, SavedJob, Application, and the
+                             catalogue version
+    employer  notifications  Notification
+              jobs           Job, Application (application_count)
+              applications   static frame; rows are read live from the grid API
+              funnel         JobFunnelDay (via Application writes)
+
+Time-based changes (an interview slipping into the past, a deadline passing)
+are picked up when the entry expires after WIDGET_CACHE_TIMEOUT.
+
+Long lists are paginated with keyset cursors (jobs/pagination.py). The
+employer's jobs widget's "Load more" link requests the next page with
+?cursor=, which is cached like the first page. The applications widget is
+only a shell (bulk actions, filters, sort); its rows are pages of
+employer_applications_grid JSON (jobs/grid.py), fetched by the dashboard.
+"""
+import hashlib
+from collections import namedtuple
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.http import HttpResponse, HttpResponseBadRequest
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from payment.models import TaskAssignment
+from .cache import EMPLOYER, STUDENT, get_catalogue_version, widget_cache_key
+from .funnel import funnel_summary
+from .grid import DEFAULT_SORT, SORT_LABELS, TASK_STATE_LABELS
+from .matching import matched_jobs
+from .models import Application, Interview, Job, Notification, SavedJob, StudentNotification
+from .pagination import InvalidCursor, paginate
+
+# `paginated` widgets get the request's cursor as a second context argument
+Widget = namedtuple('Widget', 'template context catalogue paginated', defaults=(False, False))
+
+
+def student_stats(student):
+    """
+    Application status counts and released earnings in one aggregate query.
+    Application -> Payment is one-to-one, so the join can't inflate the counts.
+    """
+    return Application.objects.filter(student=student).aggregate(
+        total_applications=Count('pk'),
+        interviews=Count('pk', filter=Q(status='INTERVIEW')),
+        pending=Count('pk', filter=Q(status='PENDING')),
+        rejected=Count('pk', filter=Q(status='REJECTED')),
+        total_earnings=Coalesce(
+            Sum('payment__amount', filter=Q(payment__released=True, payment__withdrawn=False)),
+            Value(Decimal('0.00')),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+    )
+
+
+# ---------- Student widgets ----------
+def _student_stats(student):
+    return {'student': student, **student_stats(student)}
+
+
+def _student_notifications(student):
+    notifications = (StudentNotification.objects
+                     .filter(student=student)
+                     .order_by('-created_at')[:5])
+    return {'notifications': notifications}
+
+
+def _student_tasks(student):
+    task_assignments = (TaskAssignment.objects
+                        .filter(application__student=student)
+                        .select_related('application__job', 'submission', 'feedback'))
+    return {'task_assignments': task_assignments}
+
+
+def _student_applications(student):
+    recent_applications = (Application.objects
+                           .filter(student=student)
+                           .select_related('job__employer')
+                           .order_by('-applied_date')[:3])
+    return {'recent_applications': recent_applications}
+
+
+def _student_interviews(student):
+    upcoming_interviews = (Interview.objects
+                           .filter(application__student=student,
+                                   status='SCHEDULED',
+                                   interview_date__gte=timezone.now())
+                           .select_related('application__job__employer')
+                           .order_by('interview_date')[:2])
+    return {'upcoming_interviews': upcoming_interviews}
+
+
+def _student_recommended(student):
+    recommended_jobs = matched_jobs(student, k=3)
+    # only the bookmark state of the recommended cards is shown
+    saved_job_ids = set(SavedJob.objects
+                        .filter(student=student, job_id__in=[job.pk for job in recommended_jobs])
+                        .values_list('job_id', flat=True))
+    return {'recommended_jobs': recommended_jobs, 'saved_job_ids': saved_job_ids}
+
+
+STUDENT_WIDGETS = {
+    'stats': Widget('jobs/widgets/student_stats.html', _student_stats),
+    'notifications': Widget('jobs/widgets/student_notifications.html', _student_notifications),
+    'tasks': Widget('jobs/widgets/student_tasks.html', _student_tasks),
+    'applications': Widget('jobs/widgets/student_applications.html', _student_applications),
+    'interviews': Widget('jobs/widgets/student_interviews.html', _student_interviews),
+    # job cards change with the catalogue (closed jobs, edited titles)
+    'recommended': Widget('jobs/widgets/student_recommended.html', _student_recommended, catalogue=True),
+}
+
+
+# ---------- Employer widgets ----------
+EMPLOYER_JOB_ORDERING = ['-posted_date', '-id']
+
+
+def _employer_notifications(employer):
+    # shown notifications are marked read when dismissed, so the rest follow
+    notifications = (Notification.objects
+                     .filter(employer=employer, is_read=False)
+                     .select_related('job')
+                     .order_by('-created_at')[:settings.EMPLOYER_DASHBOARD_NOTIFICATIONS])
+    return {'notifications': notifications}
+
+
+def _employer_jobs(employer, cursor):
+    # Job.application_count is kept in step by jobs/services.py, so the
+    # Applications column needs no per-row COUNT
+    jobs, next_cursor = paginate(
+        Job.objects.filter(employer=employer),
+        EMPLOYER_JOB_ORDERING, cursor, settings.EMPLOYER_DASHBOARD_PAGE_SIZE,
+    )
+    return {'jobs': jobs, 'next_cursor': next_cursor}
+
+
+def _employer_applications(employer):
+    # rows come from employer_applications_grid; this is the frame only
+    return {
+        'status_choices': Application.STATUS_CHOICES,
+        'task_states': TASK_STATE_LABELS.items(),
+        'sorts': SORT_LABELS.items(),
+        'default_sort': DEFAULT_SORT,
+        'page_size': settings.EMPLOYER_DASHBOARD_PAGE_SIZE,
+    }
+
+
+def _employer_funnel(employer):
+    # O(days x jobs) rollup rows, never the Application table
+    days = settings.FUNNEL_CHART_DAYS
+    return {'funnel': funnel_summary(Job.objects.filter(employer=employer), days), 'days': days}
+
+
+EMPLOYER_WIDGETS = {
+    'notifications': Widget('jobs/widgets/employer_notifications.html', _employer_notifications),
+    'jobs': Widget('jobs/widgets/employer_jobs.html', _employer_jobs, paginated=True),
+    'applications': Widget('jobs/widgets/employer_applications.html', _employer_applications),
+    'funnel': Widget('jobs/widgets/employer_funnel.html', _employer_funnel),
+}
+
+WIDGETS = {STUDENT: STUDENT_WIDGETS, EMPLOYER: EMPLOYER_WIDGETS}
+
+
+def widget_response(request, scope, owner, name):
+    """Serve one widget fragment, from the cache when its version is unchanged."""
+    widget = WIDGETS[scope][name]
+    extra = [f"c{get_catalogue_version()}"] if widget.catalogue else []
+    cursor = request.GET.get('cursor') if widget.paginated else None
+    if cursor:
+        extra.append(hashlib.md5(cursor.encode('utf-8')).hexdigest())
+    key = widget_cache_key(scope, owner.pk, name, *extra)
+    html = cache.get(key)
+    if html is not None:
+        state = 'hit'
+    else:
+        state = 'miss'
+        try:
+            context = widget.context(owner, cursor) if widget.paginated else widget.context(owner)
+        except InvalidCursor:
+            return HttpResponseBadRequest('Invalid cursor')
+        html = render_to_string(widget.template, context, request)
+        cache.set(key, html, settings.WIDGET_CACHE_TIMEOUT)
+    response = HttpResponse(html)
+    response['X-Widget-Cache'] = state
+    # per-user content: never let a shared cache keep it
+    response['Cache-Control'] = 'private, no-cache'
+    return response
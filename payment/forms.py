@@ -1,4 +1,5 @@
 from django import forms
+from decimal import Decimal
 from .models import TaskAssignment, Feedback, TaskSubmission
 
 class TaskAssignmentForm(forms.ModelForm):
@@ -27,4 +28,9 @@ class TaskSubmissionForm(forms.ModelForm):
         widgets = {
             'work_file': forms.FileInput(attrs={'data-bs-toggle': 'tooltip', 'title': 'Upload your completed work (e.g., PDF, code, image)'}),
             'description': forms.Textarea(attrs={'data-bs-toggle': 'tooltip', 'title': 'Describe tools, technologies, or details (e.g., Python, Figma, color contrast used)'}),
-        }
\ No newline at end of file
+        }
+class PaymentReleaseForm(forms.Form):
+    amount = forms.DecimalField(
+        max_digits=10, decimal_places=2, min_value=Decimal('0.01'),
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01', 'data-bs-toggle': 'tooltip', 'title': 'Total owed for this task'}),
+    )
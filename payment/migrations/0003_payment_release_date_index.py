@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 07:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payment', '0002_tasksubmission'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='release_date',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
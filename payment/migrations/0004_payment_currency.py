@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-17 12:40
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_currency(apps, schema_editor):
+    # payments were charged in their job's salary currency
+    Payment = apps.get_model('payment', 'Payment')
+    for payment in Payment.objects.filter(currency='').annotate(job_currency=F('application__job__salary_currency')):
+        payment.currency = payment.job_currency or settings.DEFAULT_SALARY_CURRENCY
+        payment.save(update_fields=['currency'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0032_alter_job_salary_type'),
+        ('payment', '0003_payment_release_date_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='currency',
+            field=models.CharField(blank=True, default='', max_length=3),
+        ),
+        migrations.RunPython(backfill_currency, migrations.RunPython.noop),
+    ]
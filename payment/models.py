@@ -39,8 +39,11 @@ class Feedback(models.Model):
 class Payment(models.Model):
     application = models.OneToOneField(Application, on_delete=models.CASCADE, related_name='payment')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # ISO code the amount was charged in (the job's salary currency)
+    currency = models.CharField(max_length=3, blank=True, default='')
     released = models.BooleanField(default=False)
-    release_date = models.DateTimeField(null=True, blank=True)
+    # indexed for refresh_kpis, which reads releases newer than its watermark
+    release_date = models.DateTimeField(null=True, blank=True, db_index=True)
     stripe_payment_id = models.CharField(max_length=255, blank=True)
     withdrawn = models.BooleanField(default=False)
 
@@ -1,3 +1,61 @@
-from django.test import TestCase
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from jobs.models import Application
+from jobs.tests import make_employer, make_job, make_student
+from .models import Payment, TaskAssignment, TaskSubmission
+from .views import stripe_amount
+
+
+def submitted_task(job):
+    application = Application.objects.create(job=job, student=make_student(), status='ACCEPTED')
+    task = TaskAssignment.objects.create(application=application, task_description='Build a landing page')
+    TaskSubmission.objects.create(task_assignment=task, description='Done in Figma')
+    return task
+
+
+@override_settings(DEFAULT_SALARY_CURRENCY='USD')
+@mock.patch('stripe.Charge.create', return_value=mock.Mock(id='ch_test'))
+class ReleasePaymentTests(TestCase):
+    feedback = {'task_given': 'Landing page', 'performance': 'Great', 'rating': 5}
+
+    def setUp(self):
+        self.employer = make_employer()
+        self.client.force_login(self.employer.user)
+
+    def test_fixed_salary_is_paid_with_the_feedback(self, charge):
+        task = submitted_task(make_job(self.employer, paid_type='PAID', salary='£250', salary_type='FIXED'))
+        self.client.post(reverse('payment:submit_feedback', args=[task.pk]), self.feedback)
+        payment = Payment.objects.get(application=task.application)
+        self.assertEqual((payment.amount, payment.currency, payment.released), (Decimal('250'), 'GBP', True))
+        self.assertEqual((charge.call_args.kwargs['amount'], charge.call_args.kwargs['currency']), (25000, 'gbp'))
+
+    def test_hourly_salary_asks_for_the_amount(self, charge):
+        task = submitted_task(make_job(self.employer, paid_type='PAID', salary='£12-15 per hour', salary_type='HOURLY'))
+        response = self.client.post(reverse('payment:submit_feedback', args=[task.pk]), self.feedback)
+        self.assertRedirects(response, reverse('payment:release_payment', args=[task.pk]))
+        self.assertFalse(Payment.objects.exists())
+        charge.assert_not_called()
+
+        self.client.post(reverse('payment:release_payment', args=[task.pk]), {'amount': '180.00'})
+        payment = Payment.objects.get(application=task.application)
+        self.assertEqual((payment.amount, payment.released), (Decimal('180'), True))
+
+        # already released: the form refuses a second charge
+        self.client.post(reverse('payment:release_payment', args=[task.pk]), {'amount': '180.00'})
+        self.assertEqual(charge.call_count, 1)
+
+    def test_release_needs_a_completed_task(self, charge):
+        task = submitted_task(make_job(self.employer, paid_type='PAID', salary='£12 per hour', salary_type='HOURLY'))
+        self.client.post(reverse('payment:release_payment', args=[task.pk]), {'amount': '50'})
+        self.assertFalse(Payment.objects.exists())
+        charge.assert_not_called()
+
+
+class StripeAmountTests(TestCase):
+    def test_smallest_unit(self):
+        self.assertEqual(stripe_amount(Decimal('12.345'), 'GBP'), 1235)
+        self.assertEqual(stripe_amount(Decimal('1500.50'), 'jpy'), 1501)
@@ -1,4 +1,5 @@
 import stripe
+from decimal import ROUND_HALF_UP, Decimal
 from django.conf import settings
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
@@ -8,13 +9,26 @@ from django.core.mail import send_mail
 from django.urls import reverse
 from django.http import HttpResponseRedirect
 from .models import TaskAssignment, Feedback, Payment, TaskSubmission
-from .forms import TaskAssignmentForm, FeedbackForm, TaskSubmissionForm
+from .forms import TaskAssignmentForm, FeedbackForm, TaskSubmissionForm, PaymentReleaseForm
 from accounts.models import EmployerProfile, StudentProfile
+from jobs.cache import STUDENT, bump_widgets
 from jobs.models import Application
 from django.utils import timezone
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
+# Currencies Stripe takes in whole units rather than hundredths
+ZERO_DECIMAL_CURRENCIES = {
+    'BIF', 'CLP', 'DJF', 'GNF', 'JPY', 'KMF', 'KRW', 'MGA', 'PYG', 'RWF', 'UGX', 'VND', 'VUV', 'XAF', 'XOF', 'XPF',
+}
+
+
+def stripe_amount(amount, currency):
+    """`amount` (a Decimal) in the smallest unit Stripe expects for `currency`."""
+    if currency.upper() in ZERO_DECIMAL_CURRENCIES:
+        return int(amount.quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+    return int((amount * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
 @csrf_protect
 @login_required
 def assign_task(request, application_id):
@@ -59,14 +73,54 @@ def submit_task(request, task_id):
         form = TaskSubmissionForm()
     return render(request, 'payment/submit_task.html', {'form': form, 'task': task})
 
+def _release_payment(request, task, amount):
+    """
+    Charge `amount` in the job's salary currency and mark the task's payment
+    released. A charge that failed earlier leaves its unreleased Payment
+    behind, which a retry reuses rather than tripping the one-to-one.
+    """
+    job = task.application.job
+    currency = job.salary_currency or settings.DEFAULT_SALARY_CURRENCY
+    payment, created = Payment.objects.get_or_create(
+        application=task.application, defaults={'amount': amount, 'currency': currency},
+    )
+    if not created:
+        payment.amount = amount
+        payment.currency = currency
+    try:
+        charge = stripe.Charge.create(
+            amount=stripe_amount(payment.amount, currency),
+            currency=currency.lower(),
+            source='tok_visa',
+            description=f'Payment for {job.title}',
+        )
+    except stripe.error.StripeError as e:
+        payment.save()
+        messages.error(request, f'Payment release failed: {str(e)}')
+        return False
+    payment.stripe_payment_id = charge.id
+    payment.released = True
+    payment.release_date = timezone.now()
+    payment.save()
+    send_mail(
+        subject='Payment Released',
+        message=f'Your payment of {payment.amount} {currency} for {job.title} has been released.',
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        recipient_list=[task.application.student.user.email],
+        fail_silently=True,
+    )
+    messages.success(request, f'Payment of {payment.amount} {currency} released.')
+    return True
+
 @csrf_protect
 @login_required
 def submit_feedback(request, task_id):
     task = get_object_or_404(TaskAssignment, pk=task_id, application__job__employer__user=request.user)
-    if not task.submission:
+    # one-to-one reverse relations raise rather than return None when unset
+    if not hasattr(task, 'submission'):
         messages.error(request, 'Student must submit work before feedback can be provided.')
         return redirect('jobs:employer_dashboard')
-    if task.feedback.exists():  # Check for existing feedback
+    if hasattr(task, 'feedback'):  # Check for existing feedback
         messages.error(request, 'Feedback already submitted for this task.')
         return redirect('jobs:employer_dashboard')
     if request.method == 'POST':
@@ -77,37 +131,50 @@ def submit_feedback(request, task_id):
             feedback.save()
             task.completed = True
             task.save()
-            if task.application.job.paid_type == 'PAID':
-                payment = Payment.objects.create(
-                    application=task.application,
-                    amount=task.application.job.salary,
-                )
-                try:
-                    charge = stripe.Charge.create(
-                        amount=int(payment.amount * 100),
-                        currency='usd',
-                        source='tok_visa',
-                        description=f'Payment for {task.application.job.title}',
-                    )
-                    payment.stripe_payment_id = charge.id
-                    payment.released = True
-                    payment.release_date = timezone.now()
-                    payment.save()
-                    send_mail(
-                        subject='Payment Released',
-                        message=f'Your payment of ${payment.amount} for {task.application.job.title} has been released.',
-                        from_email=settings.DEFAULT_FROM_EMAIL,
-                        recipient_list=[task.application.student.user.email],
-                        fail_silently=True,
-                    )
-                except stripe.error.StripeError as e:
-                    messages.error(request, f'Payment release failed: {str(e)}')
             messages.success(request, 'Feedback submitted and task completed.')
+            job = task.application.job
+            if job.paid_type != 'PAID':
+                return redirect('jobs:employer_dashboard')
+            # only a single figure is known to be the whole amount owed; an
+            # hourly or daily rate, or a range, needs the employer to confirm it
+            if job.salary_min is None or job.salary_min != job.salary_max or job.salary_type != 'FIXED':
+                messages.info(request, f"The salary '{job.salary}' is not a single fixed total. Confirm the amount to release.")
+                return redirect('payment:release_payment', task_id=task.pk)
+            _release_payment(request, task, job.salary_min)
+            return redirect('jobs:employer_dashboard')
             return redirect('jobs:employer_dashboard')
     else:
         form = FeedbackForm()
     return render(request, 'payment/submit_feedback.html', {'form': form, 'task': task})
 
+@csrf_protect
+@login_required
+def release_payment(request, task_id):
+    task = get_object_or_404(
+        TaskAssignment.objects.select_related('application__job', 'application__student__user'),
+        pk=task_id, application__job__employer__user=request.user,
+    )
+    job = task.application.job
+    if not task.completed or job.paid_type != 'PAID':
+        messages.error(request, 'Only completed tasks on paid jobs can be paid.')
+        return redirect('jobs:employer_dashboard')
+    if Payment.objects.filter(application=task.application, released=True).exists():
+        messages.error(request, 'Payment already released for this task.')
+        return redirect('jobs:employer_dashboard')
+    if request.method == 'POST':
+        form = PaymentReleaseForm(request.POST)
+        if form.is_valid():
+            _release_payment(request, task, form.cleaned_data['amount'])
+            return redirect('jobs:employer_dashboard')
+    else:
+        form = PaymentReleaseForm(initial={'amount': job.salary_max or job.salary_min})
+    return render(request, 'payment/release_payment.html', {
+        'form': form,
+        'task': task,
+        'job': job,
+        'currency': job.salary_currency or settings.DEFAULT_SALARY_CURRENCY,
+    })
+
 @csrf_protect
 @login_required
 def withdraw_earnings(request):
@@ -124,6 +191,7 @@ def withdraw_earnings(request):
                     description='Earnings withdrawal',
                 )
                 payments.update(withdrawn=True)
+                bump_widgets(STUDENT, [student.pk], 'stats')
                 messages.success(request, 'Earnings withdrawn successfully.')
             except stripe.error.StripeError as e:
                 messages.error(request, f'Withdrawal failed: {str(e)}')
@@ -165,7 +233,7 @@ def stripe_connect_onboarding(request):
 @login_required
 def task_submissions(request):
     if hasattr(request.user, 'employerprofile'):
-        assignments = TaskAssignment.objects.filter(application__job__employer__user=request.user).select_related('submission', 'feedback')
+        assignments = TaskAssignment.objects.filter(application__job__employer__user=request.user).select_related('submission', 'feedback', 'application__job', 'application__payment')
         return render(request, 'payment/task_submissions.html', {'assignments': assignments, 'user_type': 'employer'})
     else:
         assignments = TaskAssignment.objects.filter(application__student__user=request.user).select_related('submission', 'feedback')
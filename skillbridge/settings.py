@@ -38,6 +38,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    # inactive unless QUERY_BUDGET_ENABLED
+    'jobs.querybudget.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'skillbridge.urls'
@@ -134,6 +136,68 @@ SESSION_SAVE_EVERY_REQUEST = True
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY')
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY')
 
+# Job listings
+JOB_LIST_PAGE_SIZE = config('JOB_LIST_PAGE_SIZE', default=20, cast=int)
+JOB_LIST_MAX_PAGE_SIZE = config('JOB_LIST_MAX_PAGE_SIZE', default=100, cast=int)
+JOB_LIST_EXCERPT_LENGTH = config('JOB_LIST_EXCERPT_LENGTH', default=280, cast=int)
+# Currency assumed for salaries that don't name one (see jobs/salary.py)
+DEFAULT_SALARY_CURRENCY = config('DEFAULT_SALARY_CURRENCY', default='USD')
+# Max age (seconds) of the per-process job recommendation index (see jobs/recommendations.py)
+RECOMMENDATION_INDEX_TTL = config('RECOMMENDATION_INDEX_TTL', default=300, cast=int)
+# Min age (seconds) before a catalogue change may trigger an early rebuild of it
+RECOMMENDATION_INDEX_MIN_AGE = config('RECOMMENDATION_INDEX_MIN_AGE', default=60, cast=int)
+# Jobs kept per student in StudentJobMatch (see jobs/matching.py)
+STUDENT_MATCH_TOP_K = config('STUDENT_MATCH_TOP_K', default=20, cast=int)
+# Default radius for job_list ?near= searches
+JOB_NEAR_RADIUS_KM = config('JOB_NEAR_RADIUS_KM', default=50, cast=float)
+
+# Per-request query and latency budgets (see jobs/querybudget.py)
+QUERY_BUDGET_ENABLED = config('QUERY_BUDGET_ENABLED', default=False, cast=bool)
+# 'log' a warning or 'raise' QueryBudgetExceeded when a request is over budget
+QUERY_BUDGET_ACTION = config('QUERY_BUDGET_ACTION', default='log')
+# Budget of views without @query_budget (0 = none), and of every view's wall time
+QUERY_BUDGET_DEFAULT_QUERIES = config('QUERY_BUDGET_DEFAULT_QUERIES', default=0, cast=int)
+QUERY_BUDGET_VIEW_MS = config('QUERY_BUDGET_VIEW_MS', default=0, cast=int)
+# Requests per URL name kept in the rolling summary
+QUERY_BUDGET_WINDOW = config('QUERY_BUDGET_WINDOW', default=200, cast=int)
+
+# Cache (use a shared backend such as Redis or Memcached when running more
+# than one process, otherwise catalogue invalidation is per-process)
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='skillbridge'),
+    }
+}
+# Anonymous catalogue pages (see jobs/cache.py); writes invalidate them early
+CATALOGUE_CACHE_TIMEOUT = config('CATALOGUE_CACHE_TIMEOUT', default=300, cast=int)
+# Per-user dashboard widget fragments (see jobs/widgets.py)
+WIDGET_CACHE_TIMEOUT = config('WIDGET_CACHE_TIMEOUT', default=900, cast=int)
+# Questions per page of the community board
+COMMUNITY_PAGE_SIZE = config('COMMUNITY_PAGE_SIZE', default=20, cast=int)
+# "Hot" community sort: a question must double its engagement every half-life
+# to hold its place, and an answer counts as this many votes (see
+# jobs.services.hot_rank; run refresh_hot_ranks after changing either)
+COMMUNITY_HOT_HALF_LIFE_HOURS = config('COMMUNITY_HOT_HALF_LIFE_HOURS', default=12, cast=float)
+COMMUNITY_HOT_ANSWER_WEIGHT = config('COMMUNITY_HOT_ANSWER_WEIGHT', default=2, cast=float)
+# Per-user UI settings read by the context processor (see jobs/context_processors.py)
+UI_SETTINGS_CACHE_TIMEOUT = config('UI_SETTINGS_CACHE_TIMEOUT', default=86400, cast=int)
+# Rows per page of the employer dashboard's jobs and applications widgets
+EMPLOYER_DASHBOARD_PAGE_SIZE = config('EMPLOYER_DASHBOARD_PAGE_SIZE', default=25, cast=int)
+# Unread notifications shown on the employer dashboard at a time
+EMPLOYER_DASHBOARD_NOTIFICATIONS = config('EMPLOYER_DASHBOARD_NOTIFICATIONS', default=10, cast=int)
+# Rows per page of the student's My Applications page
+MY_APPLICATIONS_PAGE_SIZE = config('MY_APPLICATIONS_PAGE_SIZE', default=25, cast=int)
+# Employer applications grid API (see jobs/grid.py)
+APPLICATION_GRID_PAGE_SIZE = config('APPLICATION_GRID_PAGE_SIZE', default=50, cast=int)
+APPLICATION_GRID_MAX_PAGE_SIZE = config('APPLICATION_GRID_MAX_PAGE_SIZE', default=200, cast=int)
+# Days of hiring-funnel history charted on the employer dashboard
+FUNNEL_CHART_DAYS = config('FUNNEL_CHART_DAYS', default=30, cast=int)
+# Staff analytics page (see jobs/kpis.py): days shown, and universities and
+# countries listed
+KPI_DASHBOARD_DAYS = config('KPI_DASHBOARD_DAYS', default=30, cast=int)
+KPI_TOP_GROUPS = config('KPI_TOP_GROUPS', default=20, cast=int)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -10,3 +10,73 @@ document.addEventListener("DOMContentLoaded", function () {
     });
   });
 });
+
+// Dashboard widgets: placeholders with data-widget-url are filled in after
+// the page has painted. Each fragment fires a bubbling "widget:loaded" event
+// so page scripts can bind to the new content.
+function loadDashboardWidget(el) {
+  return fetch(el.dataset.widgetUrl, {
+    headers: { "X-Requested-With": "XMLHttpRequest" },
+    credentials: "same-origin",
+  })
+    .then((res) => (res.ok ? res.text() : Promise.reject(res.status)))
+    .then((html) => {
+      el.innerHTML = html;
+      // cached fragments may carry an older token; use the current cookie
+      el.querySelectorAll('input[name="csrfmiddlewaretoken"]').forEach((input) => {
+        input.value = getCookie("csrftoken");
+      });
+      el.querySelectorAll('[data-bs-toggle="tooltip"]').forEach((trigger) => {
+        new bootstrap.Tooltip(trigger);
+      });
+      el.dispatchEvent(new CustomEvent("widget:loaded", { bubbles: true }));
+    })
+    .catch(() => {
+      el.innerHTML =
+        '<div class="text-center text-muted small py-3">This section could not be loaded. ' +
+        '<a href="#" class="widget-retry">Try again</a></div>';
+    });
+}
+
+document.addEventListener("DOMContentLoaded", function () {
+  document.querySelectorAll("[data-widget-url]").forEach(loadDashboardWidget);
+});
+
+document.addEventListener("click", function (e) {
+  const retry = e.target.closest(".widget-retry");
+  if (retry) {
+    e.preventDefault();
+    loadDashboardWidget(retry.closest("[data-widget-url]"));
+  }
+});
+
+// Paginated widgets: "Load more" fetches the next page of the same widget
+// and appends its [data-widget-rows] children in place.
+document.addEventListener("click", function (e) {
+  const more = e.target.closest(".widget-more");
+  if (!more) return;
+  e.preventDefault();
+  const widget = more.closest("[data-widget-url]");
+  more.classList.add("disabled");
+  fetch(more.href, {
+    headers: { "X-Requested-With": "XMLHttpRequest" },
+    credentials: "same-origin",
+  })
+    .then((res) => (res.ok ? res.text() : Promise.reject(res.status)))
+    .then((html) => {
+      const page = document.createElement("template");
+      page.innerHTML = html;
+      const rows = widget.querySelector("[data-widget-rows]");
+      const newRows = page.content.querySelector("[data-widget-rows]");
+      if (rows && newRows) rows.append(...newRows.children);
+      const next = page.content.querySelector("[data-widget-more]");
+      const current = more.closest("[data-widget-more]");
+      if (next) current.replaceWith(next);
+      else current.remove();
+      widget.querySelectorAll('[data-bs-toggle="tooltip"]').forEach((trigger) => {
+        bootstrap.Tooltip.getOrCreateInstance(trigger);
+      });
+      widget.dispatchEvent(new CustomEvent("widget:loaded", { bubbles: true }));
+    })
+    .catch(() => more.classList.remove("disabled"));
+});